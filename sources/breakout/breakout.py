@@ -5,11 +5,19 @@ from ..utils import geometry as geo
 from ..utils.polygon import Polygon
 from ..utils.vector2 import Vector2
 from ..utils.shape import Shape
+from ..utils.spatial_hash import SpatialHash
+from ..utils.sweep import SweepHit, sweep_circle_first, swept_aabb
 
 # 画面サイズ定数
 SCREEN_WIDTH = 160
 SCREEN_HEIGHT = 120
 
+# 衝突レイヤー（Shape.category / mask のビット）
+LAYER_WALL = 1 << 0
+LAYER_PADDLE = 1 << 1
+LAYER_BLOCK = 1 << 2
+LAYER_BALL = 1 << 3
+
 class App:
     def __init__(self):
         pyxel.init(SCREEN_WIDTH, SCREEN_HEIGHT, title="Breakout Demo")
@@ -24,6 +32,10 @@ class App:
         self._init_ball()
         self._init_walls()
         
+        # 壁・パドル・ブロックをまとめて登録する空間ハッシュ（レイヤーで絞り込んで検索する）
+        self.shape_hash = SpatialHash(cell_size=32)
+        self.shape_hash.insert_all([self.wall_left, self.wall_right, self.wall_top, self.wall_bottom, self.paddle])
+
         # ブロック（ポリゴンのリスト）
         self.blocks: list[Polygon] = []
         self.setup_blocks()
@@ -42,11 +54,14 @@ class App:
             Vector2(paddle_center_x + self.paddle_width/2, paddle_y),
             self.paddle_radius
         )
+        self.paddle.category = LAYER_PADDLE
 
     def _init_ball(self):
         """ボールを初期化。"""
         self.ball = geo.Circle(SCREEN_WIDTH / 2, SCREEN_HEIGHT - 20, 2.5)
         self.ball_vel = Vector2(1.5, -2.0)
+        self.ball.category = LAYER_BALL
+        self.ball.mask = LAYER_WALL | LAYER_PADDLE | LAYER_BLOCK
 
     def _init_walls(self):
         """壁（Line）を初期化。"""
@@ -54,9 +69,13 @@ class App:
         self.wall_right = geo.Line(Vector2(SCREEN_WIDTH, 0), Vector2(SCREEN_WIDTH, SCREEN_HEIGHT))
         self.wall_top = geo.Line(Vector2(0, 0), Vector2(SCREEN_WIDTH, 0))
         self.wall_bottom = geo.Line(Vector2(0, SCREEN_HEIGHT), Vector2(SCREEN_WIDTH, SCREEN_HEIGHT))
+        for wall in (self.wall_left, self.wall_right, self.wall_top, self.wall_bottom):
+            wall.category = LAYER_WALL
 
     def setup_blocks(self):
         """ブロックを配置。"""
+        for block in self.blocks:
+            self.shape_hash.remove(block)
         self.blocks.clear()
         cols, rows = 8, 5
         block_w, block_h = 16, 8
@@ -69,7 +88,9 @@ class App:
                 by = start_y + r * (block_h + 2)
                 block = Polygon.create_rect(block_w, block_h, bx + block_w/2, by + block_h/2)
                 block.color = colors[r % len(colors)]  # type: ignore
+                block.category = LAYER_BLOCK
                 self.blocks.append(block)
+                self.shape_hash.insert(block)
 
     # --- Update ---
 
@@ -83,9 +104,7 @@ class App:
         dx = self._get_input()
         self._update_paddle(dx)
         self._update_ball()
-        self._check_wall_collision()
         self._check_paddle_collision(dx)
-        self._check_block_collision()
         self._check_clear_condition()
 
     def _get_input(self) -> float:
@@ -115,36 +134,63 @@ class App:
         new_center_x = current_center_x + (dx * self.paddle_speed)
         new_center_x = max(min_x, min(new_center_x, max_x))
         
-        self.paddle.start.x = new_center_x - self.paddle_width / 2
-        self.paddle.end.x = new_center_x + self.paddle_width / 2
+        self.paddle.translate(new_center_x - current_center_x, 0)
 
     def _update_ball(self):
-        """ボールを移動。"""
-        self.ball.translate(self.ball_vel.x, self.ball_vel.y)
-
-    def _check_wall_collision(self):
-        """壁との衝突を判定。"""
-        if self.ball.intersects(self.wall_left):
-            self.ball.center.x = self.ball.radius
-            self.ball_vel.x *= -1
-        elif self.ball.intersects(self.wall_right):
-            self.ball.center.x = SCREEN_WIDTH - self.ball.radius
-            self.ball_vel.x *= -1
-            
-        if self.ball.intersects(self.wall_top):
-            self.ball.center.y = self.ball.radius
-            self.ball_vel.y *= -1
-        elif self.ball.intersects(self.wall_bottom):
+        """
+        ボールを移動。
+        移動経路を掃引して最初の接触を求めるため、高速でも壁やブロックをすり抜けない。
+        """
+        # 動いたパドルのセルを更新（動いていなければ何もしない）
+        self.shape_hash.update(self.paddle)
+
+        remaining = 1.0
+        # 1フレームに跳ね返る回数の上限（角に挟まったときの無限ループ防止）
+        for _ in range(4):
+            move = self.ball_vel * remaining
+            found = sweep_circle_first(self.ball, move, self._ball_obstacles(move))
+            if found is None:
+                self.ball.translate(move.x, move.y)
+                return
+            hit, target = found
+            self.ball.set_position(hit.position.x, hit.position.y)
+            remaining *= 1.0 - hit.time
+            if not self._on_ball_hit(target, hit):
+                return
+
+    def _ball_obstacles(self, move: Vector2) -> list[Shape]:
+        """ボールの移動範囲にあり、ボールと判定するレイヤーの図形を返す。"""
+        return self.shape_hash.query_aabb(*swept_aabb(self.ball, move), self.ball.mask)
+
+    def _on_ball_hit(self, target: Shape, hit: SweepHit) -> bool:
+        """接触した図形に応じた処理をする。残りの移動を続ける場合は True を返す。"""
+        if target is self.wall_bottom:
             self.is_game_over = True
+            return False
+        if target is self.paddle:
+            self._bounce_off_paddle()
+            return False
+        if target.category == LAYER_BLOCK:
+            self.blocks.remove(target)  # type: ignore[arg-type]
+            self.shape_hash.remove(target)
+            self.score += 10
+
+        # 接触面の法線で速度を反射する
+        n = hit.normal
+        d = self.ball_vel.dot(n)
+        self.ball_vel.set(self.ball_vel.x - 2 * d * n.x, self.ball_vel.y - 2 * d * n.y)
+        return True
 
     def _check_paddle_collision(self, dx: float):
-        """パドルとの衝突を判定（当たった位置で角度が変わる）。"""
-        if not self.ball.intersects(self.paddle):
+        """パドルが動いてボールに重なった場合、接触情報でボールを押し出して跳ね返す。"""
+        contact = self.paddle.collide(self.ball)
+        if contact is None or contact.depth <= 0:
             return
-            
-        # ボールをパドルの上に押し出す
-        self.ball.center.y = self.paddle.start.y - self.paddle_radius - self.ball.radius - 1
-        
+        self.ball.translate(contact.normal.x * contact.depth, contact.normal.y * contact.depth)
+        self._bounce_off_paddle()
+
+    def _bounce_off_paddle(self):
+        """パドルで跳ね返す（当たった位置で角度が変わる）。"""
         # パドルの中心からボールまでの相対位置を計算 (-1.0 ~ 1.0)
         paddle_center_x = (self.paddle.start.x + self.paddle.end.x) / 2
         paddle_half_width = self.paddle_width / 2 + self.paddle_radius
@@ -166,16 +212,6 @@ class App:
         # 新しい速度ベクトル（常に上方向に跳ね返る）
         self.ball_vel = Vector2(math.cos(rad), -math.sin(rad)) * speed
 
-    def _check_block_collision(self):
-        """ブロックとの衝突を判定。"""
-        for i in range(len(self.blocks) - 1, -1, -1):
-            block = self.blocks[i]
-            if self.ball.intersects(block):
-                self.ball_vel.y *= -1
-                self.blocks.pop(i)
-                self.score += 10
-                break  # 1フレームに1ブロックのみ
-
     def _check_clear_condition(self):
         """クリア条件を判定。"""
         if not self.blocks:
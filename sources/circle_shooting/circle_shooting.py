@@ -1,5 +1,11 @@
 import pyxel
 import math
+from ..utils.entity_pool import EntityPool, overlapping_pairs
+
+# 衝突レイヤー
+LAYER_PLAYER = 1 << 0
+LAYER_ENEMY = 1 << 1
+LAYER_BULLET = 1 << 2
 
 class Circle:
     def __init__(self, x, y, r, col):
@@ -8,14 +14,6 @@ class Circle:
         self.r = r
         self.col = col
 
-    def intersects(self, other):
-        if isinstance(other, Circle):
-            dx = self.x - other.x
-            dy = self.y - other.y
-            dist_square = dx * dx + dy * dy
-            return dist_square <= (self.r + other.r) ** 2
-        return False
-
     def draw(self):
         pyxel.circ(self.x, self.y, self.r, self.col)
 
@@ -24,34 +22,26 @@ class Player(Circle):
         super().__init__(x, y, r, col)
         self.speed = speed
 
-class Enemy(Circle):
-    def __init__(self, x, y, r, col,speed,score=10):
-        super().__init__(x, y, r, col)
-        self.speed = speed
-        self.score = score
-        self.initial_y = y
-
-class Bullet(Circle):
-    def __init__(self, x, y, r, col,speed):
-        super().__init__(x, y, r, col)
-        self.speed = speed
-
 class App:
     def __init__(self):
         pyxel.init(120, 160)
         self.player = Player(x=10, y=pyxel.height - 10, r=5, col=2,speed=2)
-        self.enemy_list = [
-            Enemy(x=0, y=10, r=5, col=3,speed=1),
-            Enemy(x=0, y=40, r=5, col=4,speed=1.5),
-            Enemy(x=0, y=70, r=5, col=5,speed=2),
-        ]
-        self.bullet_list = [] 
+        # 敵と弾は配列にまとめて持ち、出現・削除でオブジェクトを作らない
+        self.enemies = EntityPool(16, fields=("score", "initial_y"),
+                                  category=LAYER_ENEMY, mask=LAYER_PLAYER | LAYER_BULLET)
+        self.bullets = EntityPool(64, category=LAYER_BULLET, mask=LAYER_ENEMY)
+        self.spawn_enemy(x=0, y=10, col=3, speed=1)
+        self.spawn_enemy(x=0, y=40, col=4, speed=1.5)
+        self.spawn_enemy(x=0, y=70, col=5, speed=2)
         self.score = 0
         self.game_over = False
         # 画面外に出たときのループをなめらかにするためにカメラを少し移動
         pyxel.camera(5,0)
         pyxel.run(self.update, self.draw)
 
+    def spawn_enemy(self, x, y, col, speed, score=10):
+        self.enemies.spawn(x, y, 5, col, vx=speed, score=score, initial_y=y)
+
     def update(self):
         self.player_update()
         self.bullet_update()
@@ -67,33 +57,39 @@ class App:
         if self.is_down_pressed() and self.player.y + self.player.speed + self.player.r <= pyxel.height:
             self.player.y += self.player.speed
 
-        if (pyxel.btnp(pyxel.KEY_SPACE) or pyxel.btnp(pyxel.GAMEPAD1_BUTTON_B)) and len(self.bullet_list) < 3:
-            self.bullet_list.append(Bullet(self.player.x, self.player.y - self.player.r, 2, 9,3))
+        if (pyxel.btnp(pyxel.KEY_SPACE) or pyxel.btnp(pyxel.GAMEPAD1_BUTTON_B)) and len(self.bullets) < 3:
+            self.bullets.spawn(self.player.x, self.player.y - self.player.r, 2, 9, vy=-3)
         
-        for enemy in self.enemy_list:
-            if self.player.intersects(enemy):
-                self.game_over = True
-                break
+        if self.enemies.first_overlap(self.player.x, self.player.y, self.player.r) >= 0:
+            self.game_over = True
     
     def enemy_update(self):
-        for enemy in self.enemy_list:
-            enemy.x = (enemy.x + enemy.speed) % (pyxel.width + enemy.r * 2)
-            enemy.y = ( (math.sin(pyxel.frame_count * 0.1))  * 20  ) + enemy.initial_y 
+        enemies = self.enemies
+        x, y, r, speed = enemies.x, enemies.y, enemies.r, enemies.vx
+        initial_y = enemies.field("initial_y")
+        wave = (math.sin(pyxel.frame_count * 0.1)) * 20
+        for i in range(enemies.count):
+            x[i] = (x[i] + speed[i]) % (pyxel.width + r[i] * 2)
+            y[i] = wave + initial_y[i]
 
     def bullet_update(self):
-        for bullet in self.bullet_list:
-            bullet.y -= bullet.speed
-
-            for enemy in self.enemy_list:
-                if bullet.intersects(enemy):
-                    self.enemy_list.remove(enemy)
-                    self.score += enemy.score
-                    self.enemy_list.append(Enemy(x=0, y=pyxel.rndi(30, pyxel.height - 50), r=5, col=pyxel.rndi(1,15) ,speed=pyxel.rndf(1,3)))
-                    self.bullet_list.remove(bullet)
-                    break
-
-            if bullet in self.bullet_list and bullet.y + bullet.r < 0:
-                self.bullet_list.remove(bullet)
+        bullets = self.bullets
+        enemies = self.enemies
+        bullets.integrate()
+
+        # 弾1発につき最初に当たった敵だけを倒す
+        for b, e in overlapping_pairs(bullets, enemies):
+            if not bullets.is_alive_slot(b) or not enemies.is_alive_slot(e):
+                continue
+            bullets.kill_slot(b)
+            enemies.kill_slot(e)
+            self.score += int(enemies.field("score")[e])
+            self.spawn_enemy(x=0, y=pyxel.rndi(30, pyxel.height - 50), col=pyxel.rndi(1,15), speed=pyxel.rndf(1,3))
+
+        # 画面の上に出た弾を消す
+        bullets.cull(-math.inf, 0, math.inf, math.inf)
+        bullets.flush()
+        enemies.flush()
 
     def is_left_pressed(self):
         return pyxel.btn(pyxel.KEY_LEFT) or pyxel.btn(pyxel.GAMEPAD1_BUTTON_DPAD_LEFT)  
@@ -115,10 +111,9 @@ class App:
 
             self.player.draw()
 
-            for enemy in self.enemy_list:
-                enemy.draw()
-            for bullet in self.bullet_list:
-                bullet.draw()
+            for pool in (self.enemies, self.bullets):
+                for i in range(pool.count):
+                    pyxel.circ(pool.x[i], pool.y[i], pool.r[i], pool.col[i])
             
             pyxel.text(5, 5, f"SCORE: {self.score}", 7)
 
@@ -5,6 +5,10 @@ from sources.utils.polygon import Polygon
 import sources.utils.geometry as geo
 
 from sources.utils.shape import Shape
+from sources.utils.aabb_tree import AABBTree
+from sources.utils.axis_cache import SeparatingAxisCache
+from sources.utils.pair_memo import PairMemo
+from sources.utils import collision
 
 class App:
     def __init__(self):
@@ -35,10 +39,24 @@ class App:
         self.obstacles.append(geo.Circle(140, 80, 10))
         self.obstacles.append(geo.Capsule(Vector2(50, 90), Vector2(70, 110), 5))
 
+        # Rotating polygon obstacles use quantized rotation tables
+        for obs in self.obstacles:
+            if isinstance(obs, Polygon):
+                obs.set_angle_steps(1024)
+
         # Initial rotations for setup
         self.obstacles[1].rotate(15)
         self.obstacles[3].rotate(45)
         
+        # Broadphase for obstacle queries (fat leaves absorb the pulsing scale)
+        self.obstacle_tree = AABBTree(margin=4)
+        self.obstacle_tree.insert_all(self.obstacles)
+
+        # Remember the last separating axis per pair; usually it still separates next frame
+        Polygon.axis_cache = SeparatingAxisCache(max_size=256)
+        # Reuse results for pairs where neither shape moved (e.g. while paused)
+        collision.memo = PairMemo(max_size=256)
+
         # Animation frame counter
         self.frame_count = 0
 
@@ -167,14 +185,12 @@ class App:
                 self.obstacles[5].set_scale(scale5, scale5)
 
 
-        # Collision Check
-        self.is_colliding = False
-        self.hit_indices = []
-        
-        for i, obs in enumerate(self.obstacles):
-            if self.player.intersects(obs):
-                self.is_colliding = True
-                self.hit_indices.append(i)
+        # Collision Check (only obstacles near the player)
+        self.obstacle_tree.update_all()
+        self.hit_indices = sorted(
+            self.obstacles.index(obs) for obs in self.obstacle_tree.query_intersecting(self.player)
+        )
+        self.is_colliding = bool(self.hit_indices)
 
     def draw(self):
         pyxel.cls(0)
@@ -2,9 +2,14 @@
 pyxresファイルからスプライトを読み込んで表示するシンプルなデモ。
 pyxel.load() と pyxel.blt() の基本的な使い方を示す。
 """
+from typing import Optional
 import pyxel
 from ..utils import geometry as geo
 from ..utils.vector2 import Vector2
+from ..utils.tile_collision import TileCollisionMap, TileGrid, TILE_SOLID, TILE_LADDER
+from ..utils.tile_motion import TileMove, move_aabb
+from ..utils.tile_world import ChunkedWorld, tilemap_loader
+from ..utils.navigation import NavGraph, MOVE_CLIMB, MOVE_JUMP
 
 # 画面サイズ
 SCREEN_WIDTH = 128
@@ -16,6 +21,17 @@ SPRITE_SIZE = 8
 # タイルサイズ
 TILE_SIZE = 8
 
+# タイルマップ2に描かれている1画面分の大きさ（タイル数）
+SCREEN_TILES = 16
+
+# レベルの大きさ（タイル数）。1画面分を横に LEVEL_SCREENS 回並べ、チャンクに分けて読み込む
+LEVEL_SCREENS = 8
+LEVEL_WIDTH = SCREEN_TILES * LEVEL_SCREENS
+LEVEL_HEIGHT = SCREEN_TILES
+
+# チャンクの大きさ（タイル数）
+CHUNK_TILES = 16
+
 # 床タイルのID（pyxresのタイル番号に合わせて調整）
 # pget()は(u, v)タプルを返す
 FLOOR_TILES = [(1, 13), (6, 13), (3, 0),(6,11),(12,13)]  # 床とみなすタイルIDのリスト
@@ -24,14 +40,34 @@ FLOOR_TILES = [(1, 13), (6, 13), (3, 0),(6,11),(12,13)]  # 床とみなすタイ
 # (88,112) → (11,14), (96,112) → (12,14)
 LADDER_TILES = [(11, 14), (12, 14)]  # はしごとみなすタイルIDのリスト
 
+# タイルID -> 分類フラグ（チャンクの衝突フラグに焼き込む）
+TILE_CLASSES = {tile: TILE_SOLID for tile in FLOOR_TILES}
+TILE_CLASSES.update({tile: TILE_LADDER for tile in LADDER_TILES})
+
+
+class RepeatedLevel:
+    """タイルマップの左上 size×size タイルを横に並べて、何画面分もの横長のレベルとして読ませる。"""
+
+    def __init__(self, tilemap, size: int, width: int, height: int):
+        self.tilemap = tilemap
+        self.size = size
+        self.width = width
+        self.height = height
+
+    def pget(self, x: int, y: int):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.tilemap.pget(x % self.size, y % self.size)
+        return (0, 0)  # レベルの外は空のタイル
+
 
 class Player:
     """プレイヤーキャラクター。"""
     
-    def __init__(self, x: float, y: float):
+    def __init__(self, x: float, y: float, tiles: TileGrid):
         self.x = x
         self.y = y
         self.speed = 1.5
+        self.tiles = tiles  # 床・はしごの判定に使うタイル衝突マップ
         
         # アニメーション用
         self.is_moving = False
@@ -171,86 +207,27 @@ class Player:
             else:
                 self.vy += self.gravity
         
-        # X方向の移動と衝突判定
-        self.x += dx
-        self._check_horizontal_collision(dx)
-        
-        # Y方向の移動と衝突判定
-        self.y += self.vy
-        self._check_vertical_collision()
+        # X→Yの順に移動し、またいだタイルの壁・床・天井で止める
+        move = move_aabb(self.tiles, self.x, self.y, self.size, self.size, dx, self.vy, TILE_SIZE)
+        self.x, self.y = move.x, move.y
+        self.on_ground = move.bottom
+        if move.bottom or move.top:
+            self.vy = 0
         
-        # 画面外に落ちたらリセット
-        if self.y > SCREEN_HEIGHT:
+        # レベルの下に落ちたらリセット
+        if self.y > self.tiles.height * TILE_SIZE:
             self.y = 0.0
             self.vy = 0.0
         
-        # 画面内に制限（X方向）
-        self.x = max(0.0, min(float(SCREEN_WIDTH - self.size), self.x))
+        # レベル内に制限（X方向）
+        self.x = max(0.0, min(float(self.tiles.width * TILE_SIZE - self.size), self.x))
         
         # ヒットボックスの位置を同期
-        self.hitbox.center.x = self.x + self.size / 2
-        self.hitbox.center.y = self.y + self.size / 2
-
-    def _is_solid(self, tx: int, ty: int) -> bool:
-        """タイルが固体（床・壁）かどうか。"""
-        if 0 <= tx < SCREEN_WIDTH // TILE_SIZE and 0 <= ty < SCREEN_HEIGHT // TILE_SIZE:
-            tile_id = pyxel.tilemaps[2].pget(tx, ty)  # (u, v)タプル
-            return tile_id in FLOOR_TILES
-        return False
+        self.hitbox.set_position(self.x + self.size / 2, self.y + self.size / 2)
 
     def _is_ladder(self, tx: int, ty: int) -> bool:
         """タイルがはしごかどうか。"""
-        if 0 <= tx < SCREEN_WIDTH // TILE_SIZE and 0 <= ty < SCREEN_HEIGHT // TILE_SIZE:
-            tile_id = pyxel.tilemaps[2].pget(tx, ty)  # (u, v)タプル
-            return tile_id in LADDER_TILES
-        return False
-
-    def _check_horizontal_collision(self, dx: float):
-        """左右の壁との衝突判定。"""
-        # プレイヤーの左右端のタイル座標
-        top = int(self.y // TILE_SIZE)
-        bottom = int((self.y + self.size - 1) // TILE_SIZE)
-        
-        if dx > 0:  # 右に移動
-            right = int((self.x + self.size) // TILE_SIZE)
-            for ty in range(top, bottom + 1):
-                if self._is_solid(right, ty):
-                    # 右壁に押し戻す
-                    self.x = right * TILE_SIZE - self.size
-                    break
-        elif dx < 0:  # 左に移動
-            left = int(self.x // TILE_SIZE)
-            for ty in range(top, bottom + 1):
-                if self._is_solid(left, ty):
-                    # 左壁に押し戻す
-                    self.x = (left + 1) * TILE_SIZE
-                    break
-
-    def _check_vertical_collision(self):
-        """上下の床・天井との衝突判定。"""
-        left = int(self.x // TILE_SIZE)
-        right = int((self.x + self.size - 1) // TILE_SIZE)
-        
-        self.on_ground = False
-        
-        if self.vy > 0:  # 下に落下中
-            bottom = int((self.y + self.size) // TILE_SIZE)
-            for tx in range(left, right + 1):
-                if self._is_solid(tx, bottom):
-                    # 床に乗る
-                    self.y = bottom * TILE_SIZE - self.size
-                    self.vy = 0
-                    self.on_ground = True
-                    break
-        elif self.vy < 0:  # 上に移動中（ジャンプ）
-            top = int(self.y // TILE_SIZE)
-            for tx in range(left, right + 1):
-                if self._is_solid(tx, top):
-                    # 天井にぶつかる
-                    self.y = (top + 1) * TILE_SIZE
-                    self.vy = 0
-                    break
-
+        return self.tiles.is_ladder(tx, ty)
 
     def draw(self):
         """プレイヤーを描画。"""
@@ -304,12 +281,14 @@ class Player:
 
 
 class Enemy:
-    """敵キャラクター。"""
+    """敵キャラクター。ナビグラフがあればプレイヤーを追いかけ、無ければ左右に往復する。"""
     
-    def __init__(self, x: float, y: float):
+    def __init__(self, x: float, y: float, tiles: TileGrid, nav: Optional[NavGraph] = None):
         self.x = x
         self.y = y
+        self.spawn = (x, y)
         self.speed = 0.5
+        self.tiles = tiles  # 壁・床の判定に使うタイル衝突マップ
         
         # アニメーション用
         self.anim_counter = 0
@@ -326,26 +305,135 @@ class Enemy:
         # 移動設定
         self.move_dir = -1  # -1: 左, 1: 右
         self.move_range = (x - 30, x + 30)  # 左右に30ピクセル移動
+        
+        # 追跡設定
+        self.nav = nav
+        self.path: list = []  # (タイル, 移動の種類) の経由点
+        self.reachable = True  # 最後に引いた経路でプレイヤーに届いたか
+        self.repath_interval = 15  # 経路を引き直す間隔（フレーム）
+        self.chase_speed = 1.0
+        self.climb_speed = 1.0
+        self.vy = 0.0
+        self.gravity = 0.2
+        self.fall_gravity = 0.6
+        self.jump_power = -3.5
+        self.on_ground = False
 
-    def update(self):
+    def cell(self) -> tuple[int, int]:
+        """中心のあるタイル。"""
+        return (int((self.x + self.size / 2) // TILE_SIZE), int((self.y + self.size / 2) // TILE_SIZE))
+
+    def _standing_cell(self, nav: NavGraph) -> tuple[int, int]:
+        """
+        経路探索の出発点にするタイル。床の端で中心が穴の上に出ていても、
+        足が乗っている側の列を返す。
+        """
+        cx, cy = self.cell()
+        if self.on_ground and not nav.walkable(cx, cy):
+            for tx in (int(self.x // TILE_SIZE), int((self.x + self.size - 1) // TILE_SIZE)):
+                if nav.walkable(tx, cy):
+                    return (tx, cy)
+        return (cx, cy)
+
+    def update(self, target: Optional[Player] = None):
         """自動移動。"""
-        # 左右に往復移動
-        self.x += self.speed * self.move_dir
+        if self.nav is not None and target is not None:
+            self._chase(target, self.nav)
+        else:
+            self._patrol()
+        
+        # アニメーションカウンター
+        self.anim_counter += 1
         
-        # 端に到達したら方向転換
-        if self.x <= self.move_range[0]:
+        # ヒットボックスの位置を同期
+        self.hitbox.set_position(self.x + self.size / 2, self.y + self.size / 2)
+
+    def _patrol(self):
+        # 左右に往復移動（壁に当たったら止まる）
+        move = move_aabb(self.tiles, self.x, self.y, self.size, self.size,
+                         self.speed * self.move_dir, 0.0, TILE_SIZE)
+        self.x = move.x
+        self._turn(move)
+
+    def _turn(self, move: TileMove):
+        """往復移動で、端か壁に到達したら方向転換する。"""
+        if move.left:
+            self.move_dir = 1
+            self.facing_right = True
+        elif move.right:
+            self.move_dir = -1
+            self.facing_right = False
+        elif self.x <= self.move_range[0]:
             self.move_dir = 1
             self.facing_right = True
         elif self.x >= self.move_range[1]:
             self.move_dir = -1
             self.facing_right = False
+
+    def _chase(self, target: Player, nav: NavGraph):
+        cell = self.cell()
+        
+        # 一定間隔で経路を引き直す（同じ床・はしごの組の経路はナビグラフがキャッシュしている）
+        # 跳んだり落ちたりしている間は今の経路を続ける
+        # 届かなくなったら今の経路の残りをたどり、それも尽きたら往復移動に戻る
+        if self.anim_counter % self.repath_interval == 0 and (self.on_ground or nav.climbable(*cell)):
+            goal = (int((target.x + target.size / 2) // TILE_SIZE),
+                    int((target.y + target.size / 2) // TILE_SIZE))
+            path = nav.find_path(self._standing_cell(nav), goal)
+            self.reachable = path is not None
+            if path is not None:
+                self.path = path
+        
+        # 着いた経由点を捨てる（はしごは行の位置まで合わせてから）
+        while self.path:
+            (tx, ty), kind = self.path[0]
+            if cell != (tx, ty) or (kind == MOVE_CLIMB and self.y != ty * TILE_SIZE):
+                break
+            self.path.pop(0)
+        
+        dx = dy = 0.0
+        hanging = False  # はしごにつかまっている（重力なし）
+        patrolling = not self.path and not self.reachable
+        if patrolling:
+            dx = self.speed * self.move_dir
+        elif self.path:
+            (tx, ty), kind = self.path[0]
+            if kind == MOVE_CLIMB:
+                # はしごの列に合わせて上下に移動
+                self.x = tx * TILE_SIZE
+                dy = max(-self.climb_speed, min(self.climb_speed, ty * TILE_SIZE - self.y))
+                hanging = True
+            else:
+                dx = max(-self.chase_speed, min(self.chase_speed, tx * TILE_SIZE - self.x))
+                # はしごから床へ乗り移る間は落ちず、床の高さに合わせる
+                hanging = nav.climbable(*cell) and not nav.walkable(*cell)
+                if hanging:
+                    dy = max(-self.climb_speed, min(self.climb_speed, ty * TILE_SIZE - self.y))
+                if kind == MOVE_JUMP and self.on_ground:
+                    self.vy = self.jump_power
+        
+        if hanging:
+            self.vy = 0.0
+        elif self.vy > 0:
+            self.vy += self.fall_gravity
+        else:
+            self.vy += self.gravity
         
-        # アニメーションカウンター
-        self.anim_counter += 1
-        
-        # ヒットボックスの位置を同期
-        self.hitbox.center.x = self.x + self.size / 2
-        self.hitbox.center.y = self.y + self.size / 2
+        move = move_aabb(self.tiles, self.x, self.y, self.size, self.size, dx, self.vy + dy, TILE_SIZE)
+        self.x, self.y = move.x, move.y
+        self.on_ground = move.bottom
+        if move.bottom or move.top:
+            self.vy = 0.0
+        if patrolling:
+            self._turn(move)
+        elif dx:
+            self.facing_right = dx > 0
+        
+        # レベルの下に落ちたら出現位置に戻す
+        if self.y > self.tiles.height * TILE_SIZE:
+            self.x, self.y = self.spawn
+            self.vy = 0.0
+            self.path = []
 
     def draw(self):
         """敵を描画。"""
@@ -365,26 +453,51 @@ class App:
         # pyxresファイルからスプライトを読み込む
         pyxel.load("assets/sample.pyxres")
         
+        # レベル（タイルマップ2の画面を横に並べたもの）はカメラの周りのチャンクだけを読み込んでおく
+        # 先読みするチャンクの衝突フラグの焼き込みは別スレッドで行う（タイルの読み取りはメインスレッド）
+        tilemap = pyxel.tilemaps[2]
+        level = RepeatedLevel(tilemap, SCREEN_TILES, LEVEL_WIDTH, LEVEL_HEIGHT)
+        self.world = ChunkedWorld(tilemap_loader(level, CHUNK_TILES), LEVEL_WIDTH, LEVEL_HEIGHT,
+                                  TILE_CLASSES, chunk_tiles=CHUNK_TILES, tile_size=TILE_SIZE,
+                                  imgsrc=tilemap.imgsrc, max_chunks=4)
+        
         # プレイヤー
-        self.player = Player(0.0, 112.0)
+        self.player = Player(0.0, 112.0, self.world)
+        
+        # 床・はしご・ジャンプでつながるナビグラフ（敵がプレイヤーを追いかけるのに使う）
+        # グラフはレベル全体を読むので、チャンクのワールドを通さず元のタイルマップから作る
+        self.nav = NavGraph(TileCollisionMap(level, LEVEL_WIDTH, LEVEL_HEIGHT, TILE_CLASSES))
         
         # 敵
-        self.enemy = Enemy(100.0, 112.0)
+        self.enemy = Enemy(100.0, 112.0, self.world, self.nav)
+        
+        # カメラ（プレイヤーを横方向に追う）
+        self.camera_x = 0.0
+        self.world.update(self.camera_x, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
         
         pyxel.run(self.update, self.draw)
 
     def update(self):
         self.player.update()
-        self.enemy.update()
+        self.enemy.update(self.player)
         
         # プレイヤーと敵の当たり判定
         self.is_colliding = self.player.hitbox.intersects(self.enemy.hitbox)
+        
+        # カメラを動かし、画面に映るチャンクを入れ替える
+        level_width = LEVEL_WIDTH * TILE_SIZE
+        target = self.player.x + SPRITE_SIZE / 2 - SCREEN_WIDTH / 2
+        self.camera_x = max(0.0, min(float(level_width - SCREEN_WIDTH), target))
+        self.world.update(self.camera_x, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
 
     def draw(self):
         pyxel.cls(0)
         
+        # ワールド座標で描くものはカメラでずらす
+        pyxel.camera(self.camera_x, 0)
+        
         # タイルマップ描画
-        pyxel.bltm(0, 0, 2, 0, 0, 128, 128)
+        self.world.draw()
 
         # プレイヤー描画
         self.player.draw()
@@ -396,7 +509,9 @@ class App:
         self.player.hitbox.draw(11, fill=False)  # 緑
         self.enemy.hitbox.draw(8, fill=False)    # 赤
         
-        # HUD
+        # HUD は画面座標で描く
+        pyxel.camera()
+        
         pyxel.text(5, 5, "Arrows: Move", 7)
         pyxel.text(5, 15, f"frame_count: {pyxel.frame_count}", 7)
         pyxel.text(5, 25, f"anim_frame: {self.player.anim_frame}", 10)
@@ -404,8 +519,8 @@ class App:
         # 足元のタイルID表示
         foot_x = int((self.player.x + SPRITE_SIZE / 2) // TILE_SIZE)
         foot_y = int((self.player.y + SPRITE_SIZE) // TILE_SIZE)
-        if 0 <= foot_x < SCREEN_WIDTH // TILE_SIZE and 0 <= foot_y < SCREEN_HEIGHT // TILE_SIZE:
-            tile_id = pyxel.tilemaps[2].pget(foot_x, foot_y)
+        tile_id = self.world.tile(foot_x, foot_y)
+        if tile_id is not None:
             pyxel.text(5, 35, f"tile: {tile_id}", 9)
         
         pyxel.text(5, SCREEN_HEIGHT - 10, f"Pos: ({int(self.player.x)}, {int(self.player.y)})", 5)
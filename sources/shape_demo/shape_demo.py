@@ -27,6 +27,9 @@ class App:
         # Placeholder for one more or just empty
         
         self.polygons = [self.rect, self.triangle, self.star, self.heart, self.arrow]
+        # Polygons rotate every frame: use quantized rotation tables
+        for poly in self.polygons:
+            poly.set_angle_steps(1024)
         
         # Capsule animation state
         self.capsule_center = Vector2(130, 30)
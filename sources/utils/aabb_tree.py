@@ -0,0 +1,348 @@
+from __future__ import annotations
+from typing import Iterable, Iterator, Optional
+from .shape import Shape
+from .spatial_hash import aabb_overlap
+from .collision import ALL_LAYERS
+
+AABB = tuple[float, float, float, float]
+
+
+def _union(a: AABB, b: AABB) -> AABB:
+    return (a[0] if a[0] < b[0] else b[0], a[1] if a[1] < b[1] else b[1],
+            a[2] if a[2] > b[2] else b[2], a[3] if a[3] > b[3] else b[3])
+
+
+def _perimeter(a: AABB) -> float:
+    return 2.0 * ((a[2] - a[0]) + (a[3] - a[1]))
+
+
+def _contains(outer: AABB, inner: AABB) -> bool:
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and inner[2] <= outer[2] and inner[3] <= outer[3]
+
+
+def _fatten(a: AABB, margin: float) -> AABB:
+    return (a[0] - margin, a[1] - margin, a[2] + margin, a[3] + margin)
+
+
+class _Node:
+    """木のノード。葉は shape を持ち、内部ノードは2つの子を持つ。"""
+
+    __slots__ = ("box", "parent", "child1", "child2", "height", "shape")
+
+    def __init__(self, box: AABB, shape: Optional[Shape] = None):
+        self.box: AABB = box
+        self.parent: Optional[_Node] = None
+        self.child1: Optional[_Node] = None
+        self.child2: Optional[_Node] = None
+        self.height: int = 0
+        self.shape: Optional[Shape] = shape
+
+    @property
+    def is_leaf(self) -> bool:
+        return self.child1 is None
+
+
+class AABBTree:
+    """
+    動的AABB木（BVH）によるブロードフェーズ。
+    葉には図形のAABBを margin だけ広げた「太った」ボックスを保持するため、
+    図形がその範囲内で移動・拡大縮小しても木は更新されない。
+    挿入・削除のたびに回転で高さを揃え、問い合わせを対数時間に保つ。
+    """
+
+    def __init__(self, margin: float = 4.0):
+        self.margin = margin
+        self.root: Optional[_Node] = None
+        self._leaves: dict[Shape, _Node] = {}
+        self._versions: dict[Shape, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._leaves)
+
+    def __contains__(self, shape: Shape) -> bool:
+        return shape in self._leaves
+
+    def __iter__(self) -> Iterator[Shape]:
+        return iter(self._leaves)
+
+    @property
+    def height(self) -> int:
+        """木の高さ（空なら0）。"""
+        return self.root.height if self.root is not None else 0
+
+    # --- 登録・更新 ---
+
+    def insert(self, shape: Shape):
+        """図形を登録する（登録済みなら update と同じ）。"""
+        if shape in self._leaves:
+            self.update(shape)
+            return
+        leaf = _Node(_fatten(shape.aabb(), self.margin), shape)
+        self._leaves[shape] = leaf
+        self._versions[shape] = shape.version
+        self._insert_leaf(leaf)
+
+    def remove(self, shape: Shape):
+        """図形の登録を解除する。"""
+        leaf = self._leaves.pop(shape, None)
+        if leaf is None:
+            return
+        self._versions.pop(shape, None)
+        self._remove_leaf(leaf)
+
+    def update(self, shape: Shape) -> bool:
+        """
+        移動・変形した図形の葉を更新する。木を組み替えた場合は True を返す。
+        現在のAABBが太ったボックスに収まっている間は何もしない。
+        """
+        leaf = self._leaves.get(shape)
+        if leaf is None:
+            self.insert(shape)
+            return True
+        if self._versions[shape] == shape.version:
+            return False
+        self._versions[shape] = shape.version
+
+        box = shape.aabb()
+        if _contains(leaf.box, box):
+            # 縮んで太ったボックスが大きすぎる場合だけ作り直す
+            if _contains(_fatten(box, 4 * self.margin), leaf.box):
+                return False
+
+        self._remove_leaf(leaf)
+        leaf.box = _fatten(box, self.margin)
+        self._insert_leaf(leaf)
+        return True
+
+    def update_all(self):
+        """登録されているすべての図形を更新する。"""
+        for shape in list(self._leaves):
+            self.update(shape)
+
+    def clear(self):
+        """すべての登録を解除する。"""
+        self.root = None
+        self._leaves.clear()
+        self._versions.clear()
+
+    def insert_all(self, shapes: Iterable[Shape]):
+        """複数の図形をまとめて登録する。"""
+        for shape in shapes:
+            self.insert(shape)
+
+    # --- 木の操作 ---
+
+    def _insert_leaf(self, leaf: _Node):
+        if self.root is None:
+            self.root = leaf
+            leaf.parent = None
+            return
+
+        # 表面積（周長）ヒューリスティックで兄弟ノードを探す
+        box = leaf.box
+        node = self.root
+        while not node.is_leaf:
+            child1, child2 = node.child1, node.child2
+            assert child1 is not None and child2 is not None
+            area = _perimeter(node.box)
+            combined = _perimeter(_union(node.box, box))
+            cost = 2.0 * combined
+            inheritance = 2.0 * (combined - area)
+
+            cost1 = _perimeter(_union(box, child1.box)) + inheritance
+            if not child1.is_leaf:
+                cost1 -= _perimeter(child1.box)
+            cost2 = _perimeter(_union(box, child2.box)) + inheritance
+            if not child2.is_leaf:
+                cost2 -= _perimeter(child2.box)
+
+            if cost < cost1 and cost < cost2:
+                break
+            node = child1 if cost1 < cost2 else child2
+
+        sibling = node
+        old_parent = sibling.parent
+        new_parent = _Node(_union(box, sibling.box))
+        new_parent.parent = old_parent
+        new_parent.height = sibling.height + 1
+        new_parent.child1 = sibling
+        new_parent.child2 = leaf
+        sibling.parent = new_parent
+        leaf.parent = new_parent
+
+        if old_parent is None:
+            self.root = new_parent
+        elif old_parent.child1 is sibling:
+            old_parent.child1 = new_parent
+        else:
+            old_parent.child2 = new_parent
+
+        self._refit_from(leaf.parent)
+
+    def _remove_leaf(self, leaf: _Node):
+        if leaf is self.root:
+            self.root = None
+            return
+
+        parent = leaf.parent
+        assert parent is not None
+        grand = parent.parent
+        sibling = parent.child2 if parent.child1 is leaf else parent.child1
+        assert sibling is not None
+
+        if grand is None:
+            self.root = sibling
+            sibling.parent = None
+        else:
+            if grand.child1 is parent:
+                grand.child1 = sibling
+            else:
+                grand.child2 = sibling
+            sibling.parent = grand
+            self._refit_from(grand)
+        leaf.parent = None
+
+    def _refit_from(self, node: Optional[_Node]):
+        """node から根まで、回転で釣り合いを取りながらボックスと高さを更新する。"""
+        while node is not None:
+            node = self._balance(node)
+            child1, child2 = node.child1, node.child2
+            assert child1 is not None and child2 is not None
+            node.height = 1 + max(child1.height, child2.height)
+            node.box = _union(child1.box, child2.box)
+            node = node.parent
+
+    def _balance(self, a: _Node) -> _Node:
+        """
+        a の左右の高さの差が2以上なら回転し、部分木の新しい根を返す。
+        """
+        if a.is_leaf or a.height < 2:
+            return a
+        b, c = a.child1, a.child2
+        assert b is not None and c is not None
+        balance = c.height - b.height
+
+        if balance > 1:
+            return self._rotate_up(a, c, b, is_child2=True)
+        if balance < -1:
+            return self._rotate_up(a, b, c, is_child2=False)
+        return a
+
+    def _rotate_up(self, a: _Node, up: _Node, other: _Node, is_child2: bool) -> _Node:
+        """子 up を a の位置に持ち上げる。"""
+        f, g = up.child1, up.child2
+        assert f is not None and g is not None
+
+        # up と a を入れ替える
+        up.child1 = a
+        up.parent = a.parent
+        a.parent = up
+        if up.parent is None:
+            self.root = up
+        elif up.parent.child1 is a:
+            up.parent.child1 = up
+        else:
+            up.parent.child2 = up
+
+        # 高い方の孫を up に残し、低い方を a に移す
+        if f.height > g.height:
+            keep, move = f, g
+        else:
+            keep, move = g, f
+        up.child2 = keep
+        if is_child2:
+            a.child2 = move
+        else:
+            a.child1 = move
+        move.parent = a
+
+        a.box = _union(other.box, move.box)
+        a.height = 1 + max(other.height, move.height)
+        up.box = _union(a.box, keep.box)
+        up.height = 1 + max(a.height, keep.height)
+        return up
+
+    # --- 問い合わせ ---
+
+    def query_aabb(self, min_x: float, min_y: float, max_x: float, max_y: float,
+                   mask: int = ALL_LAYERS) -> list[Shape]:
+        """AABBと境界ボックスが重なる図形のうち、category が mask に含まれるもののリストを返す。"""
+        box = (min_x, min_y, max_x, max_y)
+        result = []
+        if self.root is None:
+            return result
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if not aabb_overlap(node.box, box):
+                continue
+            if node.is_leaf:
+                shape = node.shape
+                assert shape is not None
+                if shape.category & mask and aabb_overlap(shape.aabb(), box):
+                    result.append(shape)
+            else:
+                stack.append(node.child1)  # type: ignore[arg-type]
+                stack.append(node.child2)  # type: ignore[arg-type]
+        return result
+
+    def query(self, shape: Shape) -> list[Shape]:
+        """図形と境界ボックスが重なり、レイヤーの組み合わせが合う図形（自身を除く）のリストを返す。"""
+        category = shape.category
+        return [s for s in self.query_aabb(*shape.aabb(), shape.mask) if s is not shape and s.mask & category]
+
+    def query_intersecting(self, shape: Shape) -> list[Shape]:
+        """図形と実際に交差している図形のリストを返す（ブロードフェーズ + 詳細判定）。"""
+        return [s for s in self.query(shape) if shape.intersects(s)]
+
+    def pairs(self) -> list[tuple[Shape, Shape]]:
+        """境界ボックスが重なり、レイヤーの組み合わせが合う図形の組をすべて（各組1回ずつ）返す。"""
+        result: list[tuple[Shape, Shape]] = []
+        if self.root is None:
+            return result
+        # 各内部ノードについて、左右の部分木同士を突き合わせる
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.is_leaf:
+                continue
+            assert node.child1 is not None and node.child2 is not None
+            self._cross(node.child1, node.child2, result)
+            stack.append(node.child1)
+            stack.append(node.child2)
+        return result
+
+    def intersecting_pairs(self) -> list[tuple[Shape, Shape]]:
+        """実際に交差している図形の組をすべて返す。"""
+        return [(a, b) for a, b in self.pairs() if a.intersects(b)]
+
+    def query_tree(self, other: AABBTree) -> list[tuple[Shape, Shape]]:
+        """
+        別の木との間で境界ボックスが重なり、レイヤーの組み合わせが合う組
+        (この木の図形, other の図形) を返す。
+        """
+        result: list[tuple[Shape, Shape]] = []
+        if self.root is not None and other.root is not None:
+            self._cross(self.root, other.root, result)
+        return result
+
+    @staticmethod
+    def _cross(a: _Node, b: _Node, result: list[tuple[Shape, Shape]]):
+        """2つの部分木の間で重なる葉の組を集める。"""
+        stack = [(a, b)]
+        while stack:
+            na, nb = stack.pop()
+            if not aabb_overlap(na.box, nb.box):
+                continue
+            if na.is_leaf and nb.is_leaf:
+                sa, sb = na.shape, nb.shape
+                assert sa is not None and sb is not None
+                if sa.category & sb.mask and sb.category & sa.mask and aabb_overlap(sa.aabb(), sb.aabb()):
+                    result.append((sa, sb))
+            elif nb.is_leaf or (not na.is_leaf and _perimeter(na.box) >= _perimeter(nb.box)):
+                # 大きい方を分割する
+                stack.append((na.child1, nb))  # type: ignore[arg-type]
+                stack.append((na.child2, nb))  # type: ignore[arg-type]
+            else:
+                stack.append((na, nb.child1))  # type: ignore[arg-type]
+                stack.append((na, nb.child2))  # type: ignore[arg-type]
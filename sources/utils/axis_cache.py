@@ -0,0 +1,78 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .shape import Shape
+
+
+class SeparatingAxisCache:
+    """
+    図形の組ごとに、前回 SAT で見つかった分離軸を保持するサイズ上限付きのLRUキャッシュ。
+    フレーム間で物体は少ししか動かないため、前回の分離軸は今回もたいてい分離している。
+    その軸を最初に1回射影するだけで、離れている組の判定を終えられる。
+
+    キーは2つの図形の id の組で、エントリに両方のトランスフォームのバージョンを持つ。
+    どちらも動いていなければ射影もせずに「離れている」と答える。
+    エントリは図形への参照を持つため、キャッシュに残っている間は id が再利用されない。
+    """
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        # (id, id) -> [図形A, 図形B, 軸x, 軸y, Aのバージョン, Bのバージョン]
+        self._entries: OrderedDict[tuple[int, int], list] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(a: Shape, b: Shape) -> tuple[int, int]:
+        ia, ib = id(a), id(b)
+        return (ia, ib) if ia < ib else (ib, ia)
+
+    def separated(self, a: Shape, b: Shape) -> bool:
+        """
+        前回の分離軸で a と b がまだ分離しているか判定する。
+        False の場合は（軸が無いか分離しなくなったので）通常の判定が必要。
+        """
+        key = self._key(a, b)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False
+        first, second, ax, ay, v1, v2 = entry
+        if first.version == v1 and second.version == v2:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True
+
+        lo1, hi1 = first.project_onto(ax, ay)
+        lo2, hi2 = second.project_onto(ax, ay)
+        if hi1 < lo2 or hi2 < lo1:
+            entry[4] = first.version
+            entry[5] = second.version
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True
+
+        # 重なったか、別の軸で分離するようになった
+        del self._entries[key]
+        self.misses += 1
+        return False
+
+    def store(self, a: Shape, b: Shape, ax: float, ay: float):
+        """a と b を分離した単位軸 (ax, ay) を記録する。"""
+        key = self._key(a, b)
+        first, second = (a, b) if key[0] == id(a) else (b, a)
+        self._entries[key] = [first, second, ax, ay, first.version, second.version]
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """キャッシュを空にする。"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,219 @@
+"""
+図形ペアの衝突判定カーネルを管理するレジストリ。
+
+(型A, 型B) の組から判定関数（カーネル）を直接引くことで、
+各図形クラスでの isinstance の連鎖や相互委譲をなくす。
+組み込みの図形（Circle, Line, Capsule, Polygon）のカーネルは
+geometry.py / polygon.py の末尾で登録される。
+
+交差の有無（bool）を返す intersects() のほかに、押し出しに使う接触情報
+（法線・めり込み量・接触点）を返す collide() があり、それぞれ別のレジストリを持つ。
+"""
+from __future__ import annotations
+from typing import Any, Callable, Optional, TYPE_CHECKING
+from .vector2 import Vector2
+from .pair_memo import MISSING, PairMemo
+
+if TYPE_CHECKING:
+    from .shape import Shape
+
+
+class Contact:
+    """
+    2つの図形の接触情報。
+    normal は a から b へ向かう単位法線で、b を normal 方向に depth だけ動かすと離れる。
+    points は接触点（両図形の表面の中間）のリスト。
+    """
+
+    __slots__ = ("normal", "depth", "points")
+
+    def __init__(self, normal: Vector2, depth: float, points: list[Vector2]):
+        self.normal: Vector2 = normal
+        self.depth: float = depth
+        self.points: list[Vector2] = points
+
+    def flipped(self) -> Contact:
+        """a と b を入れ替えた接触情報を返す（法線が逆向きになる）。"""
+        return Contact(Vector2(-self.normal.x, -self.normal.y), self.depth, self.points)
+
+    def __repr__(self) -> str:
+        return f"Contact(normal={self.normal}, depth={self.depth:.4f}, points={self.points})"
+
+
+# すべてのレイヤーを表すビット（Shape.mask の既定値）
+ALL_LAYERS = 0xFFFFFFFF
+
+
+# 交差判定カーネル。引数は登録した型のインスタンスなので、型は各カーネルの定義に任せる
+PairKernel = Callable[[Any, Any], bool]
+# 接触情報カーネル。引数の型は PairKernel と同じく各カーネルの定義に任せる
+ContactKernel = Callable[[Any, Any], Optional[Contact]]
+# カーネルを使える型かどうかの条件（基底クラスに登録する汎用カーネル用）
+TypeCondition = Callable[[type], bool]
+
+# 登録されたカーネル: (型A, 型B) -> (kernel(a, b), 使える型の条件。無条件なら None)
+_kernels: dict[tuple[type, type], tuple[PairKernel, Optional[TypeCondition]]] = {}
+_contact_kernels: dict[tuple[type, type], tuple[ContactKernel, Optional[TypeCondition]]] = {}
+
+# 解決済みのカーネル: (型A, 型B) -> (kernel, 引数を入れ替えるか) / 見つからなければ None
+_resolved: dict[tuple[type, type], Optional[tuple[PairKernel, bool]]] = {}
+_contact_resolved: dict[tuple[type, type], Optional[tuple[ContactKernel, bool]]] = {}
+
+# 判定結果のメモ。PairMemo を設定すると、どちらの図形も動いていない組は
+# カーネルを呼ばずに前回の結果を返す（None なら無効）。
+memo: Optional[PairMemo] = None
+
+
+def register_pair(type_a: type, type_b: type, kernel: PairKernel,
+                  condition: Optional[TypeCondition] = None):
+    """
+    type_a と type_b の交差判定カーネルを登録する。
+    kernel は (type_a のインスタンス, type_b のインスタンス) の順で呼ばれる。
+    逆順 (type_b, type_a) の判定は引数を入れ替えて自動的に同じカーネルを使う。
+    新しい図形の型を追加するときは、既存の型それぞれとの組を登録する。
+    condition を渡すと、判定する2つの型がどちらも condition(型) を満たす組にだけ使う。
+    """
+    _kernels[(type_a, type_b)] = (kernel, condition)
+    _resolved.clear()
+
+
+def unregister_pair(type_a: type, type_b: type):
+    """登録済みのカーネルを削除する。"""
+    _kernels.pop((type_a, type_b), None)
+    _resolved.clear()
+
+
+def register_contact(type_a: type, type_b: type, kernel: ContactKernel,
+                     condition: Optional[TypeCondition] = None):
+    """
+    type_a と type_b の接触情報カーネルを登録する。
+    kernel は a から b へ向かう法線を持つ Contact か、離れていれば None を返す。
+    逆順の組では法線を反転して同じカーネルを使う。
+    condition は register_pair() と同じ。
+    """
+    _contact_kernels[(type_a, type_b)] = (kernel, condition)
+    _contact_resolved.clear()
+
+
+def _find(kernels: dict, resolved: dict, type_a: type, type_b: type):
+    key = (type_a, type_b)
+    if key in resolved:
+        return resolved[key]
+
+    def usable(condition: Optional[TypeCondition]) -> bool:
+        return condition is None or (condition(type_a) and condition(type_b))
+
+    entry = None
+    for ca in type_a.__mro__:
+        for cb in type_b.__mro__:
+            found = kernels.get((ca, cb))
+            if found is not None and usable(found[1]):
+                entry = (found[0], False)
+                break
+            found = kernels.get((cb, ca))
+            if found is not None and usable(found[1]):
+                entry = (found[0], True)
+                break
+        if entry is not None:
+            break
+
+    resolved[key] = entry
+    return entry
+
+
+def find_kernel(type_a: type, type_b: type) -> Optional[tuple[PairKernel, bool]]:
+    """
+    型の組に対するカーネルと、引数を入れ替える必要があるかを返す。
+    完全一致 → 逆順 → 基底クラス（MROの派生側から順に）の順で探す。
+    """
+    return _find(_kernels, _resolved, type_a, type_b)
+
+
+def find_contact_kernel(type_a: type, type_b: type) -> Optional[tuple[ContactKernel, bool]]:
+    """find_kernel の接触情報カーネル版。"""
+    return _find(_contact_kernels, _contact_resolved, type_a, type_b)
+
+
+def intersects(a: Shape, b: Shape) -> bool:
+    """
+    2つの図形が交差しているか判定する。
+    境界ボリュームで早期棄却してから、登録されたカーネルを呼ぶ。
+    カーネルが無い組は False を返す（missing_pairs() で確認できる）。
+    """
+    entry = _resolved.get((type(a), type(b)))
+    if entry is None:
+        entry = find_kernel(type(a), type(b))
+        if entry is None:
+            return False
+    if not a.bounds_overlap(b):
+        return False
+    m = memo
+    if m is not None:
+        result = m.get(a, b, 0)
+        if result is not MISSING:
+            return result  # type: ignore[return-value]
+    kernel, swap = entry
+    result = kernel(b, a) if swap else kernel(a, b)
+    if m is not None:
+        m.put(a, b, 0, result)
+    return result
+
+
+def collide(a: Shape, b: Shape) -> Optional[Contact]:
+    """
+    2つの図形の接触情報を返す。離れていれば None。
+    判定と同じ計算から法線・めり込み量・接触点を求めるため、押し出しのために
+    intersects() を呼び直す必要はない。
+    """
+    entry = _contact_resolved.get((type(a), type(b)))
+    if entry is None:
+        entry = find_contact_kernel(type(a), type(b))
+        if entry is None:
+            return None
+    if not a.bounds_overlap(b):
+        return None
+    m = memo
+    if m is not None:
+        result = m.get(a, b, 1)
+        if result is not MISSING:
+            return result  # type: ignore[return-value]
+    kernel, swap = entry
+    if swap:
+        contact = kernel(b, a)
+        if contact is not None:
+            contact = contact.flipped()
+    else:
+        contact = kernel(a, b)
+    if m is not None:
+        m.put(a, b, 1, contact)
+    return contact
+
+
+def _concrete_shape_types() -> list[type]:
+    """インスタンス化可能な Shape のサブクラスを列挙する。"""
+    from .shape import Shape
+    found: list[type] = []
+    stack = list(Shape.__subclasses__())
+    while stack:
+        cls = stack.pop()
+        stack.extend(cls.__subclasses__())
+        if not getattr(cls, "__abstractmethods__", None) and cls not in found:
+            found.append(cls)
+    return found
+
+
+def missing_pairs(types: Optional[list[type]] = None, contacts: bool = False) -> list[tuple[type, type]]:
+    """
+    カーネルが登録されていない型の組を返す。
+    types を省略すると、定義済みのすべての具象 Shape サブクラスを対象にする。
+    contacts=True の場合は接触情報カーネルを調べる。
+    """
+    if types is None:
+        types = _concrete_shape_types()
+    find = find_contact_kernel if contacts else find_kernel
+    missing = []
+    for i, ta in enumerate(types):
+        for tb in types[i:]:
+            if find(ta, tb) is None:
+                missing.append((ta, tb))
+    return missing
@@ -0,0 +1,189 @@
+"""
+弾や敵のように同じ種類で数の多い円形のエンティティを、配列の組（Struct of Arrays）で持つプール。
+
+位置・半径・速度・色と追加のフィールドを、あらかじめ確保した array に詰めて持つ。
+生きているエンティティは配列の先頭 count 個に隙間なく並び、削除は末尾の要素を
+空いた位置へ移して詰める（swap-remove、O(1)）。出現のたびにオブジェクトを作らないので
+GC の負担もない。
+
+並び順は削除で入れ替わるため、外からは id（ハンドル）で参照する。
+id は空きリストで再利用し、slot_of / id_of で配列の位置と対応させる。
+kill() は印を付けるだけで、実際の削除は flush() でまとめて行うため、
+配列を走査している途中で kill() しても要素を飛ばさない。
+"""
+from __future__ import annotations
+from array import array
+from typing import Iterable
+from .collision import ALL_LAYERS
+
+
+class EntityPool:
+    """円形エンティティのプール。"""
+
+    def __init__(self, capacity: int, fields: Iterable[str] = (),
+                 category: int = 1, mask: int = ALL_LAYERS):
+        """
+        capacity: 同時に存在できる最大数（配列はこの大きさで確保する）
+        fields: 追加する float のフィールド名。pool.field(名前)[slot] で読み書きできる
+        category, mask: プール全体の衝突レイヤー（Shape と同じ意味）
+        """
+        self.capacity = capacity
+        self.count = 0
+        self.category = category
+        self.mask = mask
+
+        zeros = [0.0] * capacity
+        self.x: array[float] = array("d", zeros)
+        self.y: array[float] = array("d", zeros)
+        self.r: array[float] = array("d", zeros)
+        self.vx: array[float] = array("d", zeros)
+        self.vy: array[float] = array("d", zeros)
+        self.col: array[int] = array("i", [0] * capacity)
+        self.fields = tuple(fields)
+        self.extra: dict[str, array[float]] = {name: array("d", zeros) for name in self.fields}
+
+        # id <-> 配列の位置
+        self.id_of = array("i", range(capacity))
+        self.slot_of = array("i", range(capacity))
+        self.alive = bytearray(capacity)  # id ごとの生存フラグ
+        self._free = list(range(capacity - 1, -1, -1))  # 空いている id（末尾から使う）
+        self._dead: list[int] = []
+
+    def __len__(self) -> int:
+        return self.count
+
+    def field(self, name: str) -> array[float]:
+        """追加のフィールド name の配列（配列の位置で読み書きする）。"""
+        return self.extra[name]
+
+    def can_collide(self, other: EntityPool) -> bool:
+        """レイヤーの組み合わせ上、判定の対象になるか。"""
+        return bool(self.category & other.mask) and bool(other.category & self.mask)
+
+    # --- 出現・削除 ---
+
+    def spawn(self, x: float, y: float, r: float, col: int,
+              vx: float = 0.0, vy: float = 0.0, **values: float) -> int:
+        """エンティティを1つ出現させ、id を返す。満杯なら -1。"""
+        if not self._free:
+            return -1
+        eid = self._free.pop()
+        slot = self.count
+        self.count += 1
+        self.id_of[slot] = eid
+        self.slot_of[eid] = slot
+        self.alive[eid] = 1
+
+        self.x[slot] = x
+        self.y[slot] = y
+        self.r[slot] = r
+        self.vx[slot] = vx
+        self.vy[slot] = vy
+        self.col[slot] = col
+        for name, column in self.extra.items():
+            column[slot] = values.get(name, 0.0)
+        return eid
+
+    def kill(self, eid: int):
+        """id のエンティティに削除の印を付ける。配列からは flush() で取り除く。"""
+        if self.alive[eid]:
+            self.alive[eid] = 0
+            self._dead.append(eid)
+
+    def kill_slot(self, slot: int):
+        """配列の位置 slot のエンティティに削除の印を付ける。"""
+        self.kill(self.id_of[slot])
+
+    def is_alive_slot(self, slot: int) -> bool:
+        return bool(self.alive[self.id_of[slot]])
+
+    def flush(self):
+        """印を付けたエンティティを、末尾の要素で穴を埋めて取り除く。"""
+        if not self._dead:
+            return
+        floats = [self.x, self.y, self.r, self.vx, self.vy]
+        floats.extend(self.extra.values())
+        col = self.col
+        id_of, slot_of = self.id_of, self.slot_of
+        for eid in self._dead:
+            slot = slot_of[eid]
+            last = self.count - 1
+            if slot != last:
+                for a in floats:
+                    a[slot] = a[last]
+                col[slot] = col[last]
+                moved = id_of[last]
+                id_of[slot] = moved
+                slot_of[moved] = slot
+            id_of[last] = eid
+            slot_of[eid] = last
+            self.count = last
+            self._free.append(eid)
+        self._dead.clear()
+
+    def clear(self):
+        """すべて取り除く。"""
+        for slot in range(self.count):
+            self.alive[self.id_of[slot]] = 0
+        self._free = list(range(self.capacity - 1, -1, -1))
+        self.id_of = array("i", range(self.capacity))
+        self.slot_of = array("i", range(self.capacity))
+        self._dead.clear()
+        self.count = 0
+
+    # --- まとめて更新 ---
+
+    def integrate(self, dt: float = 1.0):
+        """全エンティティを速度 (vx, vy) で dt だけ進める。配列はその場で書き換える。"""
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        for slot in range(self.count):
+            x[slot] += vx[slot] * dt
+            y[slot] += vy[slot] * dt
+
+    def cull(self, min_x: float, min_y: float, max_x: float, max_y: float):
+        """円が矩形の外へ完全に出たエンティティに削除の印を付ける。"""
+        x, y, r = self.x, self.y, self.r
+        for slot in range(self.count):
+            rad = r[slot]
+            if (x[slot] + rad < min_x or x[slot] - rad > max_x
+                    or y[slot] + rad < min_y or y[slot] - rad > max_y):
+                self.kill_slot(slot)
+
+    # --- 衝突判定 ---
+
+    def first_overlap(self, cx: float, cy: float, cr: float) -> int:
+        """円 (cx, cy, cr) と重なる最初の生きているエンティティの配列の位置。無ければ -1。"""
+        x, y, r, alive, id_of = self.x, self.y, self.r, self.alive, self.id_of
+        for slot in range(self.count):
+            dx = x[slot] - cx
+            dy = y[slot] - cy
+            rr = r[slot] + cr
+            if dx * dx + dy * dy <= rr * rr and alive[id_of[slot]]:
+                return slot
+        return -1
+
+
+def overlapping_pairs(a: EntityPool, b: EntityPool) -> list[tuple[int, int]]:
+    """
+    a と b の重なっているエンティティの組を (a の配列の位置, b の配列の位置) で返す。
+    レイヤーが合わなければ判定せずに空を返す。削除の印が付いたものは除く。
+    """
+    if not a.can_collide(b):
+        return []
+    pairs = []
+    ax, ay, ar = a.x, a.y, a.r
+    bx, by, br = b.x, b.y, b.r
+    a_alive, a_ids = a.alive, a.id_of
+    b_alive, b_ids = b.alive, b.id_of
+    b_slots = [j for j in range(b.count) if b_alive[b_ids[j]]]
+    for i in range(a.count):
+        if not a_alive[a_ids[i]]:
+            continue
+        x, y, r = ax[i], ay[i], ar[i]
+        for j in b_slots:
+            dx = bx[j] - x
+            dy = by[j] - y
+            rr = br[j] + r
+            if dx * dx + dy * dy <= rr * rr:
+                pairs.append((i, j))
+    return pairs
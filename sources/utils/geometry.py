@@ -3,31 +3,141 @@ import pyxel
 import math
 from .vector2 import Vector2
 from .shape import Shape
-from . import polygon  # Local module import to handle circular dependency safely
+from . import collision
 
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
 if TYPE_CHECKING:
     from .polygon import Polygon
 
 
+def _point_segment_dist_sq(px: float, py: float, ax: float, ay: float, bx: float, by: float) -> float:
+    """点 (px, py) から線分 AB への距離の2乗を返す（一時オブジェクトを確保しない）。"""
+    abx = bx - ax
+    aby = by - ay
+    len_sq = abx * abx + aby * aby
+    if len_sq == 0:
+        return (px - ax)**2 + (py - ay)**2
+    t = ((px - ax) * abx + (py - ay) * aby) / len_sq
+    t = max(0.0, min(1.0, t))
+    dx = px - (ax + abx * t)
+    dy = py - (ay + aby * t)
+    return dx * dx + dy * dy
+
+
+def _closest_on_segment(px: float, py: float, ax: float, ay: float, bx: float, by: float) -> tuple[float, float]:
+    """点 (px, py) に最も近い線分 AB 上の点を返す。"""
+    abx = bx - ax
+    aby = by - ay
+    len_sq = abx * abx + aby * aby
+    if len_sq == 0:
+        return ax, ay
+    t = ((px - ax) * abx + (py - ay) * aby) / len_sq
+    t = max(0.0, min(1.0, t))
+    return ax + abx * t, ay + aby * t
+
+
+def _closest_points_between_segments(p1x: float, p1y: float, q1x: float, q1y: float,
+                                     p2x: float, p2y: float, q2x: float, q2y: float) -> tuple[float, float, float, float]:
+    """
+    線分 P1Q1 と線分 P2Q2 の最近点の組 (c1x, c1y, c2x, c2y) を返す。
+    c1 は1本目、c2 は2本目の線分上の点。交差している場合は同じ点になる。
+    """
+    d1x, d1y = q1x - p1x, q1y - p1y
+    d2x, d2y = q2x - p2x, q2y - p2y
+    rx, ry = p1x - p2x, p1y - p2y
+    a = d1x * d1x + d1y * d1y
+    e = d2x * d2x + d2y * d2y
+    f = d2x * rx + d2y * ry
+
+    if a == 0 and e == 0:
+        s = t = 0.0
+    elif a == 0:
+        s = 0.0
+        t = max(0.0, min(1.0, f / e))
+    else:
+        c = d1x * rx + d1y * ry
+        if e == 0:
+            t = 0.0
+            s = max(0.0, min(1.0, -c / a))
+        else:
+            b = d1x * d2x + d1y * d2y
+            denom = a * e - b * b
+            # 平行な場合は任意の s から始めてよい
+            s = max(0.0, min(1.0, (b * f - c * e) / denom)) if denom != 0 else 0.0
+            t = (b * s + f) / e
+            if t < 0:
+                t = 0.0
+                s = max(0.0, min(1.0, -c / a))
+            elif t > 1:
+                t = 1.0
+                s = max(0.0, min(1.0, (b - c) / a))
+    return p1x + d1x * s, p1y + d1y * s, p2x + d2x * t, p2y + d2y * t
+
+
+def _segment_distance_sq(p1x: float, p1y: float, q1x: float, q1y: float,
+                         p2x: float, p2y: float, q2x: float, q2y: float) -> float:
+    """線分 P1Q1 と線分 P2Q2 の最短距離の2乗を返す（一時オブジェクトを確保しない）。"""
+    c1x, c1y, c2x, c2y = _closest_points_between_segments(p1x, p1y, q1x, q1y, p2x, p2y, q2x, q2y)
+    dx = c2x - c1x
+    dy = c2y - c1y
+    return dx * dx + dy * dy
+
+
+def _contact_between(ax: float, ay: float, ra: float, bx: float, by: float, rb: float,
+                     fallback: tuple[float, float]) -> Optional[collision.Contact]:
+    """
+    半径 ra の点 A（a 側の最近点）と半径 rb の点 B（b 側の最近点）から接触情報を作る。
+    A と B が一致する場合は fallback を法線に使う。
+    """
+    dx = bx - ax
+    dy = by - ay
+    dist_sq = dx * dx + dy * dy
+    total = ra + rb
+    if dist_sq > total * total:
+        return None
+    dist = math.sqrt(dist_sq)
+    if dist > 0:
+        nx, ny = dx / dist, dy / dist
+    else:
+        nx, ny = fallback
+    depth = total - dist
+    # 接触点は両表面の中間
+    k = ra - depth / 2
+    return collision.Contact(Vector2(nx, ny), depth, [Vector2(ax + nx * k, ay + ny * k)])
+
+
 class Circle(Shape):
     """円を表すクラス。中心座標と半径で定義される。"""
     
     def __init__(self, x: float, y: float, radius: float):
-        self.center = Vector2(x, y)
-        self.radius = radius
+        super().__init__(x, y)
+        self._radius = radius
         self._base_radius = radius
 
-    def intersects(self, other: Shape) -> bool:
-        if isinstance(other, Circle):
-            return self._intersects_circle(other)
-        elif isinstance(other, Capsule):
-            return self._intersects_capsule(other)
-        elif isinstance(other, Line):
-            return other.intersects(self)  # Delegate to Line
-        elif isinstance(other, polygon.Polygon):
-            return other.intersects(self)
-        return False
+    @property
+    def radius(self) -> float:
+        return self._radius
+
+    @radius.setter
+    def radius(self, value: float):
+        self._radius = value
+        self.mark_dirty()
+
+    @property
+    def center(self) -> Vector2:
+        """円の中心（Shape.position と同じベクトル）。"""
+        return self._position
+
+    @center.setter
+    def center(self, value: Vector2):
+        self.position = value
+
+    def _compute_aabb(self) -> tuple[float, float, float, float]:
+        c, r = self._position, self._radius
+        return c.x - r, c.y - r, c.x + r, c.y + r
+
+    def _compute_bounding_radius(self) -> float:
+        return self._radius
 
     def _intersects_circle(self, other: Circle) -> bool:
         """円同士の交差判定。"""
@@ -39,6 +149,22 @@ class Circle(Shape):
         """円とカプセルの交差判定。"""
         return other.contains_point(self.center, self.radius)
 
+    def support_core(self, dx: float, dy: float) -> tuple[float, float]:
+        """芯は中心の1点。"""
+        return self._position.x, self._position.y
+
+    def _core_radius(self) -> float:
+        return self._radius
+
+    def project_onto(self, ax: float, ay: float) -> tuple[float, float]:
+        c = self._position.x * ax + self._position.y * ay
+        return c - self._radius, c + self._radius
+
+    def _collide_circle(self, other: Circle) -> Optional[collision.Contact]:
+        """円同士の接触情報。"""
+        return _contact_between(self.center.x, self.center.y, self.radius,
+                                other.center.x, other.center.y, other.radius, (1.0, 0.0))
+
     def contains_point(self, point: Vector2) -> bool:
         """点が円の内部にあるか判定。"""
         dist_sq = (self.center.x - point.x)**2 + (self.center.y - point.y)**2
@@ -46,16 +172,8 @@ class Circle(Shape):
 
     def set_scale(self, sx: float, sy: float):
         """スケールを設定（半径に影響）。"""
-        self.radius = self._base_radius * ((abs(sx) + abs(sy)) / 2)
-
-    def rotate(self, angle: float):
-        """回転（円には視覚的効果なし）。"""
-        pass
-
-    def translate(self, dx: float, dy: float):
-        """円を移動。"""
-        self.center.x += dx
-        self.center.y += dy
+        super().set_scale(sx, sy)
+        self.radius = self._base_radius * self.transform.mean_scale()
 
     def draw(self, col: int, fill: bool = False):
         """円を描画。"""
@@ -66,28 +184,155 @@ class Circle(Shape):
 
 
 class Line(Shape):
-    """線分を表すクラス。始点と終点で定義される（半径なし）。"""
+    """
+    線分を表すクラス。始点と終点で定義される（半径なし）。
+    端点は中点を原点とするローカル座標で保持し、Shape の変換（移動・回転）で
+    ワールド座標の start / end を求める。スケールは端点には影響しない。
+    """
 
     def __init__(self, start: Vector2, end: Vector2):
-        self.start = start
-        self.end = end
-
-    def intersects(self, other: Shape) -> bool:
-        if isinstance(other, Circle):
-            return self._intersects_circle(other)
-        elif isinstance(other, Line):
-            return self._intersects_line(other)
-        elif isinstance(other, Capsule):
-            # Capsule は Line を継承しているので、Capsule 側に委譲
-            return other.intersects(self)
-        return False
+        super().__init__()
+        self._start: Vector2 = Vector2(0, 0)
+        self._end: Vector2 = Vector2(0, 0)
+        self._local_start: Vector2 = Vector2(0, 0)
+        self._local_end: Vector2 = Vector2(0, 0)
+        self._endpoints_dirty: bool = True
+        self._rebase(start.x, start.y, end.x, end.y)
+
+    def _rebase(self, sx: float, sy: float, ex: float, ey: float):
+        """ワールド座標の端点から、中点を原点としたローカル状態を作り直す。"""
+        cx = (sx + ex) * 0.5
+        cy = (sy + ey) * 0.5
+        self._local_start.set(sx - cx, sy - cy)
+        self._local_end.set(ex - cx, ey - cy)
+        self._position.set(cx, cy)
+        self._rotation = 0.0
+        self.mark_dirty()
+
+    @property
+    def start(self) -> Vector2:
+        """ワールド座標の始点（キャッシュ済み。直接書き換えないこと）。"""
+        if self._endpoints_dirty:
+            self._update_endpoints()
+        return self._start
+
+    @start.setter
+    def start(self, value: Vector2):
+        end = self.end
+        self._rebase(value.x, value.y, end.x, end.y)
+
+    @property
+    def end(self) -> Vector2:
+        """ワールド座標の終点（キャッシュ済み。直接書き換えないこと）。"""
+        if self._endpoints_dirty:
+            self._update_endpoints()
+        return self._end
+
+    @end.setter
+    def end(self, value: Vector2):
+        start = self.start
+        self._rebase(start.x, start.y, value.x, value.y)
+
+    def _update_transform(self):
+        """線分の変換は移動と回転のみ（スケールは半径などにだけ使う）。"""
+        cos, sin = self.rotation_cs()
+        self._transform.set_trs_cs(self._position.x, self._position.y, cos, sin)
+        self._transform_dirty = False
+
+    def _update_endpoints(self):
+        transform = self.transform
+        transform.apply_into(self._local_start, self._start)
+        transform.apply_into(self._local_end, self._end)
+        self._endpoints_dirty = False
+
+    def mark_dirty(self):
+        super().mark_dirty()
+        self._endpoints_dirty = True
+
+    def _compute_aabb(self) -> tuple[float, float, float, float]:
+        start, end = self.start, self.end
+        return min(start.x, end.x), min(start.y, end.y), max(start.x, end.x), max(start.y, end.y)
+
+    def _compute_bounding_radius(self) -> float:
+        # 端点は中点（position）からの相対座標で保持している
+        return math.hypot(self._local_start.x, self._local_start.y)
 
     def _intersects_circle(self, circle: Circle) -> bool:
         """円と線分の交差判定。"""
-        closest = self.closest_point(circle.center)
-        dist_sq = (circle.center.x - closest.x)**2 + (circle.center.y - closest.y)**2
+        dist_sq = _point_segment_dist_sq(circle.center.x, circle.center.y,
+                                         self.start.x, self.start.y, self.end.x, self.end.y)
         return dist_sq <= circle.radius**2
 
+    def support_core(self, dx: float, dy: float) -> tuple[float, float]:
+        """芯（線分）のサポート点: (dx, dy) 方向に遠い方の端点。"""
+        start, end = self.start, self.end
+        if (end.x - start.x) * dx + (end.y - start.y) * dy > 0:
+            return end.x, end.y
+        return start.x, start.y
+
+    def project_onto(self, ax: float, ay: float) -> tuple[float, float]:
+        p1 = self.start.x * ax + self.start.y * ay
+        p2 = self.end.x * ax + self.end.y * ay
+        r = self._core_radius()
+        return (p1 - r, p2 + r) if p1 < p2 else (p2 - r, p1 + r)
+
+    def _segment_normal(self, toward_x: float, toward_y: float) -> tuple[float, float]:
+        """点 (toward_x, toward_y) の側を向いた線分の単位法線を返す（縮退時は上向き）。"""
+        start, end = self.start, self.end
+        dx = end.x - start.x
+        dy = end.y - start.y
+        length = math.hypot(dx, dy)
+        if length == 0:
+            return 0.0, -1.0
+        nx, ny = -dy / length, dx / length
+        if (toward_x - start.x) * nx + (toward_y - start.y) * ny < 0:
+            return -nx, -ny
+        return nx, ny
+
+    def _collide_circle(self, circle: Circle) -> Optional[collision.Contact]:
+        """円との接触情報（線分上の最近点から求める）。"""
+        cx, cy = circle.center.x, circle.center.y
+        start, end = self.start, self.end
+        qx, qy = _closest_on_segment(cx, cy, start.x, start.y, end.x, end.y)
+        return _contact_between(qx, qy, self._core_radius(), cx, cy, circle.radius,
+                                self._segment_normal(cx, cy))
+
+    def _collide_line(self, other: Line) -> Optional[collision.Contact]:
+        """
+        線分（またはカプセル）同士の接触情報（線分間の最近点から求める）。
+        芯の線分が交差している場合は、2本の線分の法線軸で最小の押し出しを求める。
+        """
+        s1, e1, s2, e2 = self.start, self.end, other.start, other.end
+        radius = self._core_radius() + other._core_radius()
+        if not self._intersects_line(other):
+            c1x, c1y, c2x, c2y = _closest_points_between_segments(s1.x, s1.y, e1.x, e1.y,
+                                                                  s2.x, s2.y, e2.x, e2.y)
+            mid = other.position
+            return _contact_between(c1x, c1y, self._core_radius(), c2x, c2y, other._core_radius(),
+                                    self._segment_normal(mid.x, mid.y))
+
+        # 芯が交差: 各線分の法線軸で、other を押し出して離すのに必要な量の最小値
+        best_depth = math.inf
+        best_x = best_y = 0.0
+        for seg in (self, other):
+            dx = seg.end.x - seg.start.x
+            dy = seg.end.y - seg.start.y
+            length = math.hypot(dx, dy)
+            if length == 0:
+                continue
+            ax, ay = -dy / length, dx / length
+            a0, a1 = sorted((s1.x * ax + s1.y * ay, e1.x * ax + e1.y * ay))
+            b0, b1 = sorted((s2.x * ax + s2.y * ay, e2.x * ax + e2.y * ay))
+            forward = a1 - b0 + radius
+            backward = b1 - a0 + radius
+            if forward < best_depth:
+                best_depth, best_x, best_y = forward, ax, ay
+            if backward < best_depth:
+                best_depth, best_x, best_y = backward, -ax, -ay
+
+        cx, cy, _, _ = _closest_points_between_segments(s1.x, s1.y, e1.x, e1.y, s2.x, s2.y, e2.x, e2.y)
+        return collision.Contact(Vector2(best_x, best_y), best_depth, [Vector2(cx, cy)])
+
     def _intersects_line(self, other: Line) -> bool:
         """線分同士の交差判定。"""
         def ccw(a: Vector2, b: Vector2, c: Vector2) -> float:
@@ -118,30 +363,18 @@ class Line(Shape):
 
     def closest_point(self, point: Vector2) -> Vector2:
         """点から線分への最近点を返す。"""
-        ab = self.end - self.start
-        if ab.x == 0 and ab.y == 0:
-            return self.start
-        ap = point - self.start
-        t = ap.dot(ab) / ab.dot(ab)
+        return self.closest_point_into(point, Vector2(0, 0))
+
+    def closest_point_into(self, point: Vector2, out: Vector2) -> Vector2:
+        """点から線分への最近点を out に書き込み、out を返す。"""
+        abx = self.end.x - self.start.x
+        aby = self.end.y - self.start.y
+        len_sq = abx * abx + aby * aby
+        if len_sq == 0:
+            return out.set(self.start.x, self.start.y)
+        t = ((point.x - self.start.x) * abx + (point.y - self.start.y) * aby) / len_sq
         t = max(0.0, min(1.0, float(t)))
-        return self.start + ab * t
-
-    def rotate(self, angle: float):
-        """線分を中心周りに回転。"""
-        center = (self.start + self.end) * 0.5
-        self.start = (self.start - center).rotate(angle) + center
-        self.end = (self.end - center).rotate(angle) + center
-
-    def set_scale(self, sx: float, sy: float):
-        """スケール（線分には効果なし）。"""
-        pass
-
-    def translate(self, dx: float, dy: float):
-        """線分を移動。"""
-        self.start.x += dx
-        self.start.y += dy
-        self.end.x += dx
-        self.end.y += dy
+        return out.set(self.start.x + abx * t, self.start.y + aby * t)
 
     def draw(self, col: int, fill: bool = False):
         """線分を描画。"""
@@ -153,77 +386,96 @@ class Capsule(Line):
 
     def __init__(self, start: Vector2, end: Vector2, radius: float):
         super().__init__(start, end)
-        self.radius = radius
+        self._radius = radius
         self._base_radius = radius
 
-    def intersects(self, other: Shape) -> bool:
-        if isinstance(other, Circle):
-            return self._intersects_circle(other)
-        elif isinstance(other, Capsule):
-            return self._intersects_capsule(other)
-        elif isinstance(other, Line):
-            return self._intersects_line_with_radius(other)
-        elif isinstance(other, polygon.Polygon):
-            return other.intersects(self)
-        return False
+    @property
+    def radius(self) -> float:
+        return self._radius
+
+    @radius.setter
+    def radius(self, value: float):
+        self._radius = value
+        self.mark_dirty()
+
+    def _core_radius(self) -> float:
+        return self._radius
+
+    def _compute_aabb(self) -> tuple[float, float, float, float]:
+        min_x, min_y, max_x, max_y = super()._compute_aabb()
+        r = self._radius
+        return min_x - r, min_y - r, max_x + r, max_y + r
+
+    def _compute_bounding_radius(self) -> float:
+        return super()._compute_bounding_radius() + self._radius
 
     def _intersects_circle(self, circle: Circle) -> bool:
         """円とカプセルの交差判定。"""
         return self.contains_point(circle.center, circle.radius)
 
     def _intersects_capsule(self, other: Capsule) -> bool:
-        """カプセル同士の交差判定（簡易版）。"""
-        if self.contains_point(other.start, other.radius) or self.contains_point(other.end, other.radius):
-            return True
-        if other.contains_point(self.start, self.radius) or other.contains_point(self.end, self.radius):
-            return True
-        return False
+        """カプセル同士の交差判定（芯の線分間の最短距離と半径の和を比べる）。"""
+        s1, e1, s2, e2 = self.start, self.end, other.start, other.end
+        dist_sq = _segment_distance_sq(s1.x, s1.y, e1.x, e1.y, s2.x, s2.y, e2.x, e2.y)
+        return dist_sq <= (self.radius + other.radius)**2
 
     def _intersects_line_with_radius(self, line: Line) -> bool:
-        """線分とカプセルの交差判定。"""
-        # 線分の両端点がカプセル内にあるかチェック
-        if self.contains_point(line.start, 0) or self.contains_point(line.end, 0):
-            return True
-        # 線分同士の交差もチェック
-        return super()._intersects_line(line)
+        """線分とカプセルの交差判定（芯の線分と線分の最短距離を半径と比べる）。"""
+        s1, e1, s2, e2 = self.start, self.end, line.start, line.end
+        dist_sq = _segment_distance_sq(s1.x, s1.y, e1.x, e1.y, s2.x, s2.y, e2.x, e2.y)
+        return dist_sq <= self.radius**2
 
     def contains_point(self, point: Vector2, expansion: float = 0.0) -> bool:
         """点がカプセル内（+拡張半径）にあるか判定。"""
-        closest = self.closest_point(point)
-        dist_sq = (point.x - closest.x)**2 + (point.y - closest.y)**2
+        dist_sq = _point_segment_dist_sq(point.x, point.y,
+                                         self.start.x, self.start.y, self.end.x, self.end.y)
         return dist_sq <= (self.radius + expansion)**2
 
     def set_scale(self, sx: float, sy: float):
         """スケールを設定（半径に影響）。"""
-        self.radius = self._base_radius * ((abs(sx) + abs(sy)) / 2)
+        super().set_scale(sx, sy)
+        self.radius = self._base_radius * (abs(sx) + abs(sy)) / 2
 
     def draw(self, col: int, fill: bool = True):
         """カプセルを描画。"""
+        sx, sy = self.start.x, self.start.y
+        ex, ey = self.end.x, self.end.y
+        if fill:
+            pyxel.circ(sx, sy, self.radius, col)
+            pyxel.circ(ex, ey, self.radius, col)
+        else:
+            pyxel.circb(sx, sy, self.radius, col)
+            pyxel.circb(ex, ey, self.radius, col)
+
+        dir_x = ex - sx
+        dir_y = ey - sy
+        if dir_x == 0 and dir_y == 0:
+            return
+
+        # 方向を90度回転した垂直オフセット（一時ベクトルを作らずに計算）
+        k = self.radius / math.hypot(dir_x, dir_y)
+        px = -dir_y * k
+        py = dir_x * k
+
         if fill:
-            pyxel.circ(self.start.x, self.start.y, self.radius, col)
-            pyxel.circ(self.end.x, self.end.y, self.radius, col)
-            
-            direction = self.get_direction()
-            if direction.x != 0 or direction.y != 0:
-                perp = direction.normalized().rotate(90) * self.radius
-                p1 = self.start + perp
-                p2 = self.end + perp
-                p3 = self.end - perp
-                p4 = self.start - perp
-                
-                pyxel.tri(p1.x, p1.y, p2.x, p2.y, p3.x, p3.y, col)
-                pyxel.tri(p1.x, p1.y, p3.x, p3.y, p4.x, p4.y, col)
+            pyxel.tri(sx + px, sy + py, ex + px, ey + py, ex - px, ey - py, col)
+            pyxel.tri(sx + px, sy + py, ex - px, ey - py, sx - px, sy - py, col)
         else:
-            pyxel.circb(self.start.x, self.start.y, self.radius, col)
-            pyxel.circb(self.end.x, self.end.y, self.radius, col)
-            
-            direction = self.get_direction()
-            if direction.x != 0 or direction.y != 0:
-                perp = direction.normalized().rotate(90) * self.radius
-                p1 = self.start + perp
-                p2 = self.end + perp
-                p3 = self.end - perp
-                p4 = self.start - perp
-                
-                pyxel.line(p1.x, p1.y, p2.x, p2.y, col)
-                pyxel.line(p3.x, p3.y, p4.x, p4.y, col)
+            pyxel.line(sx + px, sy + py, ex + px, ey + py, col)
+            pyxel.line(ex - px, ey - py, sx - px, sy - py, col)
+
+
+# --- 衝突判定カーネルの登録 ---
+collision.register_pair(Circle, Circle, Circle._intersects_circle)
+collision.register_pair(Circle, Capsule, Circle._intersects_capsule)
+collision.register_pair(Line, Circle, Line._intersects_circle)
+collision.register_pair(Line, Line, Line._intersects_line)
+collision.register_pair(Capsule, Line, Capsule._intersects_line_with_radius)
+collision.register_pair(Capsule, Capsule, Capsule._intersects_capsule)
+
+# 接触情報カーネル（Line のカーネルは _core_radius() によりカプセルにも使われる）
+collision.register_contact(Circle, Circle, Circle._collide_circle)
+collision.register_contact(Line, Circle, Line._collide_circle)
+collision.register_contact(Line, Line, Line._collide_line)
+
+from . import polygon  # Polygon とのカーネルを登録させるためのインポート
@@ -0,0 +1,314 @@
+"""
+GJK / EPA による凸形状の汎用ナローフェーズ。
+
+各図形の support_core()（芯の形状のサポート点）と _core_radius()（丸みの半径）
+だけを使って、任意の図形の組の距離・交差・めり込みを求める。
+芯同士の最短距離を GJK で求め、半径を差し引くことで円やカプセルも
+少ない反復で正確に扱える。芯が重なっている場合は EPA でめり込みを求める。
+
+型の組ごとのカーネルが登録されていない図形の組には、どちらの図形も
+support_core() を実装していれば、collision のレジストリを通してこのモジュールの判定が使われる。
+"""
+from __future__ import annotations
+import math
+from typing import Optional
+from .vector2 import Vector2
+from . import collision
+
+_MAX_ITERATIONS = 32
+_EPSILON = 1e-9
+
+# 単体の頂点: [wx, wy, ax, ay, bx, by, dx, dy]
+#   w = a - b（ミンコフスキー差の点）、a / b は各図形のサポート点、d は探索方向
+_Vertex = list
+
+
+class GJKCache:
+    """
+    前回の判定で最後に残った単体の探索方向を保持する（ウォームスタート用）。
+    同じ図形の組に毎フレーム同じキャッシュを渡すと、動きが小さい場合は
+    前回の単体から始めるため数回の反復で収束する。
+    """
+
+    __slots__ = ("directions",)
+
+    def __init__(self):
+        self.directions: list[tuple[float, float]] = []
+
+
+class GJKResult:
+    """GJK の結果。distance は図形間の最短距離（重なっていれば0）。"""
+
+    __slots__ = ("distance", "point_a", "point_b", "iterations")
+
+    def __init__(self, distance: float, point_a: Vector2, point_b: Vector2, iterations: int):
+        self.distance: float = distance
+        self.point_a: Vector2 = point_a  # a 上の最近点
+        self.point_b: Vector2 = point_b  # b 上の最近点
+        self.iterations: int = iterations
+
+    @property
+    def intersecting(self) -> bool:
+        return self.distance <= 0.0
+
+    def __repr__(self) -> str:
+        return f"GJKResult(distance={self.distance:.4f}, point_a={self.point_a}, point_b={self.point_b})"
+
+
+def _vertex(a: Shape, b: Shape, dx: float, dy: float) -> _Vertex:
+    ax, ay = a.support_core(dx, dy)
+    bx, by = b.support_core(-dx, -dy)
+    return [ax - bx, ay - by, ax, ay, bx, by, dx, dy]
+
+
+# --- 単体の最近点 ---
+
+def _solve(simplex: list[_Vertex]) -> tuple[list[_Vertex], list[float]]:
+    """
+    単体のうち原点に最も近い部分（頂点・辺・三角形）と、その重心座標を返す。
+    """
+    if len(simplex) == 1:
+        return simplex, [1.0]
+
+    if len(simplex) == 2:
+        v1, v2 = simplex
+        ex, ey = v2[0] - v1[0], v2[1] - v1[1]
+        d12_2 = -(v1[0] * ex + v1[1] * ey)
+        if d12_2 <= 0:
+            return [v1], [1.0]
+        d12_1 = v2[0] * ex + v2[1] * ey
+        if d12_1 <= 0:
+            return [v2], [1.0]
+        inv = 1.0 / (d12_1 + d12_2)
+        return [v1, v2], [d12_1 * inv, d12_2 * inv]
+
+    v1, v2, v3 = simplex
+    w1x, w1y, w2x, w2y, w3x, w3y = v1[0], v1[1], v2[0], v2[1], v3[0], v3[1]
+
+    e12x, e12y = w2x - w1x, w2y - w1y
+    d12_1 = w2x * e12x + w2y * e12y
+    d12_2 = -(w1x * e12x + w1y * e12y)
+
+    e13x, e13y = w3x - w1x, w3y - w1y
+    d13_1 = w3x * e13x + w3y * e13y
+    d13_2 = -(w1x * e13x + w1y * e13y)
+
+    e23x, e23y = w3x - w2x, w3y - w2y
+    d23_1 = w3x * e23x + w3y * e23y
+    d23_2 = -(w2x * e23x + w2y * e23y)
+
+    n123 = e12x * e13y - e12y * e13x
+    d123_1 = n123 * (w2x * w3y - w2y * w3x)
+    d123_2 = n123 * (w3x * w1y - w3y * w1x)
+    d123_3 = n123 * (w1x * w2y - w1y * w2x)
+
+    if d12_2 <= 0 and d13_2 <= 0:
+        return [v1], [1.0]
+    if d12_1 > 0 and d12_2 > 0 and d123_3 <= 0:
+        inv = 1.0 / (d12_1 + d12_2)
+        return [v1, v2], [d12_1 * inv, d12_2 * inv]
+    if d13_1 > 0 and d13_2 > 0 and d123_2 <= 0:
+        inv = 1.0 / (d13_1 + d13_2)
+        return [v1, v3], [d13_1 * inv, d13_2 * inv]
+    if d12_1 <= 0 and d23_2 <= 0:
+        return [v2], [1.0]
+    if d13_1 <= 0 and d23_1 <= 0:
+        return [v3], [1.0]
+    if d23_1 > 0 and d23_2 > 0 and d123_1 <= 0:
+        inv = 1.0 / (d23_1 + d23_2)
+        return [v2, v3], [d23_1 * inv, d23_2 * inv]
+
+    # 原点は三角形の内部
+    inv = 1.0 / (d123_1 + d123_2 + d123_3)
+    return simplex, [d123_1 * inv, d123_2 * inv, d123_3 * inv]
+
+
+def _combine(simplex: list[_Vertex], weights: list[float], offset: int) -> tuple[float, float]:
+    x = y = 0.0
+    for v, w in zip(simplex, weights):
+        x += v[offset] * w
+        y += v[offset + 1] * w
+    return x, y
+
+
+def _gjk_core(a: Shape, b: Shape, cache: Optional[GJKCache]) -> tuple[list[_Vertex], list[float], int]:
+    """
+    芯同士の GJK。原点に最も近い単体とその重心座標、反復回数を返す。
+    単体が3頂点なら芯は重なっている。
+    """
+    if cache is not None and cache.directions:
+        simplex = [_vertex(a, b, dx, dy) for dx, dy in cache.directions]
+    else:
+        dx = a.position.x - b.position.x
+        dy = a.position.y - b.position.y
+        if dx == 0 and dy == 0:
+            dx = 1.0
+        simplex = [_vertex(a, b, -dx, -dy)]
+
+    iterations = 0
+    weights = [1.0]
+    while iterations < _MAX_ITERATIONS:
+        iterations += 1
+        simplex, weights = _solve(simplex)
+        if len(simplex) == 3:
+            break
+        cx, cy = _combine(simplex, weights, 0)
+        dist_sq = cx * cx + cy * cy
+        if dist_sq < _EPSILON * _EPSILON:
+            break
+
+        v = _vertex(a, b, -cx, -cy)
+        # 新しい点で原点へ近づけなければ収束
+        if dist_sq - (v[0] * cx + v[1] * cy) <= _EPSILON * max(1.0, dist_sq):
+            break
+        if any(abs(v[0] - u[0]) < _EPSILON and abs(v[1] - u[1]) < _EPSILON for u in simplex):
+            break
+        simplex.append(v)
+
+    if cache is not None:
+        cache.directions = [(v[6], v[7]) for v in simplex]
+    return simplex, weights, iterations
+
+
+# --- EPA ---
+
+def _epa(a: Shape, b: Shape, simplex: list[_Vertex]) -> tuple[float, float, float, float, float, float, float]:
+    """
+    原点を含む単体から多角形を広げ、ミンコフスキー差の境界で原点に最も近い辺を求める。
+    (めり込み量, 法線x, 法線y, a上の点x, a上の点y, b上の点x, b上の点y) を返す。
+    """
+    polytope = list(simplex)
+    # 反時計回り（面積が正）にそろえる
+    area = 0.0
+    for i in range(len(polytope)):
+        p, q = polytope[i], polytope[(i + 1) % len(polytope)]
+        area += p[0] * q[1] - q[0] * p[1]
+    if area < 0:
+        polytope.reverse()
+
+    best = (0.0, 1.0, 0.0, 0)
+    for _ in range(_MAX_ITERATIONS):
+        best_dist = math.inf
+        for i in range(len(polytope)):
+            p, q = polytope[i], polytope[(i + 1) % len(polytope)]
+            ex, ey = q[0] - p[0], q[1] - p[1]
+            length = math.hypot(ex, ey)
+            if length == 0:
+                continue
+            nx, ny = ey / length, -ex / length
+            dist = nx * p[0] + ny * p[1]
+            if dist < best_dist:
+                best_dist = dist
+                best = (dist, nx, ny, i)
+        dist, nx, ny, i = best
+        v = _vertex(a, b, nx, ny)
+        if v[0] * nx + v[1] * ny - dist < 1e-6:
+            break
+        polytope.insert(i + 1, v)
+
+    dist, nx, ny, i = best
+    p, q = polytope[i], polytope[(i + 1) % len(polytope)]
+    ex, ey = q[0] - p[0], q[1] - p[1]
+    len_sq = ex * ex + ey * ey
+    t = 0.0 if len_sq == 0 else max(0.0, min(1.0, -(p[0] * ex + p[1] * ey) / len_sq))
+    pax = p[2] + (q[2] - p[2]) * t
+    pay = p[3] + (q[3] - p[3]) * t
+    pbx = p[4] + (q[4] - p[4]) * t
+    pby = p[5] + (q[5] - p[5]) * t
+    # ミンコフスキー差 a - b の外向き法線の向きに b を押し出せば離れる
+    return dist, nx, ny, pax, pay, pbx, pby
+
+
+def _complete_triangle(a: Shape, b: Shape, simplex: list[_Vertex]) -> list[_Vertex]:
+    """原点に接しているだけの縮退した単体を、EPA が始められる三角形に広げる。"""
+    simplex = list(simplex)
+    if len(simplex) == 1:
+        v = simplex[0]
+        dx, dy = -v[6], -v[7]
+        if dx == 0 and dy == 0:
+            dx = 1.0
+        simplex.append(_vertex(a, b, dx, dy))
+    if len(simplex) == 2:
+        p, q = simplex
+        ex, ey = q[0] - p[0], q[1] - p[1]
+        if ex == 0 and ey == 0:
+            ex = 1.0
+        v = _vertex(a, b, -ey, ex)
+        if abs(ex * (v[1] - p[1]) - ey * (v[0] - p[0])) < _EPSILON:
+            v = _vertex(a, b, ey, -ex)
+        simplex.append(v)
+    return simplex
+
+
+# --- 公開API ---
+
+def gjk_distance(a: Shape, b: Shape, cache: Optional[GJKCache] = None) -> GJKResult:
+    """2つの図形の最短距離と最近点を返す（重なっていれば距離は0）。"""
+    simplex, weights, iterations = _gjk_core(a, b, cache)
+    ax, ay = _combine(simplex, weights, 2)
+    bx, by = _combine(simplex, weights, 4)
+    ra, rb = a._core_radius(), b._core_radius()
+
+    if len(simplex) == 3:
+        return GJKResult(0.0, Vector2(ax, ay), Vector2(bx, by), iterations)
+    dx, dy = bx - ax, by - ay
+    core = math.hypot(dx, dy)
+    if core <= ra + rb:
+        return GJKResult(0.0, Vector2(ax, ay), Vector2(bx, by), iterations)
+    nx, ny = dx / core, dy / core
+    return GJKResult(core - ra - rb,
+                     Vector2(ax + nx * ra, ay + ny * ra),
+                     Vector2(bx - nx * rb, by - ny * rb), iterations)
+
+
+def gjk_intersects(a: Shape, b: Shape, cache: Optional[GJKCache] = None) -> bool:
+    """2つの図形が交差しているか判定する。"""
+    simplex, weights, _ = _gjk_core(a, b, cache)
+    if len(simplex) == 3:
+        return True
+    cx, cy = _combine(simplex, weights, 0)
+    r = a._core_radius() + b._core_radius()
+    return cx * cx + cy * cy <= r * r + _EPSILON * _EPSILON
+
+
+def gjk_collide(a: Shape, b: Shape, cache: Optional[GJKCache] = None) -> Optional[collision.Contact]:
+    """
+    2つの図形の接触情報を返す（離れていれば None）。
+    芯が離れていれば最近点から、重なっていれば EPA でめり込みを求める。
+    """
+    simplex, weights, _ = _gjk_core(a, b, cache)
+    ra, rb = a._core_radius(), b._core_radius()
+
+    cx, cy = _combine(simplex, weights, 0)
+    core_sq = cx * cx + cy * cy
+    if len(simplex) < 3 and core_sq > _EPSILON * _EPSILON:
+        r = ra + rb
+        if core_sq > r * r:
+            return None
+        ax, ay = _combine(simplex, weights, 2)
+        core = math.sqrt(core_sq)
+        nx, ny = -cx / core, -cy / core
+        depth = r - core
+        k = ra - depth / 2
+        return collision.Contact(Vector2(nx, ny), depth, [Vector2(ax + nx * k, ay + ny * k)])
+
+    dist, nx, ny, ax, ay, bx, by = _epa(a, b, _complete_triangle(a, b, simplex))
+    depth = dist + ra + rb
+    # 接触点は両表面の中間
+    px = (ax + bx) / 2 + nx * (ra - rb) / 2
+    py = (ay + by) / 2 + ny * (ra - rb) / 2
+    return collision.Contact(Vector2(nx, ny), depth, [Vector2(px, py)])
+
+
+# --- 汎用カーネルの登録（個別のカーネルがない図形の組に使われる） ---
+from .shape import Shape  # noqa: E402
+
+
+def supports_gjk(shape_type: type) -> bool:
+    """図形の型が support_core() を実装していて、このモジュールで判定できるか。"""
+    return shape_type.support_core is not Shape.support_core
+
+
+# support_core() の無い型の組は登録なしとして扱われ、collision.missing_pairs() に現れる
+collision.register_pair(Shape, Shape, gjk_intersects, supports_gjk)
+collision.register_contact(Shape, Shape, gjk_collide, supports_gjk)
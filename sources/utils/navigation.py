@@ -0,0 +1,383 @@
+"""
+タイルの衝突フラグから作る、横スクロールアクション用のナビゲーショングラフと経路探索。
+
+ノードは立てるタイル（真下が固体）と、はしごにつかまれるタイル（はしご自体とその真上）。
+辺は次の4種類で、グラフの作成時に求めておく:
+    MOVE_WALK  : 横に歩く（同じ床の上、または床とはしごの間）
+    MOVE_CLIMB : はしごを上下する
+    MOVE_FALL  : 床の端から隣の列へ降りて、下の床に着地する
+    MOVE_JUMP  : jump_up タイルまでの高さ・jump_across タイルまでの距離を跳ぶ
+
+同じ床の上の歩きは辺として持たず、探索時にジャンプポイント探索（JPS）の要領で
+床の上を直線に走査し、分岐（はしご・降り口・跳び口）のあるタイルと目的地にだけ止まる。
+途中のタイルはオープンリストに入らない。
+
+床1枚（横に続く立てるタイル）と、はしご1本（縦に続くつかまれるタイル）をそれぞれ
+1つの領域とし、経路は (出発の領域, 目的の領域) をキーにキャッシュする。
+領域内は直線で移動できるため、同じ領域の組なら出発点・目的地が違っても同じ経路を使える。
+タイルを書き換えたら invalidate() で、影響する範囲の辺と経路だけを作り直す。
+
+グラフはレベル全体を対象にし、1タイルあたり3バイトの配列を持つ。作成時にはすべてのタイルの
+flags() を読むため、ChunkedWorld を渡すとすべてのチャンクをその場で読み込む
+（max_chunks が小さいと読み込みと破棄を繰り返す）。チャンクで流し込むワールドには、
+元のタイルマップから作った TileCollisionMap を渡す。
+"""
+from __future__ import annotations
+import heapq
+from collections import OrderedDict
+from typing import Optional
+from .tile_collision import TileGrid, TILE_SOLID, TILE_LADDER
+
+MOVE_WALK = 0
+MOVE_CLIMB = 1
+MOVE_FALL = 2
+MOVE_JUMP = 3
+
+Cell = tuple[int, int]
+# 経路: (次に向かうタイル, そこへの移動の種類) の並び
+Path = list[tuple[Cell, int]]
+
+
+class NavGraph:
+    """タイルグリッドのナビゲーショングラフ。"""
+
+    def __init__(self, tiles: TileGrid, jump_up: int = 2, jump_across: int = 2, cache_size: int = 256):
+        """
+        tiles: 衝突フラグの問い合わせ先。レベル全体を読むため、ChunkedWorld ではなく
+               元のタイルマップの TileCollisionMap を渡す（モジュールの説明を参照）
+        jump_up, jump_across: ジャンプで届く高さ・距離（タイル数）
+        """
+        self.tiles = tiles
+        self.width = tiles.width
+        self.height = tiles.height
+        self.jump_up = jump_up
+        self.jump_across = jump_across
+        self.cache_size = cache_size
+
+        n = self.width * self.height
+        self._flags = bytearray(n)   # タイルの分類フラグの写し
+        self._walk = bytearray(n)    # 立てるか（真下が固体）
+        self._climb = bytearray(n)   # はしごにつかまれるか
+        # 歩き以外の辺（とはしごと床の間の歩き）: タイル -> [(行き先, コスト, 種類)]
+        # ここにあるタイルがジャンプポイントになる
+        self._edges: dict[Cell, list[tuple[Cell, float, int]]] = {}
+        self._regions: dict[Cell, tuple] = {}
+        # (出発の領域, 目的の領域) -> 領域の出口から目的の領域の入口までの経路（無ければ None）
+        self._paths: OrderedDict[tuple[tuple, tuple], Optional[Path]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.rebuild()
+
+    # --- グラフの作成 ---
+
+    def rebuild(self):
+        """グラフ全体を作り直す。"""
+        w, h = self.width, self.height
+        flags = self.tiles.flags
+        for y in range(h):
+            for x in range(w):
+                self._flags[y * w + x] = flags(x, y)
+        self._update_cells(0, 0, w, h)
+        self._edges.clear()
+        self._update_edges(0, 0, w, h)
+        self._regions.clear()
+        self._paths.clear()
+
+    def invalidate(self, tx: int, ty: int):
+        """
+        (tx, ty) のタイルが書き換えられたときに呼ぶ。
+        そのタイルに依存する辺と、そこを通る経路だけを作り直す。
+        書き換えで近道ができても、キャッシュ済みの（まだ通れる）経路はそのまま使う。
+        """
+        if not self._inside(tx, ty):
+            return
+        self._flags[ty * self.width + tx] = self.tiles.flags(tx, ty)
+        # 立てるか・つかまれるかは自分と真下のタイルで決まる
+        self._update_cells(tx, ty - 1, 1, 2)
+
+        # 歩き・はしごの辺は隣のタイルから、ジャンプの辺は下の床から、
+        # 降りる辺は隣の列の上の方から伸びてくる
+        rx = self.jump_across + 1
+        self._update_edges(tx - rx, ty - 2, 2 * rx + 1, self.jump_up + 5)
+        self._update_edges(tx - 1, 0, 3, ty + 2)
+
+        self._regions.clear()
+        for key, route in list(self._paths.items()):
+            if (route is None or self._region_touches(key[0], tx, ty)
+                    or self._region_touches(key[1], tx, ty) or self._route_touches(route, tx, ty)):
+                del self._paths[key]
+
+    @staticmethod
+    def _route_touches(route: Path, tx: int, ty: int) -> bool:
+        """
+        経路のどこかの移動が (tx, ty) に依存しうるか。
+        1つの移動が調べるタイルは、両端を囲む矩形を上下に1タイル広げた範囲に収まる。
+        """
+        for (a, _), (b, _) in zip(route, route[1:]):
+            if (min(a[0], b[0]) <= tx <= max(a[0], b[0])
+                    and min(a[1], b[1]) - 1 <= ty <= max(a[1], b[1]) + 1):
+                return True
+        return False
+
+    @staticmethod
+    def _region_touches(region: tuple, tx: int, ty: int) -> bool:
+        """書き換えで region が分かれたり伸びたりしうるか。"""
+        if region[0] == "s":
+            return region[1] in (ty - 1, ty)
+        return region[1] == tx
+
+    def _inside(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def _solid(self, x: int, y: int) -> bool:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return bool(self._flags[y * self.width + x] & TILE_SOLID)
+        return False
+
+    def walkable(self, x: int, y: int) -> bool:
+        """立てるタイルか（固体でなく、真下が固体）。"""
+        return 0 <= x < self.width and 0 <= y < self.height and bool(self._walk[y * self.width + x])
+
+    def climbable(self, x: int, y: int) -> bool:
+        """はしごにつかまれるタイルか（はしご、またははしごの真上）。"""
+        return 0 <= x < self.width and 0 <= y < self.height and bool(self._climb[y * self.width + x])
+
+    def is_node(self, x: int, y: int) -> bool:
+        return self.walkable(x, y) or self.climbable(x, y)
+
+    def _update_cells(self, x0: int, y0: int, w: int, h: int):
+        width = self.width
+        for y in range(max(y0, 0), min(y0 + h, self.height)):
+            for x in range(max(x0, 0), min(x0 + w, width)):
+                i = y * width + x
+                f = self._flags[i]
+                below = self._flags[i + width] if y + 1 < self.height else 0
+                open_ = not f & TILE_SOLID
+                self._walk[i] = open_ and bool(below & TILE_SOLID)
+                self._climb[i] = open_ and bool((f | below) & TILE_LADDER)
+
+    def _update_edges(self, x0: int, y0: int, w: int, h: int):
+        for y in range(max(y0, 0), min(y0 + h, self.height)):
+            for x in range(max(x0, 0), min(x0 + w, self.width)):
+                edges = self._cell_edges(x, y)
+                if edges:
+                    self._edges[(x, y)] = edges
+                else:
+                    self._edges.pop((x, y), None)
+
+    def _cell_edges(self, x: int, y: int) -> list[tuple[Cell, float, int]]:
+        """(x, y) から出る辺（床の上の歩きを除く）。"""
+        edges = []
+        walk = self.walkable(x, y)
+        climb = self.climbable(x, y)
+
+        if climb:
+            for dy in (-1, 1):
+                if self.climbable(x, y + dy):
+                    edges.append(((x, y + dy), 1.0, MOVE_CLIMB))
+        for d in (-1, 1):
+            nx = x + d
+            # はしごと床の間の乗り移り（床の上の歩きは探索時に走査する）
+            if (climb and self.is_node(nx, y)) or (walk and self.climbable(nx, y) and not self.walkable(nx, y)):
+                edges.append(((nx, y), 1.0, MOVE_WALK))
+
+        if not walk:
+            return edges
+
+        # 床の端から隣の列へ降りる
+        for d in (-1, 1):
+            nx = x + d
+            if not self._inside(nx, y) or self._solid(nx, y) or self.is_node(nx, y):
+                continue
+            floor = y + 1
+            while floor < self.height and not self._solid(nx, floor):
+                floor += 1
+            if floor < self.height:
+                edges.append(((nx, floor - 1), 1.0 + 0.5 * (floor - 1 - y), MOVE_FALL))
+
+        # ジャンプ（上の床、または穴の向こう）
+        for up in range(self.jump_up + 1):
+            for d in range(-self.jump_across, self.jump_across + 1):
+                if d == 0 or (up == 0 and abs(d) == 1):
+                    continue
+                if self._can_jump(x, y, d, up):
+                    edges.append(((x + d, y - up), abs(d) + up + 1.0, MOVE_JUMP))
+        return edges
+
+    def _can_jump(self, x: int, y: int, d: int, up: int) -> bool:
+        tx, ty = x + d, y - up
+        if not self.walkable(tx, ty):
+            return False
+        step = 1 if d > 0 else -1
+        if up == 0:
+            # 歩いて行ける所へは跳ばない
+            if all(self.walkable(cx, y) for cx in range(x + step, tx, step)):
+                return False
+        # 真上に頂点の行まで上がり、その行を横切って、目的の列を降りる
+        peak = y - max(up, 1)
+        if peak < 0:
+            return False
+        for cy in range(peak, y):
+            if self._solid(x, cy):
+                return False
+        for cx in range(x, tx + step, step):
+            if self._solid(cx, peak):
+                return False
+        for cy in range(peak, ty + 1):
+            if self._solid(tx, cy):
+                return False
+        return True
+
+    # --- 領域 ---
+
+    def region(self, x: int, y: int) -> Optional[tuple]:
+        """
+        (x, y) の属する領域。床は ("s", 行, 左端の列)、はしごは ("l", 列, 上端の行)。
+        ノードでなければ None。
+        """
+        key = (x, y)
+        region = self._regions.get(key)
+        if region is not None:
+            return region
+        if self.walkable(x, y):
+            x0 = x
+            while self.walkable(x0 - 1, y):
+                x0 -= 1
+            region = ("s", y, x0)
+        elif self.climbable(x, y):
+            y0 = y
+            while self.climbable(x, y0 - 1) and not self.walkable(x, y0 - 1):
+                y0 -= 1
+            region = ("l", x, y0)
+        else:
+            return None
+        self._regions[key] = region
+        return region
+
+    def ground(self, x: int, y: int) -> Optional[Cell]:
+        """(x, y) から真下に落ちて最初に着くノード。空中にいる相手を目的地にするときに使う。"""
+        while self._inside(x, y) and not self._solid(x, y):
+            if self.is_node(x, y):
+                return (x, y)
+            y += 1
+        return None
+
+    # --- 経路探索 ---
+
+    def _jump(self, x: int, y: int, d: int, goal: Cell) -> Optional[Cell]:
+        """床の上を d 方向へ走査し、最初のジャンプポイントか目的地を返す（行き止まりなら None）。"""
+        edges = self._edges
+        while True:
+            x += d
+            if not self.walkable(x, y):
+                return None
+            cell = (x, y)
+            if cell == goal or cell in edges:
+                return cell
+
+    def _search(self, start: Cell, goal: Cell) -> Optional[Path]:
+        """A*（床の上はジャンプポイントだけを展開する）。"""
+        gx, gy = goal
+
+        def heuristic(c: Cell) -> float:
+            # 横は1タイル1、縦は降りるのが1タイル0.5で最も安い
+            return abs(c[0] - gx) + 0.5 * abs(c[1] - gy)
+
+        open_list = [(heuristic(start), 0, start)]
+        came: dict[Cell, tuple[Optional[Cell], int]] = {start: (None, MOVE_WALK)}
+        cost = {start: 0.0}
+        counter = 1
+        while open_list:
+            _, _, cell = heapq.heappop(open_list)
+            if cell == goal:
+                path = []
+                while cell != start:
+                    prev, kind = came[cell]
+                    path.append((cell, kind))
+                    cell = prev
+                path.reverse()
+                return path
+
+            base = cost[cell]
+            neighbours = list(self._edges.get(cell, ()))
+            if self.walkable(*cell):
+                for d in (-1, 1):
+                    j = self._jump(cell[0], cell[1], d, goal)
+                    if j is not None:
+                        neighbours.append((j, float(abs(j[0] - cell[0])), MOVE_WALK))
+            for nxt, step, kind in neighbours:
+                new_cost = base + step
+                if new_cost < cost.get(nxt, float("inf")):
+                    cost[nxt] = new_cost
+                    came[nxt] = (cell, kind)
+                    heapq.heappush(open_list, (new_cost + heuristic(nxt), counter, nxt))
+                    counter += 1
+        return None
+
+    def find_path(self, start: Cell, goal: Cell) -> Optional[Path]:
+        """
+        start から goal への経路を (タイル, 移動の種類) の並びで返す（start は含まない）。
+        どちらも空中ならその真下のノードに置き換える。たどり着けなければ None。
+        """
+        start_node = self.ground(*start)
+        goal_node = self.ground(*goal)
+        if start_node is None or goal_node is None:
+            return None
+        start, goal = start_node, goal_node
+        rs = self.region(*start)
+        rg = self.region(*goal)
+        if rs is None or rg is None:
+            return None
+        if rs == rg:
+            return [] if start == goal else [(goal, self._straight(rs))]
+
+        key = (rs, rg)
+        if key in self._paths:
+            self._paths.move_to_end(key)
+            self.hits += 1
+            route = self._paths[key]
+        else:
+            self.misses += 1
+            route = self._route(self._search(start, goal), start, rs, rg)
+            self._paths[key] = route
+            if len(self._paths) > self.cache_size:
+                self._paths.popitem(last=False)
+        if route is None:
+            return None
+
+        # 出発の領域の中を出口まで直線で動き、目的の領域の入口から目的地まで直線で動く
+        path: Path = []
+        exit_cell = route[0][0]
+        if exit_cell != start:
+            path.append((exit_cell, self._straight(rs)))
+        path.extend(route[1:])
+        if not path or path[-1][0] != goal:
+            path.append((goal, self._straight(rg)))
+        return path
+
+    def _route(self, path: Optional[Path], start: Cell, rs: tuple, rg: tuple) -> Optional[Path]:
+        """
+        探索結果を、出発の領域の最後のタイル（出口）から目的の領域の最初のタイル（入口）までに切り詰める。
+        先頭は出口（種類は使わない）。
+        """
+        if path is None:
+            return None
+        cells = [(start, MOVE_WALK)] + path
+        first = 0
+        while first + 1 < len(cells) and self.region(*cells[first + 1][0]) == rs:
+            first += 1
+        last = len(cells) - 1
+        while last - 1 > first and self.region(*cells[last - 1][0]) == rg:
+            last -= 1
+        return cells[first:last + 1]
+
+    @staticmethod
+    def _straight(region: tuple) -> int:
+        """領域の中を直線で動くときの移動の種類。"""
+        return MOVE_WALK if region[0] == "s" else MOVE_CLIMB
+
+    def clear_cache(self):
+        """経路のキャッシュを空にする。"""
+        self._paths.clear()
+        self.hits = 0
+        self.misses = 0
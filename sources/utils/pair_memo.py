@@ -0,0 +1,70 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .shape import Shape
+
+# メモに無いことを表す値（結果の None と区別する）
+MISSING = object()
+
+
+class PairMemo:
+    """
+    図形の組ごとの判定結果を、両方のトランスフォームのバージョンと一緒に保持する
+    サイズ上限付きのLRUキャッシュ。
+    どちらの図形も動いていなければ前回の結果をそのまま返すため、
+    静止した図形同士や、止まっている間の組を毎フレーム判定し直さずに済む。
+
+    キーは (a の id, b の id, 種類) で、intersects() の結果と collide() の結果を別々に持つ。
+    エントリは図形への参照を持つため、メモに残っている間は id が再利用されない。
+    collide() の結果の Contact は共有されるので、呼び出し側で変更しないこと。
+    """
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        # (id(a), id(b), 種類) -> (a, b, aのバージョン, bのバージョン, 結果)
+        self._entries: OrderedDict[tuple[int, int, int], tuple] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, a: Shape, b: Shape, kind: int) -> object:
+        """
+        どちらも動いていなければ前回の結果を返す。無いか古ければ MISSING を返す。
+        kind は結果の種類（0: intersects, 1: collide）。
+        """
+        key = (id(a), id(b), kind)
+        entry = self._entries.get(key)
+        if entry is None or entry[2] != a.version or entry[3] != b.version:
+            self.misses += 1
+            return MISSING
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[4]
+
+    def put(self, a: Shape, b: Shape, kind: int, result: object):
+        """現在のバージョンで結果を記録する。"""
+        key = (id(a), id(b), kind)
+        self._entries[key] = (a, b, a.version, b.version, result)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        """これまでの問い合わせのうちメモから答えられた割合。"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset_stats(self):
+        """ヒット数・ミス数を0に戻す。"""
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        """メモを空にする。"""
+        self._entries.clear()
+        self.reset_stats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -2,232 +2,877 @@ from __future__ import annotations
 import pyxel
 import math
 from .vector2 import Vector2
+from .vector2_array import Vector2Array
 from .shape import Shape
+from .rotation_cache import rotation_cache, trig_table, quantize_angle
+from .polygon_template import PolygonTemplate, edge_normals
+from .spatial_hash import aabb_overlap
+from .axis_cache import SeparatingAxisCache
+from . import collision
+from . import gjk
 from . import geometry  # 循環参照を安全に処理するためのローカルインポート
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Callable, Optional, Sequence
 if TYPE_CHECKING:
     from .geometry import Circle, Capsule
 
+
+# 2つのポリゴンの頂点数の合計がこれ以上なら交差判定に GJK を使う
+_GJK_MIN_VERTICES = 12
+
+# これ以下のめり込みは接しているだけとみなす（凹ポリゴンの押し出し距離の計算で使う）
+_SEPARATION_SLOP = 1e-9
+
+# 凸な部分同士の接触情報を求める関数（Polygon._collide_circle など）と、
+# 相手を (ox, oy) ずらした位置での最小のめり込みを求める関数（Polygon._sat_circle など）
+PieceContact = Callable[["Polygon", Any], Optional[collision.Contact]]
+PieceSat = Callable[["Polygon", Any, float, float], Optional[tuple[float, float, float]]]
+
+
+class _RotatedTemplate:
+    """量子化した1つの回転角での、回転済みローカル頂点と法線。"""
+
+    __slots__ = ("xs", "ys", "normals", "unique_normals")
+
+    def __init__(self, template: PolygonTemplate, cos: float, sin: float):
+        self.xs = [v.x * cos - v.y * sin for v in template.vertices]
+        self.ys = [v.x * sin + v.y * cos for v in template.vertices]
+        self.normals = [Vector2(n.x * cos - n.y * sin, n.x * sin + n.y * cos) for n in template.normals]
+        self.unique_normals = [Vector2(n.x * cos - n.y * sin, n.x * sin + n.y * cos) for n in template.unique_normals]
+
+
 class Polygon(Shape):
     """
     複数の頂点を持つ2Dポリゴンを表すクラス。
     ローカル頂点を管理し、トランスフォーム（スケール、回転、移動）を適用して
     ワールド座標を計算する。
+
+    angle_steps を指定すると回転角を 1回転 angle_steps 段階に量子化し、
+    各段階の回転済み頂点・法線を共有キャッシュから引く（一様スケール時のみ）。
+    常に回転し続ける図形で、毎フレームの三角関数と頂点回転を省ける。
+
+    形状データ（ローカル頂点・法線・三角形分割）は PolygonTemplate に保持し、
+    ファクトリで作った同じ形状のポリゴン同士で共有する。
+
+    axis_cache に SeparatingAxisCache を設定すると、SAT は図形の組ごとに前回の
+    分離軸を覚えておき、次の判定で最初にその軸を調べる（None なら無効）。
     """
 
-    def __init__(self, vertices: list[Vector2], x: float = 0, y: float = 0):
-        # ローカル座標（図形の中心/原点からの相対座標）
-        self.local_vertices: list[Vector2] = vertices
-        
-        # ワールド状態
-        self.position: Vector2 = Vector2(x, y)
-        self.rotation: float = 0.0  # 度単位
-        self.scale: Vector2 = Vector2(1.0, 1.0)
+    axis_cache: Optional[SeparatingAxisCache] = None
 
-    def get_transformed_vertices(self) -> list[Vector2]:
-        """
-        現在のスケール、回転、位置でトランスフォームされた頂点リストを返す。
-        適用順序: スケール → 回転 → 移動
-        """
-        # 回転の三角関数を事前計算
-        rad = math.radians(self.rotation)
-        cos_theta = math.cos(rad)
-        sin_theta = math.sin(rad)
+    def __init__(self, vertices: Sequence[Vector2] | PolygonTemplate, x: float = 0, y: float = 0,
+                 angle_steps: Optional[int] = None):
+        super().__init__(x, y)
 
-        world_vertices = []
+        # 形状テンプレート（ローカル座標は図形の中心/原点からの相対座標）
+        if not isinstance(vertices, PolygonTemplate):
+            vertices = PolygonTemplate(vertices)
+        self._template: PolygonTemplate = vertices
 
-        for v in self.local_vertices:
-            # 1. スケール
-            sx = v.x * self.scale.x
-            sy = v.y * self.scale.y
+        # ワールド座標のキャッシュ（トランスフォーム変更時のみ再計算）
+        self._world_vertices: list[Vector2] = []
+        self._world_axes: list[Vector2] = []
+        self._world_unique_axes: list[Vector2] = []
+        self._vertex_array: Vector2Array = Vector2Array()
+        self._vertices_dirty: bool = True
+        self._array_dirty: bool = True
+        self._axes_dirty: bool = True
+        self._unique_axes_dirty: bool = True
 
-            # 2. 回転
-            # x' = x*cos - y*sin
-            # y' = x*sin + y*cos
-            rx = sx * cos_theta - sy * sin_theta
-            ry = sx * sin_theta + sy * cos_theta
+        self._circle_axis: Vector2 = Vector2(0, 0)  # 円・線分判定用の作業ベクトル
 
-            # 3. 移動（位置を加算）
-            wx = rx + self.position.x
-            wy = ry + self.position.y
+        # ローカル空間の辺法線キャッシュ（ローカル頂点/スケール変更時のみ再計算）
+        self._local_normals: list[tuple[float, float]] = []
+        self._local_unique_normals: list[tuple[float, float]] = []
+        self._normals_dirty: bool = True
+        self._normals_scale: tuple[float, float] = (1.0, 1.0)
 
-            world_vertices.append(Vector2(wx, wy))
+        # 凹ポリゴンの凸分割（部分ごとのポリゴン。トランスフォームは自身と同じ）
+        self._pieces: list[Polygon] = []
+        self._pieces_template: Optional[PolygonTemplate] = None
+        self._pieces_version: int = -1
 
-        return world_vertices
+        # 量子化回転モード
+        self._angle_steps: Optional[int] = None
+        self._table_bucket: int = -1
+        self._table_entry: Optional[_RotatedTemplate] = None
+        if angle_steps is not None:
+            self.set_angle_steps(angle_steps)
 
-    def translate(self, dx: float, dy: float):
-        """ポリゴンを移動する。"""
-        self.position += Vector2(dx, dy)
+    # --- トランスフォーム状態 ---
 
-    def rotate(self, angle: float):
-        """ポリゴンを指定した角度（度単位）で回転する。"""
-        self.rotation += angle
+    @property
+    def template(self) -> PolygonTemplate:
+        """共有の形状テンプレート。"""
+        return self._template
 
-    def set_scale(self, sx: float, sy: float):
-        """ポリゴンのスケールを設定する。"""
-        self.scale = Vector2(sx, sy)
+    @property
+    def local_vertices(self) -> Sequence[Vector2]:
+        """ローカル頂点（テンプレートと共有しているため変更しないこと）。"""
+        return self._template.vertices
+
+    @local_vertices.setter
+    def local_vertices(self, vertices: Sequence[Vector2]):
+        self._template = PolygonTemplate(vertices)
+        self._normals_dirty = True
+        self._table_entry = None
+        self.mark_dirty()
+
+    @property
+    def angle_steps(self) -> Optional[int]:
+        return self._angle_steps
+
+    def set_angle_steps(self, steps: Optional[int]):
+        """
+        回転角の量子化段階数を設定する（例: 256, 1024）。None で無効化。
+        """
+        if steps is not None and steps <= 0:
+            raise ValueError("angle_steps は正の整数である必要があります。")
+        self._angle_steps = steps
+        self._table_entry = None
+        self.mark_dirty()
+
+    def rotation_cs(self) -> tuple[float, float]:
+        """量子化モードでは段階に丸めた角度の (cos, sin) を表から返す。"""
+        steps = self._angle_steps
+        if steps is None:
+            return super().rotation_cs()
+        cos_table, sin_table = trig_table(steps)
+        bucket = quantize_angle(self._rotation, steps)
+        return cos_table[bucket], sin_table[bucket]
+
+    def _uses_rotation_table(self) -> bool:
+        """回転テーブルを使えるか（量子化モードかつ正の一様スケール）。"""
+        return self._angle_steps is not None and self._scale.x == self._scale.y and self._scale.x > 0
+
+    def _rotated_template(self) -> _RotatedTemplate:
+        """現在の回転段階に対応する回転済みローカル頂点・法線を返す。"""
+        steps = self._angle_steps
+        assert steps is not None
+        bucket = quantize_angle(self._rotation, steps)
+        entry = self._table_entry
+        if entry is None or bucket != self._table_bucket:
+            template = self._template
+            entry = rotation_cache.get(template, steps, bucket,
+                                       lambda cos, sin: _RotatedTemplate(template, cos, sin))
+            self._table_entry = entry
+            self._table_bucket = bucket
+        return entry
+
+    def mark_dirty(self):
+        """
+        ワールド座標のキャッシュを無効化し、バージョンを進める。
+        position などを直接書き換えた場合に呼び出す。
+        """
+        super().mark_dirty()
+        self._vertices_dirty = True
+        self._array_dirty = True
+        self._axes_dirty = True
+        self._unique_axes_dirty = True
+
+    def get_transformed_vertices(self) -> list[Vector2]:
+        """
+        現在のスケール、回転、位置でトランスフォームされた頂点リストを返す。
+        適用順序: スケール → 回転 → 移動（Shape.transform を参照）
+        結果はキャッシュされるため、呼び出し側で変更しないこと。
+        """
+        if not self._vertices_dirty:
+            return self._world_vertices
+
+        if self._uses_rotation_table():
+            # 回転テーブル: 回転済み頂点をスケールして平行移動するだけ
+            entry = self._rotated_template()
+            out = self._world_vertices
+            if len(out) != len(entry.xs):
+                out = [Vector2(0, 0) for _ in entry.xs]
+            s = self._scale.x
+            px, py = self._position.x, self._position.y
+            for v, x, y in zip(out, entry.xs, entry.ys):
+                v.set(px + x * s, py + y * s)
+            self._world_vertices = out
+        else:
+            # 頂点数が変わらない限り、前回のバッファを再利用する
+            self._world_vertices = self.transform.apply_batch(self._template.vertices, self._world_vertices)
+        self._vertices_dirty = False
+        return self._world_vertices
+
+    def get_vertex_array(self) -> Vector2Array:
+        """
+        トランスフォーム済みの頂点を Vector2Array として返す。
+        頂点をまとめて演算する用途に使う。結果はキャッシュされ、頂点数が変わらない限り同じ配列に書き込む。
+        """
+        if self._array_dirty:
+            verts = self.get_transformed_vertices()
+            out = self._vertex_array
+            if len(out) == len(verts):
+                for i, v in enumerate(verts):
+                    out.set_item(i, v.x, v.y)
+            else:
+                out.set_from(Vector2Array.from_vectors(verts))
+            self._array_dirty = False
+        return self._vertex_array
 
     @classmethod
     def create_rect(cls, width: float, height: float, x: float = 0, y: float = 0) -> Polygon:
         """(x, y)を中心とした矩形を作成する。"""
-        hw = width / 2
-        hh = height / 2
-        vertices = [
-            Vector2(-hw, -hh), Vector2(hw, -hh),
-            Vector2(hw, hh), Vector2(-hw, hh)
-        ]
-        return cls(vertices, x, y)
+        return cls(PolygonTemplate.rect(width, height), x, y)
 
     @classmethod
     def create_regular_polygon(cls, sides: int, radius: float, x: float = 0, y: float = 0, angle_offset: float = -90) -> Polygon:
         """正多角形を作成する。"""
-        if sides < 3:
-            raise ValueError("ポリゴンは少なくとも3辺必要です。")
-        vertices = []
-        angle_step = 360 / sides
-        for i in range(sides):
-            deg = angle_offset + i * angle_step
-            rad = math.radians(deg)
-            vx = radius * math.cos(rad)
-            vy = radius * math.sin(rad)
-            vertices.append(Vector2(vx, vy))
-        return cls(vertices, x, y)
+        return cls(PolygonTemplate.regular_polygon(sides, radius, angle_offset), x, y)
 
     @classmethod
     def create_star(cls, points: int, outer_radius: float, inner_radius: float, x: float = 0, y: float = 0) -> Polygon:
         """星形を作成する。"""
-        vertices = []
-        angle_step = 180 / points
-        angle_offset = -90
-        for i in range(points * 2):
-            deg = angle_offset + i * angle_step
-            rad = math.radians(deg)
-            radius = outer_radius if i % 2 == 0 else inner_radius
-            vx = radius * math.cos(rad)
-            vy = radius * math.sin(rad)
-            vertices.append(Vector2(vx, vy))
-        return cls(vertices, x, y)
+        return cls(PolygonTemplate.star(points, outer_radius, inner_radius), x, y)
 
     @classmethod
     def create_heart(cls, scale: float = 1.0, x: float = 0, y: float = 0) -> Polygon:
         """ハート形を作成する。"""
-        vertices = [
-            Vector2(0, -0.25), Vector2(0.3, -0.6), Vector2(0.7, -0.6),
-            Vector2(0.9, -0.3), Vector2(0.9, 0.1), Vector2(0, 0.8),
-            Vector2(-0.9, 0.1), Vector2(-0.9, -0.3), Vector2(-0.7, -0.6),
-           Vector2(-0.3, -0.6)
-        ]
-        vertices = [v * scale * 10 for v in vertices]
-        return cls(vertices, x, y)
+        return cls(PolygonTemplate.heart(scale), x, y)
 
     @classmethod
     def create_arrow(cls, length: float, head_size: float, shaft_width: float, x: float = 0, y: float = 0) -> Polygon:
         """上向きの矢印を作成する。"""
-        hw, sw, l = head_size / 2, shaft_width / 2, length / 2
-        vertices = [
-            Vector2(0, -l - hw), Vector2(hw, -l + hw), Vector2(sw, -l + hw),
-            Vector2(sw, l), Vector2(-sw, l), Vector2(-sw, -l + hw), Vector2(-hw, -l + hw)
-        ]
-        return cls(vertices, x, y)
+        return cls(PolygonTemplate.arrow(length, head_size, shaft_width), x, y)
 
     def draw(self, col: int, fill: bool = False):
         """ポリゴンを描画する。"""
         verts = self.get_transformed_vertices()
-        center = self.position
         if fill:
-            for i in range(len(verts)):
-                p1 = verts[i]
-                p2 = verts[(i + 1) % len(verts)]
-                pyxel.tri(center.x, center.y, p1.x, p1.y, p2.x, p2.y, col)
+            # テンプレートの三角形分割を使う（凹形状も正しく塗れる）
+            for i1, i2, i3 in self._template.triangles:
+                p1, p2, p3 = verts[i1], verts[i2], verts[i3]
+                pyxel.tri(p1.x, p1.y, p2.x, p2.y, p3.x, p3.y, col)
         else:
             for i in range(len(verts)):
                 p1 = verts[i]
                 p2 = verts[(i + 1) % len(verts)]
                 pyxel.line(p1.x, p1.y, p2.x, p2.y, col)
 
-    def intersects(self, other: Shape) -> bool:
-        if isinstance(other, Polygon):
-            return self._intersects_polygon(other)
-        elif isinstance(other, geometry.Circle):
-            return self._intersects_circle(other)
-        elif isinstance(other, geometry.Capsule):
-            return self._intersects_capsule(other)
-        return False
+    def convex_pieces(self) -> list[Polygon]:
+        """
+        凸分割した部分ポリゴンを現在のトランスフォームで返す（凸ポリゴンなら自身だけ）。
+        部分はテンプレートの分割を共有し、トランスフォームが変わったときだけ同期する。
+        """
+        template = self._template
+        if template.is_convex:
+            return [self]
+        if self._pieces_template is not template:
+            self._pieces = [Polygon(piece) for piece in template.pieces]
+            self._pieces_template = template
+            self._pieces_version = -1
+        if self._pieces_version != self.version:
+            # 部分の頂点は自身の頂点の一部なので、変換済みの頂点をそのまま使う
+            verts = self.get_transformed_vertices()
+            cos, sin = self.rotation_cs()
+            px, py = self._position.x, self._position.y
+            sx, sy = self._scale.x, self._scale.y
+            for piece, indices in zip(self._pieces, template.piece_indices):
+                piece._position.set(px, py)
+                piece._rotation = self._rotation
+                piece._scale.set(sx, sy)
+                if piece._angle_steps != self._angle_steps:
+                    piece._angle_steps = self._angle_steps
+                    piece._table_entry = None
+                piece.mark_dirty()
+                piece._cached_rotation = self._rotation
+                piece._cos, piece._sin = cos, sin
+                piece._world_vertices = [verts[i] for i in indices]
+                piece._vertices_dirty = False
+            self._pieces_version = self.version
+        return self._pieces
 
-    def _intersects_polygon(self, other: Polygon) -> bool:
-        """SATを使用してポリゴン同士の交差を判定する。"""
-        axes = self.get_axes() + other.get_axes()
-        for axis in axes:
-            min1, max1 = self.project(axis)
-            min2, max2 = other.project(axis)
-            if max1 < min2 or max2 < min1:
-                return False
-        return True
+    def _pieces_near(self, box: tuple[float, float, float, float]) -> list[Polygon]:
+        """境界ボックスが box と重なる凸な部分を返す（凸ポリゴンなら自身だけ）。"""
+        if self._template.is_convex:
+            return [self]
+        return [piece for piece in self.convex_pieces() if aabb_overlap(piece.aabb(), box)]
 
-    def _intersects_circle(self, other: geometry.Circle) -> bool:
-        """SATを使用して円との交差を判定する。"""
+    def support_core(self, dx: float, dy: float) -> tuple[float, float]:
+        """(dx, dy) 方向に最も遠い頂点。凹ポリゴンでは凸包のサポート点になる。"""
         verts = self.get_transformed_vertices()
-        center = other.center
+        best = verts[0]
+        best_dot = best.x * dx + best.y * dy
+        for v in verts:
+            d = v.x * dx + v.y * dy
+            if d > best_dot:
+                best, best_dot = v, d
+        return best.x, best.y
+
+    def _compute_aabb(self) -> tuple[float, float, float, float]:
+        verts = self.get_transformed_vertices()
+        xs = [v.x for v in verts]
+        ys = [v.y for v in verts]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def _compute_bounding_radius(self) -> float:
+        return self._template.bounding_radius * max(abs(self._scale.x), abs(self._scale.y))
+
+    def _sat_polygon(self, other: Polygon, ox: float = 0.0, oy: float = 0.0) -> Optional[tuple[float, float, float]]:
+        """
+        SATでポリゴン同士を判定し、重なっていれば最小のめり込み (深さ, 法線x, 法線y) を返す。
+        法線は self から other へ向かう。
+        (ox, oy) を渡すと other をその分ずらした位置で判定する（other 自体は動かさない）。
+        """
+        cache = Polygon.axis_cache if ox == 0.0 and oy == 0.0 else None
+        if cache is not None and cache.separated(self, other):
+            return None
+        best_depth = math.inf
+        best_x = best_y = 0.0
+        for axes in (self.get_axes(unique=True), other.get_axes(unique=True)):
+            for axis in axes:
+                min1, max1 = self.project(axis)
+                min2, max2 = other.project(axis)
+                shift = ox * axis.x + oy * axis.y
+                min2 += shift
+                max2 += shift
+                if max1 < min2 or max2 < min1:
+                    if cache is not None:
+                        cache.store(self, other, axis.x, axis.y)
+                    return None
+                forward = max1 - min2   # other を +axis 方向へ押し出す量
+                backward = max2 - min1  # other を -axis 方向へ押し出す量
+                if forward < best_depth:
+                    best_depth, best_x, best_y = forward, axis.x, axis.y
+                if backward < best_depth:
+                    best_depth, best_x, best_y = backward, -axis.x, -axis.y
+        return best_depth, best_x, best_y
+
+    def _sat_circle(self, other: geometry.Circle, ox: float = 0.0, oy: float = 0.0) -> Optional[tuple[float, float, float]]:
+        """
+        SATで円との交差を判定し、重なっていれば最小のめり込み (深さ, 法線x, 法線y) を返す。
+        法線はポリゴンから円へ向かう。(ox, oy) は _sat_polygon() と同じ。
+        """
+        cache = Polygon.axis_cache if ox == 0.0 and oy == 0.0 else None
+        if cache is not None and cache.separated(self, other):
+            return None
+        verts = self.get_transformed_vertices()
+        cx, cy = other.center.x + ox, other.center.y + oy
+        radius = other.radius
         
+        # 円の中心に最も近い頂点（距離の2乗で比較し、一時ベクトルを作らない）
         closest_vertex = verts[0]
-        min_dist = (center - verts[0]).magnitude()
+        min_dist_sq = (cx - verts[0].x)**2 + (cy - verts[0].y)**2
         for v in verts:
-            dist = (center - v).magnitude()
-            if dist < min_dist:
-                min_dist = dist
+            dist_sq = (cx - v.x)**2 + (cy - v.y)**2
+            if dist_sq < min_dist_sq:
+                min_dist_sq = dist_sq
                 closest_vertex = v
-        
-        axes = self.get_axes()
-        if min_dist > 0:
-             axes.append((center - closest_vertex).normalized())
 
-        for axis in axes:
+        best_depth = math.inf
+        best_x = best_y = 0.0
+        for axis in self.get_axes(unique=True):
             min1, max1 = self.project(axis)
-            center_proj = center.dot(axis)
-            min2, max2 = center_proj - other.radius, center_proj + other.radius
-            if max1 < min2 or max2 < min1:
-                return False
-        return True
+            center_proj = cx * axis.x + cy * axis.y
+            if max1 < center_proj - radius or center_proj + radius < min1:
+                if cache is not None:
+                    cache.store(self, other, axis.x, axis.y)
+                return None
+            forward = max1 - (center_proj - radius)
+            backward = (center_proj + radius) - min1
+            if forward < best_depth:
+                best_depth, best_x, best_y = forward, axis.x, axis.y
+            if backward < best_depth:
+                best_depth, best_x, best_y = backward, -axis.x, -axis.y
 
-    def _intersects_capsule(self, other: geometry.Capsule) -> bool:
-        """カプセルとの交差を判定する。"""
-        # 端点をチェック
-        if self._intersects_circle(geometry.Circle(other.start.x, other.start.y, other.radius)): return True
-        if self._intersects_circle(geometry.Circle(other.end.x, other.end.y, other.radius)): return True
-            
-        # ボディ部分の近似判定（簡略化したSAT）
-        axes = self.get_axes()
-        cap_dir = other.get_direction()
-        if cap_dir.x != 0 or cap_dir.y != 0:
-            axes.append(Vector2(-cap_dir.y, cap_dir.x).normalized())
-            
-        for axis in axes:
+        # 最近頂点から円の中心への軸
+        if min_dist_sq > 0:
+            min_dist = math.sqrt(min_dist_sq)
+            axis = self._circle_axis.set((cx - closest_vertex.x) / min_dist, (cy - closest_vertex.y) / min_dist)
+            min1, max1 = self.project(axis)
+            center_proj = cx * axis.x + cy * axis.y
+            if max1 < center_proj - radius or center_proj + radius < min1:
+                if cache is not None:
+                    cache.store(self, other, axis.x, axis.y)
+                return None
+            forward = max1 - (center_proj - radius)
+            if forward < best_depth:
+                best_depth, best_x, best_y = forward, axis.x, axis.y
+        return best_depth, best_x, best_y
+
+    def _sat_line(self, other: geometry.Line, ox: float = 0.0, oy: float = 0.0) -> Optional[tuple[float, float, float]]:
+        """
+        SATで線分との交差を判定し、重なっていれば最小のめり込み (深さ, 法線x, 法線y) を返す。
+        法線はポリゴンから線分へ向かう。(ox, oy) は _sat_polygon() と同じ。
+        """
+        cache = Polygon.axis_cache if ox == 0.0 and oy == 0.0 else None
+        if cache is not None and cache.separated(self, other):
+            return None
+        sx, sy = other.start.x + ox, other.start.y + oy
+        ex, ey = other.end.x + ox, other.end.y + oy
+        dir_x = ex - sx
+        dir_y = ey - sy
+        best_depth = math.inf
+        best_x = best_y = 0.0
+        for axis in self.get_axes(unique=True):
+            min_p, max_p = self.project(axis)
+            p_start = sx * axis.x + sy * axis.y
+            p_end = ex * axis.x + ey * axis.y
+            min_l, max_l = min(p_start, p_end), max(p_start, p_end)
+            if max_p < min_l or max_l < min_p:
+                if cache is not None:
+                    cache.store(self, other, axis.x, axis.y)
+                return None
+            if max_p - min_l < best_depth:
+                best_depth, best_x, best_y = max_p - min_l, axis.x, axis.y
+            if max_l - min_p < best_depth:
+                best_depth, best_x, best_y = max_l - min_p, -axis.x, -axis.y
+
+        # 線分の法線軸（線分はこの軸上で1点に潰れる）
+        if dir_x != 0 or dir_y != 0:
+            length = math.hypot(dir_x, dir_y)
+            axis = self._circle_axis.set(-dir_y / length, dir_x / length)
             min_p, max_p = self.project(axis)
-            p_start, p_end = other.start.dot(axis), other.end.dot(axis)
-            min_c, max_c = min(p_start, p_end) - other.radius, max(p_start, p_end) + other.radius
+            p_line = sx * axis.x + sy * axis.y
+            if max_p < p_line or p_line < min_p:
+                if cache is not None:
+                    cache.store(self, other, axis.x, axis.y)
+                return None
+            if max_p - p_line < best_depth:
+                best_depth, best_x, best_y = max_p - p_line, axis.x, axis.y
+            if p_line - min_p < best_depth:
+                best_depth, best_x, best_y = p_line - min_p, -axis.x, -axis.y
+        return best_depth, best_x, best_y
+
+    def _sat_capsule(self, other: geometry.Capsule, ox: float = 0.0, oy: float = 0.0) -> Optional[tuple[float, float, float]]:
+        """
+        SATでカプセルとの交差を判定し、重なっていれば最小のめり込み (深さ, 法線x, 法線y) を返す。
+        軸はポリゴンの辺法線、カプセルの芯の法線、各端点から最も近い頂点への方向。
+        法線はポリゴンからカプセルへ向かう。(ox, oy) は _sat_polygon() と同じ。
+        """
+        cache = Polygon.axis_cache if ox == 0.0 and oy == 0.0 else None
+        if cache is not None and cache.separated(self, other):
+            return None
+        return self._sat_capsule_axes(other, cache, ox, oy)
+
+    def _sat_capsule_axes(self, other: geometry.Capsule, cache: Optional[SeparatingAxisCache],
+                          ox: float = 0.0, oy: float = 0.0) -> Optional[tuple[float, float, float]]:
+        """_sat_capsule() の本体（キャッシュの確認を除く）。分離軸が見つかれば cache に記録する。"""
+        verts = self.get_transformed_vertices()
+        sx, sy = other.start.x + ox, other.start.y + oy
+        ex, ey = other.end.x + ox, other.end.y + oy
+        radius = other.radius
+
+        axes: list[tuple[float, float]] = [(a.x, a.y) for a in self.get_axes(unique=True)]
+        dir_x = ex - sx
+        dir_y = ey - sy
+        if dir_x != 0 or dir_y != 0:
+            length = math.hypot(dir_x, dir_y)
+            axes.append((-dir_y / length, dir_x / length))
+        for px, py in ((sx, sy), (ex, ey)):
+            closest = min(verts, key=lambda v: (px - v.x)**2 + (py - v.y)**2)
+            dx, dy = px - closest.x, py - closest.y
+            dist = math.hypot(dx, dy)
+            if dist > 0:
+                axes.append((dx / dist, dy / dist))
+
+        best_depth = math.inf
+        best_x = best_y = 0.0
+        axis = self._circle_axis
+        for ax, ay in axes:
+            axis.set(ax, ay)
+            min_p, max_p = self.project(axis)
+            p_start = sx * ax + sy * ay
+            p_end = ex * ax + ey * ay
+            min_c = min(p_start, p_end) - radius
+            max_c = max(p_start, p_end) + radius
             if max_p < min_c or max_c < min_p:
-                return False
-        return True
+                if cache is not None:
+                    cache.store(self, other, ax, ay)
+                return None
+            if max_p - min_c < best_depth:
+                best_depth, best_x, best_y = max_p - min_c, ax, ay
+            if max_c - min_p < best_depth:
+                best_depth, best_x, best_y = max_c - min_p, -ax, -ay
+        return best_depth, best_x, best_y
+
+    def _intersects_polygon(self, other: Polygon) -> bool:
+        """
+        ポリゴン同士の交差を判定する。凹ポリゴンは凸な部分ごとに判定する。
+        SATは頂点数の積に比例するため、頂点が多い組は GJK（頂点数の和に比例）で判定する。
+        """
+        for a in self._pieces_near(other.aabb()):
+            for b in other._pieces_near(a.aabb()):
+                if len(a._template) + len(b._template) >= _GJK_MIN_VERTICES:
+                    if gjk.gjk_intersects(a, b):
+                        return True
+                elif a._sat_polygon(b) is not None:
+                    return True
+        return False
+
+    def _intersects_circle(self, other: geometry.Circle) -> bool:
+        """SATを使用して円との交差を判定する。凹ポリゴンは凸な部分ごとに判定する。"""
+        return any(piece._sat_circle(other) is not None for piece in self._pieces_near(other.aabb()))
+
+    def _intersects_line(self, other: geometry.Line) -> bool:
+        """SATを使用して線分との交差を判定する。凹ポリゴンは凸な部分ごとに判定する。"""
+        return any(piece._sat_line(other) is not None for piece in self._pieces_near(other.aabb()))
+
+    def _collide_polygon(self, other: Polygon) -> Optional[collision.Contact]:
+        """
+        ポリゴン同士の接触情報（SATの最小軸 + 辺のクリッピングで接触点）。
+        凹ポリゴンは凸な部分ごとに判定して組み合わせる（_collide_concave）。
+        """
+        if not (self._template.is_convex and other._template.is_convex):
+            return self._collide_concave(other, Polygon._collide_polygon, Polygon._sat_polygon)
+        sat = self._sat_polygon(other)
+        if sat is None:
+            return None
+        depth, nx, ny = sat
+        va = self.get_transformed_vertices()
+        vb = other.get_transformed_vertices()
+        points = _manifold_points(va, _outward_normals(va), vb, _outward_normals(vb), nx, ny, depth)
+        return collision.Contact(Vector2(nx, ny), depth, points)
+
+    def _collide_circle(self, other: geometry.Circle) -> Optional[collision.Contact]:
+        """円との接触情報。接触点は円の最深点とポリゴン表面の中間。"""
+        if not self._template.is_convex:
+            return self._collide_concave(other, Polygon._collide_circle, Polygon._sat_circle)
+        sat = self._sat_circle(other)
+        if sat is None:
+            return None
+        depth, nx, ny = sat
+        k = other.radius - depth / 2
+        point = Vector2(other.center.x - nx * k, other.center.y - ny * k)
+        return collision.Contact(Vector2(nx, ny), depth, [point])
+
+    def _collide_capsule(self, other: geometry.Capsule) -> Optional[collision.Contact]:
+        """カプセルとの接触情報。芯の線分をポリゴン側へ半径だけずらした辺として接触点を求める。"""
+        if not self._template.is_convex:
+            return self._collide_concave(other, Polygon._collide_capsule, Polygon._sat_capsule)
+        sat = self._sat_capsule(other)
+        if sat is None:
+            return None
+        depth, nx, ny = sat
+        r = other.radius
+        va = self.get_transformed_vertices()
+        vb = [Vector2(other.start.x - nx * r, other.start.y - ny * r),
+              Vector2(other.end.x - nx * r, other.end.y - ny * r)]
+        points = _manifold_points(va, _outward_normals(va), vb, [(-nx, -ny), (-nx, -ny)], nx, ny, depth)
+        return collision.Contact(Vector2(nx, ny), depth, points)
+
+    def _collide_line(self, other: geometry.Line) -> Optional[collision.Contact]:
+        """線分との接触情報。線分は表裏2辺を持つ厚さ0の図形として扱う。"""
+        if not self._template.is_convex:
+            return self._collide_concave(other, Polygon._collide_line, Polygon._sat_line)
+        sat = self._sat_line(other)
+        if sat is None:
+            return None
+        depth, nx, ny = sat
+        va = self.get_transformed_vertices()
+        vb = [other.start, other.end]
+        dir_x = vb[1].x - vb[0].x
+        dir_y = vb[1].y - vb[0].y
+        length = math.hypot(dir_x, dir_y)
+        if length > 0:
+            side = (dir_y / length, -dir_x / length)
+            normals_b = [side, (-side[0], -side[1])]
+        else:
+            normals_b = [(-nx, -ny), (-nx, -ny)]
+        points = _manifold_points(va, _outward_normals(va), vb, normals_b, nx, ny, depth)
+        return collision.Contact(Vector2(nx, ny), depth, points)
+
+    def _piece_contacts(self, other: Shape,
+                        collide: PieceContact) -> list[tuple[Polygon, Shape, collision.Contact]]:
+        """凸な部分同士で接している組を (自身の部分, 相手の部分, 接触情報) で返す。"""
+        found = []
+        for a in self._pieces_near(other.aabb()):
+            for b in _pieces_near(other, a.aabb()):
+                contact = collide(a, b)
+                if contact is not None:
+                    found.append((a, b, contact))
+        return found
+
+    def _collide_concave(self, other: Shape, collide: PieceContact, sat: PieceSat) -> Optional[collision.Contact]:
+        """
+        凹ポリゴンが関わる組の接触情報。
+        部分ごとの最も深い接触は、法線が部分の間の（外周ではない）辺を向いていることがあり、
+        その向きに押し出しても隣の部分にめり込んだままになる。
+        そこで部分ごとの接触の法線と、接している部分の外周の辺の法線を候補とし、
+        それぞれの向きにすべての部分から離れるまでの距離を求めて、最も短く済む向きを法線とする。
+        other は動かさず、ずらした位置での判定は射影をずらして行う（_push_out_distance）。
+        候補は今接している組を通り越すのに要る距離（下限）の小さい順に調べ、
+        下限がそれまでの最短以上になったら打ち切る。
+        接触点は最も深い部分の接触のものを使う。
+        """
+        contacts = self._piece_contacts(other, collide)
+        if not contacts:
+            return None
+        deepest = max((contact for _, _, contact in contacts), key=lambda c: c.depth)
+        if deepest.depth <= _SEPARATION_SLOP:
+            return deepest
+
+        directions: list[tuple[float, float]] = []
+        for a, b, contact in contacts:
+            directions.append((contact.normal.x, contact.normal.y))
+            directions.extend(_outline_normals(a, self))
+            if b is not other and isinstance(b, Polygon) and isinstance(other, Polygon):
+                directions.extend((-nx, -ny) for nx, ny in _outline_normals(b, other))
+        overlapping = [(a, b) for a, b, contact in contacts if contact.depth > _SEPARATION_SLOP]
+        candidates = []
+        seen = set()
+        for nx, ny in directions:
+            key = (round(nx, 9), round(ny, 9))
+            if key in seen:
+                continue
+            seen.add(key)
+            bound = max(a.project_onto(nx, ny)[1] - b.project_onto(nx, ny)[0] for a, b in overlapping)
+            candidates.append((bound, nx, ny))
+        candidates.sort()
+
+        best = (math.inf, deepest.normal.x, deepest.normal.y)
+        for bound, nx, ny in candidates:
+            if bound >= best[0]:
+                break
+            distance = self._push_out_distance(other, sat, nx, ny, bound, best[0])
+            if distance < best[0]:
+                best = (distance, nx, ny)
+        distance, nx, ny = best
+        return collision.Contact(Vector2(nx, ny), distance, deepest.points)
+
+    def _push_out_distance(self, other: Shape, sat: PieceSat,
+                           nx: float, ny: float, start: float, limit: float) -> float:
+        """
+        other を単位ベクトル (nx, ny) の向きに動かしたとき、すべての部分から離れるまでの距離。
+        t だけ動かした位置は sat にずれ (nx*t, ny*t) を渡して判定し、other 自体は動かさない
+        （(nx, ny) への射影もちょうど t ずれるだけなので、other の射影に t を足せばよい）。
+        その向きの射影で通り越した組はさらに動かしても重ならないため、
+        重なっている組をまとめて通り越させることを繰り返せば、組の数+1回以内で終わる。
+        start（今接している組を通り越す距離）から調べ始め、limit 以上になったら打ち切る。
+        """
+        t = start
+        while t < limit:
+            ox, oy = nx * t, ny * t
+            step = 0.0
+            for a in self._pieces_near(_shifted(other.aabb(), ox, oy)):
+                for b in _pieces_near(other, _shifted(a.aabb(), -ox, -oy)):
+                    result = sat(a, b, ox, oy)
+                    if result is not None and result[0] > _SEPARATION_SLOP:
+                        step = max(step, a.project_onto(nx, ny)[1] - (b.project_onto(nx, ny)[0] + t))
+            if step <= _SEPARATION_SLOP:
+                return t
+            t += step
+        return t
+
+    def _intersects_capsule(self, other: geometry.Capsule) -> bool:
+        """
+        カプセルとの交差を判定する。
+        各辺とカプセルの芯の最短距離が半径以内か、芯がポリゴンの内部にあれば交差。
+        凹ポリゴンでも正確で、一時オブジェクトを確保しない。
+        分離軸キャッシュが有効なら先に前回の分離軸で調べ、離れていたときは
+        SAT で分離軸を探して記録する（凹ポリゴンでは凸包で離れている場合だけ見つかる）。
+        """
+        cache = Polygon.axis_cache
+        if cache is not None and cache.separated(self, other):
+            return False
+        if self._capsule_touches_outline(other):
+            return True
+        if cache is not None:
+            self._sat_capsule_axes(other, cache)
+        return False
 
-    def get_axes(self) -> list[Vector2]:
-        """ポリゴンの全辺に対する法線ベクトルのリストを返す。"""
-        axes = []
+    def _capsule_touches_outline(self, other: geometry.Capsule) -> bool:
+        """カプセルが辺に触れているか、芯がポリゴンの内部にあるか。"""
         verts = self.get_transformed_vertices()
-        for i in range(len(verts)):
-            p1 = verts[i]
-            p2 = verts[(i + 1) % len(verts)]
-            edge = p2 - p1
-            axes.append(Vector2(-edge.y, edge.x).normalized())
-        return axes
+        sx, sy = other.start.x, other.start.y
+        ex, ey = other.end.x, other.end.y
+        r_sq = other.radius**2
+        inside = False
+        n = len(verts)
+        for i in range(n):
+            a = verts[i]
+            b = verts[(i + 1) % n]
+            if geometry._segment_distance_sq(a.x, a.y, b.x, b.y, sx, sy, ex, ey) <= r_sq:
+                return True
+            # 辺と交わらない芯は全体が内側か外側にあるので、始点の内外だけ調べればよい
+            if (a.y > sy) != (b.y > sy):
+                x_cross = a.x + (sy - a.y) * (b.x - a.x) / (b.y - a.y)
+                if sx < x_cross:
+                    inside = not inside
+        return inside
+
+    def _update_local_normals(self):
+        """
+        スケール済みローカル空間での辺の単位法線を計算する。
+        回転は法線の向きを変えるだけなので、ここでは扱わない。
+        """
+        sx, sy = self._scale.x, self._scale.y
+        self._normals_scale = (sx, sy)
+        if sx == sy and sx > 0:
+            # 正の一様スケールでは法線はテンプレートのものと同じ
+            self._local_normals = [(n.x, n.y) for n in self._template.normals]
+            self._local_unique_normals = [(n.x, n.y) for n in self._template.unique_normals]
+        else:
+            self._local_normals, self._local_unique_normals = edge_normals(self._template.vertices, sx, sy)
+        self._normals_dirty = False
+
+    def _rotate_normals(self, normals: list[tuple[float, float]], out: list[Vector2]) -> list[Vector2]:
+        """ローカル法線を現在の回転でワールド軸に変換し、out のバッファに書き込む。"""
+        cos_theta, sin_theta = self.rotation_cs()
+        if len(out) != len(normals):
+            out = [Vector2(0, 0) for _ in normals]
+        for axis, (nx, ny) in zip(out, normals):
+            axis.set(nx * cos_theta - ny * sin_theta, nx * sin_theta + ny * cos_theta)
+        return out
+
+    def get_axes(self, unique: bool = False) -> list[Vector2]:
+        """
+        ポリゴンの全辺に対する法線ベクトルのリストを返す。
+        unique=True の場合は平行な軸を1本にまとめる（SAT用）。
+        結果はキャッシュされるため、呼び出し側で変更しないこと。
+        """
+        if self._uses_rotation_table():
+            entry = self._rotated_template()
+            return entry.unique_normals if unique else entry.normals
+        if self._normals_dirty or self._normals_scale != (self._scale.x, self._scale.y):
+            self._update_local_normals()
+        if unique:
+            if self._unique_axes_dirty:
+                self._world_unique_axes = self._rotate_normals(self._local_unique_normals, self._world_unique_axes)
+                self._unique_axes_dirty = False
+            return self._world_unique_axes
+        if self._axes_dirty:
+            self._world_axes = self._rotate_normals(self._local_normals, self._world_axes)
+            self._axes_dirty = False
+        return self._world_axes
 
     def project(self, axis: Vector2) -> tuple[float, float]:
         """ポリゴンを指定した軸に射影する。"""
+        return self.project_onto(axis.x, axis.y)
+
+    def project_onto(self, ax: float, ay: float) -> tuple[float, float]:
         verts = self.get_transformed_vertices()
         if not verts: return 0.0, 0.0
-        min_proj = max_proj = verts[0].dot(axis)
+        min_proj = max_proj = verts[0].x * ax + verts[0].y * ay
         for i in range(1, len(verts)):
-            proj = verts[i].dot(axis)
+            v = verts[i]
+            proj = v.x * ax + v.y * ay
             if proj < min_proj: min_proj = proj
             if proj > max_proj: max_proj = proj
         return min_proj, max_proj
+
+
+def _pieces_near(shape: Shape, box: tuple[float, float, float, float]) -> Sequence[Shape]:
+    """ポリゴンなら box と重なる凸な部分、それ以外の図形なら自身だけを返す。"""
+    if isinstance(shape, Polygon):
+        return shape._pieces_near(box)
+    return (shape,)
+
+
+def _shifted(box: tuple[float, float, float, float], dx: float, dy: float) -> tuple[float, float, float, float]:
+    """境界ボックスを (dx, dy) だけずらしたもの。"""
+    return box[0] + dx, box[1] + dy, box[2] + dx, box[3] + dy
+
+
+def _outline_normals(piece: Polygon, owner: Polygon) -> list[tuple[float, float]]:
+    """owner の凸な部分 piece の辺のうち、owner の外周にある辺の外向き単位法線。"""
+    normals = _outward_normals(piece.get_transformed_vertices())
+    if piece is owner:
+        return normals
+    template = owner._template
+    n = len(template)
+    indices = template.piece_indices[owner._pieces.index(piece)]
+    m = len(indices)
+    # 元の頂点列で隣り合う2頂点を結ぶ辺だけが外周の辺
+    return [normals[k] for k in range(m) if (indices[(k + 1) % m] - indices[k]) % n in (1, n - 1)]
+
+
+def _outward_normals(verts: Sequence[Vector2]) -> list[tuple[float, float]]:
+    """ワールド頂点列の各辺 (i, i+1) の外向き単位法線を返す（頂点の並び順によらない）。"""
+    n = len(verts)
+    area = 0.0
+    for i in range(n):
+        a, b = verts[i], verts[(i + 1) % n]
+        area += a.x * b.y - b.x * a.y
+    orient = 1.0 if area >= 0 else -1.0
+    normals = []
+    for i in range(n):
+        a, b = verts[i], verts[(i + 1) % n]
+        ex, ey = b.x - a.x, b.y - a.y
+        mag = math.hypot(ex, ey)
+        if mag == 0:
+            normals.append((0.0, 0.0))
+        else:
+            normals.append((orient * ey / mag, -orient * ex / mag))
+    return normals
+
+
+def _best_face(normals: list[tuple[float, float]], dx: float, dy: float) -> tuple[int, float]:
+    """法線が (dx, dy) に最も近い向きの辺の番号と内積を返す。"""
+    best_i, best_dot = 0, -math.inf
+    for i, (nx, ny) in enumerate(normals):
+        d = nx * dx + ny * dy
+        if d > best_dot:
+            best_i, best_dot = i, d
+    return best_i, best_dot
+
+
+def _manifold_points(va: Sequence[Vector2], na: list[tuple[float, float]],
+                     vb: Sequence[Vector2], nb: list[tuple[float, float]],
+                     nx: float, ny: float, depth: float) -> list[Vector2]:
+    """
+    a から b への法線 (nx, ny) で接する2つの凸図形の接触点を求める。
+    法線に最も沿った辺を基準辺、相手側で最も向かい合う辺を接触辺とし、
+    接触辺を基準辺の両端でクリッピングして、めり込んでいる点を残す。
+    """
+    ia, dot_a = _best_face(na, nx, ny)
+    ib, dot_b = _best_face(nb, -nx, -ny)
+    if dot_b > dot_a + 1e-3:
+        ref, ref_i, inc, inc_n = vb, ib, va, na
+        rnx, rny = -nx, -ny
+    else:
+        ref, ref_i, inc, inc_n = va, ia, vb, nb
+        rnx, rny = nx, ny
+
+    r1 = ref[ref_i]
+    r2 = ref[(ref_i + 1) % len(ref)]
+    ii, _ = _best_face(inc_n, -rnx, -rny)
+    p1 = inc[ii]
+    p2 = inc[(ii + 1) % len(inc)]
+
+    # 基準辺の接線方向の範囲 [lo, hi] に接触辺を切り詰める
+    tx, ty = r2.x - r1.x, r2.y - r1.y
+    lo = r1.x * tx + r1.y * ty
+    hi = r2.x * tx + r2.y * ty
+    d1 = p1.x * tx + p1.y * ty
+    d2 = p2.x * tx + p2.y * ty
+    clipped: list[tuple[float, float]] = []
+    if d1 == d2:
+        if lo <= d1 <= hi:
+            clipped = [(p1.x, p1.y), (p2.x, p2.y)]
+    else:
+        s_lo = (lo - d1) / (d2 - d1)
+        s_hi = (hi - d1) / (d2 - d1)
+        s0 = max(0.0, min(s_lo, s_hi))
+        s1 = min(1.0, max(s_lo, s_hi))
+        if s0 <= s1:
+            for s in ((s0, s1) if s0 < s1 else (s0,)):
+                clipped.append((p1.x + (p2.x - p1.x) * s, p1.y + (p2.y - p1.y) * s))
+
+    # 基準辺の内側にある点を、基準辺との中間に置いて採用する
+    offset = rnx * r1.x + rny * r1.y
+    points = []
+    for px, py in clipped:
+        sep = rnx * px + rny * py - offset
+        if sep <= 0:
+            points.append(Vector2(px - rnx * sep / 2, py - rny * sep / 2))
+    if not points:
+        # 縮退した場合は相手側の最深頂点を使う
+        deepest = min(inc, key=lambda v: rnx * v.x + rny * v.y)
+        sep = rnx * deepest.x + rny * deepest.y - offset
+        points.append(Vector2(deepest.x - rnx * sep / 2, deepest.y - rny * sep / 2))
+    return points
+
+
+# --- 衝突判定カーネルの登録 ---
+collision.register_pair(Polygon, Polygon, Polygon._intersects_polygon)
+collision.register_pair(Polygon, geometry.Circle, Polygon._intersects_circle)
+collision.register_pair(Polygon, geometry.Line, Polygon._intersects_line)
+collision.register_pair(Polygon, geometry.Capsule, Polygon._intersects_capsule)
+
+collision.register_contact(Polygon, Polygon, Polygon._collide_polygon)
+collision.register_contact(Polygon, geometry.Circle, Polygon._collide_circle)
+collision.register_contact(Polygon, geometry.Line, Polygon._collide_line)
+collision.register_contact(Polygon, geometry.Capsule, Polygon._collide_capsule)
@@ -0,0 +1,269 @@
+from __future__ import annotations
+import math
+import weakref
+from typing import Callable, Hashable, Sequence
+from .vector2 import Vector2
+
+
+def edge_normals(verts: Sequence[Vector2], sx: float = 1.0, sy: float = 1.0) -> tuple[list[tuple[float, float]], list[tuple[float, float]]]:
+    """
+    スケール (sx, sy) を適用したローカル空間での辺の単位法線を計算する。
+    戻り値は (全辺の法線, 平行な法線を除いた法線)。
+    """
+    normals = []
+    for i in range(len(verts)):
+        p1 = verts[i]
+        p2 = verts[(i + 1) % len(verts)]
+        # スケール後の辺 (ex*sx, ey*sy) の法線
+        nx = -(p2.y - p1.y) * sy
+        ny = (p2.x - p1.x) * sx
+        mag = math.hypot(nx, ny)
+        if mag == 0:
+            normals.append((0.0, 0.0))
+        else:
+            normals.append((nx / mag, ny / mag))
+
+    # 平行な法線（矩形や偶数辺の正多角形の対辺など）は同じ判定になるため除外
+    unique = []
+    for nx, ny in normals:
+        if nx == 0 and ny == 0:
+            continue
+        for ux, uy in unique:
+            if abs(nx * uy - ny * ux) < 1e-9:
+                break
+        else:
+            unique.append((nx, ny))
+    return normals, unique
+
+
+def signed_area(verts: Sequence[Vector2]) -> float:
+    """多角形の符号付き面積を返す（頂点の並び順で符号が変わる）。"""
+    area = 0.0
+    for i in range(len(verts)):
+        p1 = verts[i]
+        p2 = verts[(i + 1) % len(verts)]
+        area += p1.x * p2.y - p2.x * p1.y
+    return area / 2
+
+
+def triangulate(verts: Sequence[Vector2]) -> tuple[tuple[int, int, int], ...]:
+    """
+    耳切り法で単純多角形を三角形分割し、頂点インデックスの組を返す。
+    凹多角形にも対応する。
+    """
+    n = len(verts)
+    if n < 3:
+        return ()
+    orientation = 1.0 if signed_area(verts) >= 0 else -1.0
+
+    def cross(o: Vector2, a: Vector2, b: Vector2) -> float:
+        return (a.x - o.x) * (b.y - o.y) - (a.y - o.y) * (b.x - o.x)
+
+    def inside(p: Vector2, a: Vector2, b: Vector2, c: Vector2) -> bool:
+        return (cross(a, b, p) * orientation >= 0 and
+                cross(b, c, p) * orientation >= 0 and
+                cross(c, a, p) * orientation >= 0)
+
+    indices = list(range(n))
+    triangles = []
+    while len(indices) > 3:
+        m = len(indices)
+        for i in range(m):
+            ia, ib, ic = indices[i - 1], indices[i], indices[(i + 1) % m]
+            a, b, c = verts[ia], verts[ib], verts[ic]
+            # 凸頂点でなければ耳ではない
+            if cross(a, b, c) * orientation <= 0:
+                continue
+            if any(inside(verts[j], a, b, c) for j in indices if j not in (ia, ib, ic)):
+                continue
+            triangles.append((ia, ib, ic))
+            indices.pop(i)
+            break
+        else:
+            # 縮退した入力: 残りは扇形で分割する
+            for i in range(1, len(indices) - 1):
+                triangles.append((indices[0], indices[i], indices[i + 1]))
+            return tuple(triangles)
+    triangles.append((indices[0], indices[1], indices[2]))
+    return tuple(triangles)
+
+
+def _is_convex(verts: Sequence[Vector2], indices: Sequence[int], orientation: float) -> bool:
+    """indices の順に結んだ多角形が（orientation の向きで）凸か判定する。一直線に並ぶ頂点は許す。"""
+    n = len(indices)
+    for i in range(n):
+        o, a, b = verts[indices[i - 1]], verts[indices[i]], verts[indices[(i + 1) % n]]
+        if ((a.x - o.x) * (b.y - o.y) - (a.y - o.y) * (b.x - o.x)) * orientation < -1e-9:
+            return False
+    return True
+
+
+def _merge_pieces(p: list[int], q: list[int]) -> list[int] | None:
+    """p と q が辺を共有していれば、その辺を取り除いて結合した頂点列を返す。"""
+    for i in range(len(p)):
+        a, b = p[i], p[(i + 1) % len(p)]
+        for j in range(len(q)):
+            if q[j] == b and q[(j + 1) % len(q)] == a:
+                # p を b から a まで、q を a の次から b の前まで辿る
+                ring_p = p[i + 1:] + p[:i + 1]
+                ring_q = q[j + 1:] + q[:j + 1]
+                return ring_p + ring_q[1:-1]
+    return None
+
+
+def convex_decompose(verts: Sequence[Vector2],
+                     triangles: Sequence[tuple[int, int, int]]) -> tuple[tuple[int, ...], ...]:
+    """
+    三角形分割から凸な部分多角形への分割を求める（Hertel-Mehlhorn 法）。
+    隣り合う部分を結合しても凸のままなら対角線を取り除く、を繰り返す。
+    部分の数は最適な分割の高々4倍になる。
+    """
+    orientation = 1.0 if signed_area(verts) >= 0 else -1.0
+    pieces = [list(t) for t in triangles]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(pieces)):
+            for j in range(i + 1, len(pieces)):
+                m = _merge_pieces(pieces[i], pieces[j])
+                if m is not None and _is_convex(verts, m, orientation):
+                    pieces[i] = m
+                    del pieces[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return tuple(tuple(piece) for piece in pieces)
+
+
+class PolygonTemplate:
+    """
+    ポリゴンの形状データ（ローカル頂点・法線・三角形分割・外接半径）を
+    まとめた不変オブジェクト。同じ形状のポリゴン同士で共有する（フライウェイト）。
+    ハッシュは同一性で決まるため、テンプレートごとのキャッシュのキーに使える。
+
+    凹多角形は作成時に凸な部分に分割し、pieces に部分ごとのテンプレートを、
+    piece_indices に各部分の頂点のインデックスを持つ（凸多角形では空）。
+    交差判定は凸な部分ごとに行う。
+    """
+
+    __slots__ = ("vertices", "normals", "unique_normals", "triangles", "bounding_radius",
+                 "is_convex", "pieces", "piece_indices", "__weakref__")
+
+    vertices: tuple[Vector2, ...]
+    normals: tuple[Vector2, ...]
+    unique_normals: tuple[Vector2, ...]
+    triangles: tuple[tuple[int, int, int], ...]
+    bounding_radius: float
+    is_convex: bool
+    pieces: tuple[PolygonTemplate, ...]
+    piece_indices: tuple[tuple[int, ...], ...]
+
+    def __init__(self, vertices: Sequence[Vector2]):
+        verts = tuple(Vector2(v.x, v.y) for v in vertices)
+        normals, unique = edge_normals(verts)
+        object.__setattr__(self, "vertices", verts)
+        object.__setattr__(self, "normals", tuple(Vector2(nx, ny) for nx, ny in normals))
+        object.__setattr__(self, "unique_normals", tuple(Vector2(nx, ny) for nx, ny in unique))
+        triangles = triangulate(verts)
+        object.__setattr__(self, "triangles", triangles)
+        object.__setattr__(self, "bounding_radius", max((math.hypot(v.x, v.y) for v in verts), default=0.0))
+
+        orientation = 1.0 if signed_area(verts) >= 0 else -1.0
+        convex = len(verts) < 4 or _is_convex(verts, range(len(verts)), orientation)
+        object.__setattr__(self, "is_convex", convex)
+        indices = () if convex else convex_decompose(verts, triangles)
+        object.__setattr__(self, "piece_indices", indices)
+        object.__setattr__(self, "pieces", tuple(PolygonTemplate([verts[i] for i in piece]) for piece in indices))
+
+    def __setattr__(self, name: str, value: object):
+        raise AttributeError("PolygonTemplate は変更できません。")
+
+    def __len__(self) -> int:
+        return len(self.vertices)
+
+    def __repr__(self) -> str:
+        return f"PolygonTemplate({len(self.vertices)} vertices)"
+
+    # --- インターン（同じ形状は同じインスタンスを返す） ---
+
+    _interned: "weakref.WeakValueDictionary[Hashable, PolygonTemplate]" = weakref.WeakValueDictionary()
+
+    @classmethod
+    def intern(cls, key: Hashable, builder: Callable[[], Sequence[Vector2]]) -> PolygonTemplate:
+        """
+        key に対応するテンプレートを返す。未登録なら builder() の頂点から作成して登録する。
+        どのポリゴンからも参照されなくなったテンプレートは自動的に破棄される。
+        """
+        template = cls._interned.get(key)
+        if template is None:
+            template = cls(builder())
+            cls._interned[key] = template
+        return template
+
+    @classmethod
+    def rect(cls, width: float, height: float) -> PolygonTemplate:
+        """原点を中心とした矩形。"""
+        def build() -> list[Vector2]:
+            hw = width / 2
+            hh = height / 2
+            return [
+                Vector2(-hw, -hh), Vector2(hw, -hh),
+                Vector2(hw, hh), Vector2(-hw, hh)
+            ]
+        return cls.intern(("rect", width, height), build)
+
+    @classmethod
+    def regular_polygon(cls, sides: int, radius: float, angle_offset: float = -90) -> PolygonTemplate:
+        """正多角形。"""
+        if sides < 3:
+            raise ValueError("ポリゴンは少なくとも3辺必要です。")
+
+        def build() -> list[Vector2]:
+            vertices = []
+            angle_step = 360 / sides
+            for i in range(sides):
+                deg = angle_offset + i * angle_step
+                rad = math.radians(deg)
+                vertices.append(Vector2(radius * math.cos(rad), radius * math.sin(rad)))
+            return vertices
+        return cls.intern(("regular", sides, radius, angle_offset), build)
+
+    @classmethod
+    def star(cls, points: int, outer_radius: float, inner_radius: float) -> PolygonTemplate:
+        """星形。"""
+        def build() -> list[Vector2]:
+            vertices = []
+            angle_step = 180 / points
+            angle_offset = -90
+            for i in range(points * 2):
+                deg = angle_offset + i * angle_step
+                rad = math.radians(deg)
+                radius = outer_radius if i % 2 == 0 else inner_radius
+                vertices.append(Vector2(radius * math.cos(rad), radius * math.sin(rad)))
+            return vertices
+        return cls.intern(("star", points, outer_radius, inner_radius), build)
+
+    @classmethod
+    def heart(cls, scale: float = 1.0) -> PolygonTemplate:
+        """ハート形。"""
+        def build() -> list[Vector2]:
+            vertices = [
+                Vector2(0, -0.25), Vector2(0.3, -0.6), Vector2(0.7, -0.6),
+                Vector2(0.9, -0.3), Vector2(0.9, 0.1), Vector2(0, 0.8),
+                Vector2(-0.9, 0.1), Vector2(-0.9, -0.3), Vector2(-0.7, -0.6),
+                Vector2(-0.3, -0.6)
+            ]
+            return [v * scale * 10 for v in vertices]
+        return cls.intern(("heart", scale), build)
+
+    @classmethod
+    def arrow(cls, length: float, head_size: float, shaft_width: float) -> PolygonTemplate:
+        """上向きの矢印。"""
+        def build() -> list[Vector2]:
+            hw, sw, l = head_size / 2, shaft_width / 2, length / 2
+            return [
+                Vector2(0, -l - hw), Vector2(hw, -l + hw), Vector2(sw, -l + hw),
+                Vector2(sw, l), Vector2(-sw, l), Vector2(-sw, -l + hw), Vector2(-hw, -l + hw)
+            ]
+        return cls.intern(("arrow", length, head_size, shaft_width), build)
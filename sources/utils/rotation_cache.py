@@ -0,0 +1,70 @@
+from __future__ import annotations
+import math
+from collections import OrderedDict
+from typing import Callable, Hashable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+_TRIG_TABLES: dict[int, tuple[list[float], list[float]]] = {}
+
+
+def quantize_angle(degrees: float, steps: int) -> int:
+    """角度（度単位）を 1回転 steps 分割の段階番号に丸める。"""
+    return round(degrees * steps / 360.0) % steps
+
+
+def trig_table(steps: int) -> tuple[list[float], list[float]]:
+    """1回転を steps 分割したときの (cos表, sin表) を返す（初回のみ計算）。"""
+    table = _TRIG_TABLES.get(steps)
+    if table is None:
+        rads = [2 * math.pi * i / steps for i in range(steps)]
+        table = ([math.cos(r) for r in rads], [math.sin(r) for r in rads])
+        _TRIG_TABLES[steps] = table
+    return table
+
+
+class RotationCache(Generic[T]):
+    """
+    量子化した回転角ごとの計算結果を保持する、サイズ上限付きのLRUキャッシュ。
+    キーは (テンプレート, 分割数, 段階番号) で、必要になった段階だけ遅延計算する。
+    """
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[Hashable, int, int], T] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, template: Hashable, steps: int, bucket: int,
+            builder: Callable[[float, float], T]) -> T:
+        """
+        キャッシュ済みの結果を返す。無ければ builder(cos, sin) で作成して登録する。
+        """
+        key = (template, steps, bucket)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        cos_table, sin_table = trig_table(steps)
+        entry = builder(cos_table[bucket], sin_table[bucket])
+        self._entries[key] = entry
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        """キャッシュを空にする。"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# ポリゴン共通の回転済みローカル頂点キャッシュ
+rotation_cache: RotationCache = RotationCache()
@@ -1,21 +1,206 @@
 from __future__ import annotations
+import math
 from abc import ABC, abstractmethod
 from typing import Optional
 from .vector2 import Vector2
+from .transform import Transform2D
+from . import collision
 
 class Shape(ABC):
     """
     すべての幾何図形の抽象基底クラス。
-    衝突判定の実装を強制する。
+    衝突判定は collision モジュールのレジストリに登録したペアカーネルで行う。
+
+    位置・回転・スケールを保持し、それらから作るアフィン変換（Transform2D）を
+    キャッシュする。変換は状態が変わったときだけ再計算される（三角関数も変更時に1回）。
     """
 
+    def __init__(self, x: float = 0.0, y: float = 0.0):
+        # ワールド状態
+        self._position: Vector2 = Vector2(x, y)
+        self._rotation: float = 0.0  # 度単位
+        self._scale: Vector2 = Vector2(1.0, 1.0)
+
+        # トランスフォームのバージョン（変更のたびに増える）
+        self.version: int = 0
+
+        # 変換行列のキャッシュ
+        self._transform: Transform2D = Transform2D()
+        self._transform_dirty: bool = True
+        self._cached_rotation: Optional[float] = None
+        self._cos: float = 1.0
+        self._sin: float = 0.0
+
+        # 境界ボリュームのキャッシュ（version が変わったら再計算）
+        self._aabb: tuple[float, float, float, float] = (0.0, 0.0, 0.0, 0.0)
+        self._aabb_version: int = -1
+        self._bounding_radius: float = 0.0
+        self._bounding_radius_version: int = -1
+
+        # 衝突フィルタ: category は所属するレイヤーのビット、mask は判定の相手にするレイヤーのビット
+        self.category: int = 1
+        self.mask: int = collision.ALL_LAYERS
+
+    # --- トランスフォーム状態 ---
+
+    @property
+    def position(self) -> Vector2:
+        return self._position
+
+    @position.setter
+    def position(self, value: Vector2):
+        self._position.set(value.x, value.y)
+        self.mark_dirty()
+
+    @property
+    def rotation(self) -> float:
+        return self._rotation
+
+    @rotation.setter
+    def rotation(self, value: float):
+        self._rotation = value
+        self.mark_dirty()
+
+    @property
+    def scale(self) -> Vector2:
+        return self._scale
+
+    @scale.setter
+    def scale(self, value: Vector2):
+        self._scale.set(value.x, value.y)
+        self.mark_dirty()
+
+    @property
+    def transform(self) -> Transform2D:
+        """ローカル座標をワールド座標に写す変換（キャッシュ済み）。"""
+        if self._transform_dirty:
+            self._update_transform()
+        return self._transform
+
+    def _update_transform(self):
+        """変換行列を再計算する。サブクラスは変換の内容を変えるときにオーバーライドする。"""
+        cos, sin = self.rotation_cs()
+        self._transform.set_trs_cs(self._position.x, self._position.y, cos, sin,
+                                   self._scale.x, self._scale.y)
+        self._transform_dirty = False
+
+    def rotation_cs(self) -> tuple[float, float]:
+        """現在の回転の (cos, sin) を返す。回転が変わったときだけ再計算する。"""
+        if self._cached_rotation != self._rotation:
+            rad = math.radians(self._rotation)
+            self._cos = math.cos(rad)
+            self._sin = math.sin(rad)
+            self._cached_rotation = self._rotation
+        return self._cos, self._sin
+
+    def mark_dirty(self):
+        """
+        トランスフォームのキャッシュを無効化し、バージョンを進める。
+        position などのベクトルを直接書き換えた場合に呼び出す。
+        """
+        self._transform_dirty = True
+        self.version += 1
+
+    # --- 境界ボリューム ---
+
+    def aabb(self) -> tuple[float, float, float, float]:
+        """
+        軸平行境界ボックス (min_x, min_y, max_x, max_y) を返す。
+        トランスフォームが変わるまでキャッシュされる。
+        """
+        if self._aabb_version != self.version:
+            self._aabb = self._compute_aabb()
+            self._aabb_version = self.version
+        return self._aabb
+
+    def bounding_radius(self) -> float:
+        """
+        position を中心として図形全体を含む円の半径を返す。
+        トランスフォームが変わるまでキャッシュされる。
+        """
+        if self._bounding_radius_version != self.version:
+            self._bounding_radius = self._compute_bounding_radius()
+            self._bounding_radius_version = self.version
+        return self._bounding_radius
+
+    @abstractmethod
+    def _compute_aabb(self) -> tuple[float, float, float, float]:
+        """AABBを計算する。サブクラスで実装必須。"""
+        pass
+
     @abstractmethod
+    def _compute_bounding_radius(self) -> float:
+        """境界円の半径を計算する。サブクラスで実装必須。"""
+        pass
+
+    def bounds_overlap(self, other: "Shape") -> bool:
+        """
+        境界ボリュームが重なっているか判定する（詳細判定の前の早期棄却用）。
+        まず境界円で判定し、重なる場合だけAABBで判定する。
+        """
+        dx = self._position.x - other._position.x
+        dy = self._position.y - other._position.y
+        r = self.bounding_radius() + other.bounding_radius()
+        if dx * dx + dy * dy > r * r:
+            return False
+        a = self.aabb()
+        b = other.aabb()
+        return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+    def can_collide(self, other: "Shape") -> bool:
+        """
+        レイヤーの組み合わせ上、判定の対象になるか（互いの category が相手の mask に含まれるか）。
+        ブロードフェーズはこれが False の組を詳細判定の前に除外する。
+        """
+        return bool(self.category & other.mask) and bool(other.category & self.mask)
+
     def intersects(self, other: "Shape") -> bool:
         """
         この図形が他の図形と交差しているか判定。
-        すべてのサブクラスで実装必須。
+        型の組に対応するカーネルを collision.register_pair で登録しておく。
         """
-        pass
+        return collision.intersects(self, other)
+
+    def collide(self, other: "Shape") -> Optional[collision.Contact]:
+        """
+        他の図形との接触情報（法線・めり込み量・接触点）を返す。離れていれば None。
+        法線はこの図形から other へ向かう。
+        """
+        return collision.collide(self, other)
+
+    # --- サポート写像（GJK用） ---
+
+    def support(self, direction: Vector2) -> Vector2:
+        """direction 方向に最も遠い図形上の点（サポート点）を返す。"""
+        dx, dy = direction.x, direction.y
+        x, y = self.support_core(dx, dy)
+        r = self._core_radius()
+        if r:
+            mag = math.hypot(dx, dy)
+            if mag > 0:
+                x += dx / mag * r
+                y += dy / mag * r
+        return Vector2(x, y)
+
+    def support_core(self, dx: float, dy: float) -> tuple[float, float]:
+        """
+        半径を除いた芯の形状（円は中心、カプセルは線分）の (dx, dy) 方向のサポート点を返す。
+        これをオーバーライドした図形同士は、個別のカーネルが無くても gjk モジュールで判定できる。
+        オーバーライドしていない図形の組はカーネル未登録として collision.missing_pairs() に現れる。
+        """
+        raise NotImplementedError(f"{type(self).__name__} はサポート写像を実装していません。")
+
+    def _core_radius(self) -> float:
+        """芯の形状に付け足す半径（角の丸み）。"""
+        return 0.0
+
+    def project_onto(self, ax: float, ay: float) -> tuple[float, float]:
+        """単位ベクトル (ax, ay) の軸へ射影した区間 (最小, 最大) を返す。"""
+        r = self._core_radius()
+        x, y = self.support_core(-ax, -ay)
+        lo = x * ax + y * ay - r
+        x, y = self.support_core(ax, ay)
+        return lo, x * ax + y * ay + r
 
     @abstractmethod
     def draw(self, col: int, fill: bool = False):
@@ -25,26 +210,35 @@ class Shape(ABC):
         """
         pass
 
-    @abstractmethod
     def rotate(self, angle: float):
         """
         図形を指定した角度（度単位）で回転。
-        すべてのサブクラスで実装必須。
         """
-        pass
+        self._rotation += angle
+        self.mark_dirty()
 
-    @abstractmethod
     def set_scale(self, sx: float, sy: float):
         """
         図形のスケールを設定。
-        すべてのサブクラスで実装必須。
         """
-        pass
+        if sx == self._scale.x and sy == self._scale.y:
+            return
+        self._scale.set(sx, sy)
+        self.mark_dirty()
 
-    @abstractmethod
     def translate(self, dx: float, dy: float):
         """
         図形を移動。
-        すべてのサブクラスで実装必須。
         """
-        pass
+        self._position.set(self._position.x + dx, self._position.y + dy)
+        self.mark_dirty()
+
+    def set_position(self, x: float, y: float):
+        """
+        図形の位置を設定。
+        """
+        self._position.set(x, y)
+        self.mark_dirty()
+
+
+from . import gjk  # Shape 同士の汎用カーネル（GJK）を登録させるためのインポート
@@ -0,0 +1,184 @@
+from __future__ import annotations
+import math
+from typing import Iterable, Iterator
+from .shape import Shape
+from .collision import ALL_LAYERS
+
+
+def aabb_overlap(a: tuple[float, float, float, float], b: tuple[float, float, float, float]) -> bool:
+    """2つのAABB (min_x, min_y, max_x, max_y) が重なっているか判定する。"""
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+class _Entry:
+    """登録された図形と、それが占めるセル範囲。"""
+
+    __slots__ = ("shape", "x0", "y0", "x1", "y1", "version")
+
+    def __init__(self, shape: Shape):
+        self.shape = shape
+        self.x0 = self.y0 = 0
+        self.x1 = self.y1 = -1
+        self.version = -1
+
+
+class SpatialHash:
+    """
+    一様グリッドによる空間ハッシュ（ブロードフェーズ）。
+    図形のAABBが重なるセルに図形を登録し、近くにある図形だけを候補として返す。
+    図形が少し動いただけで占有セルが変わらない場合、update() はセルを書き換えない。
+    """
+
+    def __init__(self, cell_size: float = 32.0):
+        if cell_size <= 0:
+            raise ValueError("cell_size は正の値である必要があります。")
+        self.cell_size = cell_size
+        self._inv_cell = 1.0 / cell_size
+        self._cells: dict[tuple[int, int], dict[Shape, None]] = {}
+        self._entries: dict[Shape, _Entry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, shape: Shape) -> bool:
+        return shape in self._entries
+
+    def __iter__(self) -> Iterator[Shape]:
+        return iter(self._entries)
+
+    def _cell_range(self, aabb: tuple[float, float, float, float]) -> tuple[int, int, int, int]:
+        inv = self._inv_cell
+        return (math.floor(aabb[0] * inv), math.floor(aabb[1] * inv),
+                math.floor(aabb[2] * inv), math.floor(aabb[3] * inv))
+
+    def _add_cells(self, entry: _Entry):
+        shape = entry.shape
+        cells = self._cells
+        for cx in range(entry.x0, entry.x1 + 1):
+            for cy in range(entry.y0, entry.y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    bucket = cells[(cx, cy)] = {}
+                bucket[shape] = None
+
+    def _remove_cells(self, entry: _Entry):
+        shape = entry.shape
+        cells = self._cells
+        for cx in range(entry.x0, entry.x1 + 1):
+            for cy in range(entry.y0, entry.y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is not None:
+                    bucket.pop(shape, None)
+                    if not bucket:
+                        del cells[(cx, cy)]
+
+    # --- 登録・更新 ---
+
+    def insert(self, shape: Shape):
+        """図形を登録する（登録済みなら update と同じ）。"""
+        if shape in self._entries:
+            self.update(shape)
+            return
+        entry = _Entry(shape)
+        entry.x0, entry.y0, entry.x1, entry.y1 = self._cell_range(shape.aabb())
+        entry.version = shape.version
+        self._entries[shape] = entry
+        self._add_cells(entry)
+
+    def remove(self, shape: Shape):
+        """図形の登録を解除する。"""
+        entry = self._entries.pop(shape, None)
+        if entry is not None:
+            self._remove_cells(entry)
+
+    def update(self, shape: Shape):
+        """
+        移動・変形した図形のセルを更新する。
+        トランスフォームが変わっていない場合や、占有セルが同じ場合は何もしない。
+        """
+        entry = self._entries.get(shape)
+        if entry is None:
+            self.insert(shape)
+            return
+        if entry.version == shape.version:
+            return
+        entry.version = shape.version
+        x0, y0, x1, y1 = self._cell_range(shape.aabb())
+        if x0 == entry.x0 and y0 == entry.y0 and x1 == entry.x1 and y1 == entry.y1:
+            return
+        self._remove_cells(entry)
+        entry.x0, entry.y0, entry.x1, entry.y1 = x0, y0, x1, y1
+        self._add_cells(entry)
+
+    def update_all(self):
+        """登録されているすべての図形を更新する。"""
+        for shape in list(self._entries):
+            self.update(shape)
+
+    def clear(self):
+        """すべての登録を解除する。"""
+        self._cells.clear()
+        self._entries.clear()
+
+    # --- 問い合わせ ---
+
+    def query_aabb(self, min_x: float, min_y: float, max_x: float, max_y: float,
+                   mask: int = ALL_LAYERS) -> list[Shape]:
+        """AABBと境界ボックスが重なる図形のうち、category が mask に含まれるもののリストを返す。"""
+        box = (min_x, min_y, max_x, max_y)
+        x0, y0, x1, y1 = self._cell_range(box)
+        cells = self._cells
+        seen: dict[Shape, None] = {}
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is not None:
+                    seen.update(bucket)
+        if mask == ALL_LAYERS:
+            return [s for s in seen if aabb_overlap(box, s.aabb())]
+        return [s for s in seen if s.category & mask and aabb_overlap(box, s.aabb())]
+
+    def query(self, shape: Shape) -> list[Shape]:
+        """図形と境界ボックスが重なり、レイヤーの組み合わせが合う図形（自身を除く）のリストを返す。"""
+        category = shape.category
+        return [s for s in self.query_aabb(*shape.aabb(), shape.mask) if s is not shape and s.mask & category]
+
+    def query_intersecting(self, shape: Shape) -> list[Shape]:
+        """図形と実際に交差している図形のリストを返す（ブロードフェーズ + 詳細判定）。"""
+        return [s for s in self.query(shape) if shape.intersects(s)]
+
+    def pairs(self) -> list[tuple[Shape, Shape]]:
+        """境界ボックスが重なり、レイヤーの組み合わせが合う図形の組をすべて（各組1回ずつ）返す。"""
+        order = {shape: i for i, shape in enumerate(self._entries)}
+        seen: set[tuple[int, int]] = set()
+        result = []
+        for bucket in self._cells.values():
+            if len(bucket) < 2:
+                continue
+            shapes = list(bucket)
+            for i in range(len(shapes)):
+                a = shapes[i]
+                box_a = a.aabb()
+                category_a, mask_a = a.category, a.mask
+                for j in range(i + 1, len(shapes)):
+                    b = shapes[j]
+                    # レイヤーが合わない組は境界ボックスも調べない
+                    if not (category_a & b.mask and b.category & mask_a):
+                        continue
+                    ia, ib = order[a], order[b]
+                    key = (ia, ib) if ia < ib else (ib, ia)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    if aabb_overlap(box_a, b.aabb()):
+                        result.append((a, b) if ia < ib else (b, a))
+        return result
+
+    def intersecting_pairs(self) -> list[tuple[Shape, Shape]]:
+        """実際に交差している図形の組をすべて返す。"""
+        return [(a, b) for a, b in self.pairs() if a.intersects(b)]
+
+    def insert_all(self, shapes: Iterable[Shape]):
+        """複数の図形をまとめて登録する。"""
+        for shape in shapes:
+            self.insert(shape)
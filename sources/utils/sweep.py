@@ -0,0 +1,286 @@
+"""
+移動する円の連続衝突判定（掃引判定）。
+
+円が1フレームで velocity だけ移動するとき、最初に図形へ接触する時刻
+（0〜1 の割合）と接触点・法線を求める。高速な円が薄い図形をすり抜けるのを
+サブステップなしで防げる。
+
+円を半径 r で掃引することは、中心点の線分と「相手を r だけ膨らませた図形」
+との交差に等しい。線分・カプセル・ポリゴンの辺はいずれも膨らませると
+カプセルになるため、レイとカプセルの交差に帰着させている。
+"""
+from __future__ import annotations
+import math
+from typing import Any, Callable, Iterable, Optional
+from .vector2 import Vector2
+from .shape import Shape
+from .geometry import Circle, Line, Capsule, _closest_on_segment
+from .polygon import Polygon
+
+
+class SweepHit:
+    """掃引判定の結果。"""
+
+    __slots__ = ("time", "point", "normal", "position")
+
+    def __init__(self, time: float, point: Vector2, normal: Vector2, position: Vector2):
+        self.time: float = time          # 接触する時刻（移動量に対する割合 0〜1）
+        self.point: Vector2 = point      # 相手の表面上の接触点
+        self.normal: Vector2 = normal    # 相手から円へ向かう単位法線
+        self.position: Vector2 = position  # 接触時の円の中心
+
+    def __repr__(self) -> str:
+        return f"SweepHit(time={self.time:.4f}, point={self.point}, normal={self.normal})"
+
+
+# 掃引判定カーネル: kernel(cx, cy, radius, dx, dy, 相手) -> (時刻, 法線x, 法線y) / None
+# 相手は登録した型のインスタンスなので、その型は各カーネルの定義に任せる
+SweepKernel = Callable[[float, float, float, float, float, Any], Optional[tuple[float, float, float]]]
+
+_kernels: dict[type, SweepKernel] = {}
+_resolved: dict[type, Optional[SweepKernel]] = {}
+
+
+def register_sweep(shape_type: type, kernel: SweepKernel):
+    """shape_type に対する円の掃引判定カーネルを登録する。"""
+    _kernels[shape_type] = kernel
+    _resolved.clear()
+
+
+def _find_kernel(shape_type: type) -> Optional[SweepKernel]:
+    if shape_type in _resolved:
+        return _resolved[shape_type]
+    kernel = None
+    for cls in shape_type.__mro__:
+        kernel = _kernels.get(cls)
+        if kernel is not None:
+            break
+    _resolved[shape_type] = kernel
+    return kernel
+
+
+# --- レイと基本図形の交差 ---
+
+def _ray_circle(ox: float, oy: float, dx: float, dy: float,
+                cx: float, cy: float, r: float) -> Optional[float]:
+    """
+    点 (ox, oy) から (dx, dy) 方向へ進むレイが円に入る時刻を返す（0〜1 の範囲外なら None）。
+    始点は円の外にあるものとする。
+    """
+    a = dx * dx + dy * dy
+    if a == 0:
+        return None
+    mx = ox - cx
+    my = oy - cy
+    b = mx * dx + my * dy
+    if b >= 0:
+        return None  # 離れる向き
+    c = mx * mx + my * my - r * r
+    disc = b * b - a * c
+    if disc < 0:
+        return None
+    t = (-b - math.sqrt(disc)) / a
+    if t < 0 or t > 1:
+        return None
+    return t
+
+
+def _ray_capsule(ox: float, oy: float, dx: float, dy: float,
+                 ax: float, ay: float, bx: float, by: float,
+                 r: float) -> Optional[tuple[float, float, float]]:
+    """
+    レイが線分 AB を半径 r で膨らませたカプセルに入る (時刻, 法線x, 法線y) を返す。
+    始点はカプセルの外にあるものとする。
+    """
+    best: Optional[tuple[float, float, float]] = None
+    ex = bx - ax
+    ey = by - ay
+    len_sq = ex * ex + ey * ey
+    if len_sq > 0:
+        # 側面: 線分から距離 r の平行線
+        length = math.sqrt(len_sq)
+        nx = -ey / length
+        ny = ex / length
+        s0 = (ox - ax) * nx + (oy - ay) * ny
+        ds = dx * nx + dy * ny
+        if s0 < 0:
+            nx, ny, s0, ds = -nx, -ny, -s0, -ds
+        if ds < 0:
+            t = (r - s0) / ds
+            if 0 <= t <= 1:
+                u = ((ox + dx * t - ax) * ex + (oy + dy * t - ay) * ey) / len_sq
+                if 0 <= u <= 1:
+                    best = (t, nx, ny)
+
+    # 両端の半円
+    for cx, cy in ((ax, ay), (bx, by)):
+        t = _ray_circle(ox, oy, dx, dy, cx, cy, r)
+        if t is not None and (best is None or t < best[0]):
+            nx = ox + dx * t - cx
+            ny = oy + dy * t - cy
+            mag = math.hypot(nx, ny)
+            if mag > 0:
+                best = (t, nx / mag, ny / mag)
+    return best
+
+
+def _start_contact(cx: float, cy: float, dx: float, dy: float,
+                   qx: float, qy: float, fallback: tuple[float, float]) -> Optional[tuple[float, float, float]]:
+    """
+    開始時点ですでに接触している場合の結果を返す。
+    法線は最近点 (qx, qy) から円の中心へ向かう向き。離れる向きに動いているなら None。
+    """
+    nx = cx - qx
+    ny = cy - qy
+    mag = math.hypot(nx, ny)
+    if mag > 0:
+        nx /= mag
+        ny /= mag
+    else:
+        nx, ny = fallback
+    if dx * nx + dy * ny >= 0:
+        return None
+    return 0.0, nx, ny
+
+
+# --- 図形ごとのカーネル ---
+
+def _sweep_circle(cx: float, cy: float, r: float, dx: float, dy: float,
+                  other: Circle) -> Optional[tuple[float, float, float]]:
+    ox, oy = other.center.x, other.center.y
+    rr = r + other.radius
+    if (cx - ox)**2 + (cy - oy)**2 <= rr * rr:
+        return _start_contact(cx, cy, dx, dy, ox, oy, (-dx, -dy))
+    t = _ray_circle(cx, cy, dx, dy, ox, oy, rr)
+    if t is None:
+        return None
+    nx = cx + dx * t - ox
+    ny = cy + dy * t - oy
+    mag = math.hypot(nx, ny)
+    return t, nx / mag, ny / mag
+
+
+def _sweep_segment(cx: float, cy: float, r: float, dx: float, dy: float,
+                   ax: float, ay: float, bx: float, by: float) -> Optional[tuple[float, float, float]]:
+    qx, qy = _closest_on_segment(cx, cy, ax, ay, bx, by)
+    if (cx - qx)**2 + (cy - qy)**2 <= r * r:
+        return _start_contact(cx, cy, dx, dy, qx, qy, (-dx, -dy))
+    return _ray_capsule(cx, cy, dx, dy, ax, ay, bx, by, r)
+
+
+def _sweep_line(cx: float, cy: float, r: float, dx: float, dy: float,
+                other: Line) -> Optional[tuple[float, float, float]]:
+    s, e = other.start, other.end
+    return _sweep_segment(cx, cy, r, dx, dy, s.x, s.y, e.x, e.y)
+
+
+def _sweep_capsule(cx: float, cy: float, r: float, dx: float, dy: float,
+                   other: Capsule) -> Optional[tuple[float, float, float]]:
+    s, e = other.start, other.end
+    return _sweep_segment(cx, cy, r + other.radius, dx, dy, s.x, s.y, e.x, e.y)
+
+
+def _sweep_polygon(cx: float, cy: float, r: float, dx: float, dy: float,
+                   other: Polygon) -> Optional[tuple[float, float, float]]:
+    verts = other.get_transformed_vertices()
+    n = len(verts)
+    if n == 0:
+        return None
+
+    # 開始時点の重なり: 中心が内部にあるか、いずれかの辺が半径以内にある
+    inside = False
+    best_d2 = math.inf
+    best_q = (verts[0].x, verts[0].y)
+    for i in range(n):
+        a = verts[i]
+        b = verts[(i + 1) % n]
+        if (a.y > cy) != (b.y > cy):
+            x_cross = a.x + (cy - a.y) * (b.x - a.x) / (b.y - a.y)
+            if cx < x_cross:
+                inside = not inside
+        qx, qy = _closest_on_segment(cx, cy, a.x, a.y, b.x, b.y)
+        d2 = (cx - qx)**2 + (cy - qy)**2
+        if d2 < best_d2:
+            best_d2 = d2
+            best_q = (qx, qy)
+
+    if inside:
+        # 中心が内部: 最も近い辺から外へ押し出す向きを法線とする
+        qx, qy = best_q
+        return _start_contact(cx, cy, dx, dy, 2 * cx - qx, 2 * cy - qy, (-dx, -dy))
+    if best_d2 <= r * r:
+        return _start_contact(cx, cy, dx, dy, best_q[0], best_q[1], (-dx, -dy))
+
+    best: Optional[tuple[float, float, float]] = None
+    for i in range(n):
+        a = verts[i]
+        b = verts[(i + 1) % n]
+        hit = _ray_capsule(cx, cy, dx, dy, a.x, a.y, b.x, b.y, r)
+        if hit is not None and (best is None or hit[0] < best[0]):
+            best = hit
+    return best
+
+
+register_sweep(Circle, _sweep_circle)
+register_sweep(Line, _sweep_line)
+register_sweep(Capsule, _sweep_capsule)
+register_sweep(Polygon, _sweep_polygon)
+
+
+# --- 公開API ---
+
+def swept_aabb(circle: Circle, velocity: Vector2) -> tuple[float, float, float, float]:
+    """移動前後の円を含むAABBを返す（ブロードフェーズの問い合わせ用）。"""
+    min_x, min_y, max_x, max_y = circle.aabb()
+    vx, vy = velocity.x, velocity.y
+    return (min_x + min(vx, 0.0), min_y + min(vy, 0.0),
+            max_x + max(vx, 0.0), max_y + max(vy, 0.0))
+
+
+def sweep_circle(circle: Circle, velocity: Vector2, other: Shape) -> Optional[SweepHit]:
+    """
+    circle が velocity だけ移動する間に other へ最初に接触する時刻と接触情報を返す。
+    接触しなければ None。開始時点で重なっていて近づく向きに動いている場合は時刻 0 を返す。
+    """
+    kernel = _resolved.get(type(other))
+    if kernel is None:
+        kernel = _find_kernel(type(other))
+        if kernel is None:
+            return None
+
+    # 掃引範囲のAABBで早期棄却
+    a = swept_aabb(circle, velocity)
+    b = other.aabb()
+    if not (a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]):
+        return None
+
+    cx, cy, r = circle.center.x, circle.center.y, circle.radius
+    hit = kernel(cx, cy, r, velocity.x, velocity.y, other)
+    if hit is None:
+        return None
+    t, nx, ny = hit
+    mag = math.hypot(nx, ny)
+    if mag == 0:
+        return None
+    nx /= mag
+    ny /= mag
+    px = cx + velocity.x * t
+    py = cy + velocity.y * t
+    return SweepHit(t, Vector2(px - nx * r, py - ny * r), Vector2(nx, ny), Vector2(px, py))
+
+
+def sweep_circle_first(circle: Circle, velocity: Vector2,
+                       shapes: Iterable[Shape]) -> Optional[tuple[SweepHit, Shape]]:
+    """
+    shapes のうち、circle が最初に接触する図形とその接触情報を返す。
+    レイヤーの組み合わせが合わない図形（Shape.can_collide が False）は無視する。
+    """
+    best: Optional[tuple[SweepHit, Shape]] = None
+    category, mask = circle.category, circle.mask
+    for shape in shapes:
+        if shape is circle or not (shape.category & mask and category & shape.mask):
+            continue
+        hit = sweep_circle(circle, velocity, shape)
+        if hit is not None and (best is None or hit.time < best[0].time):
+            best = (hit, shape)
+    return best
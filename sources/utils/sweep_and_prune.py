@@ -0,0 +1,350 @@
+from __future__ import annotations
+from typing import Iterable, Iterator
+from .shape import Shape
+from .spatial_hash import aabb_overlap
+from .collision import ALL_LAYERS
+
+
+def _filtered(pairs: Iterable[tuple[_Entry, _Entry]]) -> list[tuple[Shape, Shape]]:
+    """レイヤーの組み合わせが合う組だけを図形の組にして返す。"""
+    result = []
+    for a, b in pairs:
+        sa, sb = a.shape, b.shape
+        if sa.category & sb.mask and sb.category & sa.mask:
+            result.append((sa, sb))
+    return result
+
+
+class _Endpoint:
+    """区間の端点。同じ値では min 側（is_max=0）が先に並ぶ。"""
+
+    __slots__ = ("value", "is_max", "entry", "index")
+
+    def __init__(self, entry: _Entry, is_max: int):
+        self.value = float("inf")
+        self.is_max = is_max
+        self.entry = entry
+        self.index = 0
+
+
+class _Entry:
+    """登録された図形と、その各軸の端点・他の図形と重なっている軸の数。"""
+
+    __slots__ = ("shape", "order", "version", "mins", "maxs", "counts")
+
+    def __init__(self, shape: Shape, order: int):
+        self.shape = shape
+        self.order = order
+        self.version = -1
+        self.mins = (_Endpoint(self, 0), _Endpoint(self, 0))
+        self.maxs = (_Endpoint(self, 1), _Endpoint(self, 1))
+        self.counts: dict[_Entry, int] = {}
+
+
+class SweepAndPrune:
+    """
+    ソート済み区間端点によるブロードフェーズ（Sweep and Prune）。
+    x軸とy軸の端点リストをフレーム間で保持し、図形が動いたら挿入ソートで並べ直す。
+    物体が少しずつ動く場面では並べ替えがほぼ O(N) で済み、
+    端点が入れ替わったときだけ重なっている組を追加・削除する。
+
+    pairs() は最後の update（または update_all）の時点で境界ボックスが重なる組を返す。
+    重なりの追跡は形状だけで行い、レイヤーの組み合わせは組を返すときに絞り込む。
+    直前の update_all() 以降に増えた組・なくなった組は added_pairs() / removed_pairs() で取れる。
+    """
+
+    def __init__(self):
+        self._axes: tuple[list[_Endpoint], list[_Endpoint]] = ([], [])
+        self._entries: dict[Shape, _Entry] = {}
+        self._pairs: dict[tuple[_Entry, _Entry], None] = {}
+        self._added: dict[tuple[_Entry, _Entry], None] = {}
+        self._removed: dict[tuple[_Entry, _Entry], None] = {}
+        self._next_order = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, shape: Shape) -> bool:
+        return shape in self._entries
+
+    def __iter__(self) -> Iterator[Shape]:
+        return iter(self._entries)
+
+    # --- 登録・更新 ---
+
+    def insert(self, shape: Shape):
+        """図形を登録する（登録済みなら update と同じ）。"""
+        if shape in self._entries:
+            self.update(shape)
+            return
+        entry = self._new_entry(shape)
+        # 端点を末尾（+∞）に置いてから実際の値まで左へ移動させると、
+        # 通過した端点との入れ替えで重なりが正しく数えられる
+        box = shape.aabb()
+        for axis in range(2):
+            endpoints = self._axes[axis]
+            lo, hi = entry.mins[axis], entry.maxs[axis]
+            lo.index = len(endpoints)
+            endpoints.append(lo)
+            hi.index = len(endpoints)
+            endpoints.append(hi)
+            lo.value = box[axis]
+            hi.value = box[axis + 2]
+            self._sift_left(endpoints, lo)
+            self._sift_left(endpoints, hi)
+
+    def insert_all(self, shapes: Iterable[Shape]):
+        """複数の図形をまとめて登録する。端点は一度に整列し直す。"""
+        added = False
+        for shape in shapes:
+            if shape in self._entries:
+                self.update(shape)
+                continue
+            entry = self._new_entry(shape)
+            box = shape.aabb()
+            for axis in range(2):
+                entry.mins[axis].value = box[axis]
+                entry.maxs[axis].value = box[axis + 2]
+                self._axes[axis].append(entry.mins[axis])
+                self._axes[axis].append(entry.maxs[axis])
+            added = True
+        if added:
+            self._rebuild()
+
+    def remove(self, shape: Shape):
+        """図形の登録を解除する。"""
+        entry = self._entries.pop(shape, None)
+        if entry is None:
+            return
+        for endpoints in self._axes:
+            endpoints[:] = [ep for ep in endpoints if ep.entry is not entry]
+            for i, ep in enumerate(endpoints):
+                ep.index = i
+        for other in entry.counts:
+            del other.counts[entry]
+            key = self._key(entry, other)
+            if key in self._pairs:
+                self._end_pair(key)
+        entry.counts.clear()
+
+    def update(self, shape: Shape):
+        """
+        移動・変形した図形の端点を更新し、挿入ソートで並べ直す。
+        トランスフォームが変わっていない場合は何もしない。
+        """
+        entry = self._entries.get(shape)
+        if entry is None:
+            self.insert(shape)
+            return
+        if entry.version == shape.version:
+            return
+        entry.version = shape.version
+        box = shape.aabb()
+        for axis in range(2):
+            endpoints = self._axes[axis]
+            lo, hi = entry.mins[axis], entry.maxs[axis]
+            moving_right = box[axis] > lo.value
+            lo.value = box[axis]
+            hi.value = box[axis + 2]
+            # 自分の端点を追い越さないよう、進む向きの先頭側から動かす
+            if moving_right:
+                self._sift(endpoints, hi)
+                self._sift(endpoints, lo)
+            else:
+                self._sift(endpoints, lo)
+                self._sift(endpoints, hi)
+
+    def update_all(self):
+        """登録されているすべての図形を更新する。added_pairs() / removed_pairs() はここで区切られる。"""
+        self._added.clear()
+        self._removed.clear()
+        for shape in list(self._entries):
+            self.update(shape)
+
+    def clear(self):
+        """すべての登録を解除する。"""
+        for endpoints in self._axes:
+            endpoints.clear()
+        self._entries.clear()
+        self._pairs.clear()
+        self._added.clear()
+        self._removed.clear()
+
+    # --- 端点の並べ替え ---
+
+    def _new_entry(self, shape: Shape) -> _Entry:
+        entry = _Entry(shape, self._next_order)
+        self._next_order += 1
+        entry.version = shape.version
+        self._entries[shape] = entry
+        return entry
+
+    def _sift(self, endpoints: list[_Endpoint], ep: _Endpoint):
+        """端点を値の変化した向きへ移動させる。"""
+        i = ep.index
+        if i > 0:
+            prev = endpoints[i - 1]
+            if prev.value > ep.value or (prev.value == ep.value and prev.is_max > ep.is_max):
+                self._sift_left(endpoints, ep)
+                return
+        self._sift_right(endpoints, ep)
+
+    def _sift_left(self, endpoints: list[_Endpoint], ep: _Endpoint):
+        i = ep.index
+        value, is_max = ep.value, ep.is_max
+        while i > 0:
+            prev = endpoints[i - 1]
+            if prev.value < value or (prev.value == value and prev.is_max <= is_max):
+                break
+            self._swapped(prev, ep)
+            endpoints[i] = prev
+            prev.index = i
+            i -= 1
+        endpoints[i] = ep
+        ep.index = i
+
+    def _sift_right(self, endpoints: list[_Endpoint], ep: _Endpoint):
+        i = ep.index
+        last = len(endpoints) - 1
+        value, is_max = ep.value, ep.is_max
+        while i < last:
+            nxt = endpoints[i + 1]
+            if nxt.value > value or (nxt.value == value and nxt.is_max >= is_max):
+                break
+            self._swapped(ep, nxt)
+            endpoints[i] = nxt
+            nxt.index = i
+            i += 1
+        endpoints[i] = ep
+        ep.index = i
+
+    def _swapped(self, left: _Endpoint, right: _Endpoint):
+        """right が left の前に移動したときの重なりの変化を反映する。"""
+        if left.is_max == right.is_max or left.entry is right.entry:
+            return
+        if right.is_max:
+            # right の最大端が left の最小端より前に来た: この軸で離れた
+            self._change(left.entry, right.entry, -1)
+        else:
+            # right の最小端が left の最大端より前に来た: この軸で重なった
+            self._change(left.entry, right.entry, 1)
+
+    def _change(self, a: _Entry, b: _Entry, delta: int):
+        count = a.counts.get(b, 0) + delta
+        if count:
+            a.counts[b] = count
+            b.counts[a] = count
+        else:
+            a.counts.pop(b, None)
+            b.counts.pop(a, None)
+        key = self._key(a, b)
+        if count == 2:
+            self._begin_pair(key)
+        elif delta < 0 and count == 1 and key in self._pairs:
+            self._end_pair(key)
+
+    @staticmethod
+    def _key(a: _Entry, b: _Entry) -> tuple[_Entry, _Entry]:
+        return (a, b) if a.order < b.order else (b, a)
+
+    def _begin_pair(self, key: tuple[_Entry, _Entry]):
+        self._pairs[key] = None
+        if key in self._removed:
+            del self._removed[key]
+        else:
+            self._added[key] = None
+
+    def _end_pair(self, key: tuple[_Entry, _Entry]):
+        del self._pairs[key]
+        if key in self._added:
+            del self._added[key]
+        else:
+            self._removed[key] = None
+
+    def _rebuild(self):
+        """端点を整列し直し、重なりの数を走査で数え直す。"""
+        old_pairs = self._pairs
+        for entry in self._entries.values():
+            entry.counts.clear()
+        for endpoints in self._axes:
+            endpoints.sort(key=lambda ep: (ep.value, ep.is_max))
+            active: dict[_Entry, None] = {}
+            for i, ep in enumerate(endpoints):
+                ep.index = i
+                entry = ep.entry
+                if ep.is_max:
+                    del active[entry]
+                else:
+                    for other in active:
+                        count = entry.counts.get(other, 0) + 1
+                        entry.counts[other] = count
+                        other.counts[entry] = count
+                    active[entry] = None
+
+        self._pairs = {}
+        for entry in self._entries.values():
+            for other, count in entry.counts.items():
+                if count == 2 and entry.order < other.order:
+                    self._pairs[(entry, other)] = None
+        for key in self._pairs:
+            if key not in old_pairs:
+                if key in self._removed:
+                    del self._removed[key]
+                else:
+                    self._added[key] = None
+        for key in old_pairs:
+            if key not in self._pairs:
+                if key in self._added:
+                    del self._added[key]
+                else:
+                    self._removed[key] = None
+
+    # --- 問い合わせ ---
+
+    def query_aabb(self, min_x: float, min_y: float, max_x: float, max_y: float,
+                   mask: int = ALL_LAYERS) -> list[Shape]:
+        """AABBと境界ボックスが重なる図形のうち、category が mask に含まれるもののリストを返す。"""
+        box = (min_x, min_y, max_x, max_y)
+        endpoints = self._axes[0]
+        # x の最小端が max_x 以下の範囲だけを二分探索で切り出す
+        lo, hi = 0, len(endpoints)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if endpoints[mid].value <= max_x:
+                lo = mid + 1
+            else:
+                hi = mid
+        result = []
+        for i in range(lo):
+            ep = endpoints[i]
+            if ep.is_max:
+                continue
+            shape = ep.entry.shape
+            if shape.category & mask and aabb_overlap(box, shape.aabb()):
+                result.append(shape)
+        return result
+
+    def query(self, shape: Shape) -> list[Shape]:
+        """図形と境界ボックスが重なり、レイヤーの組み合わせが合う図形（自身を除く）のリストを返す。"""
+        category = shape.category
+        return [s for s in self.query_aabb(*shape.aabb(), shape.mask) if s is not shape and s.mask & category]
+
+    def query_intersecting(self, shape: Shape) -> list[Shape]:
+        """図形と実際に交差している図形のリストを返す（ブロードフェーズ + 詳細判定）。"""
+        return [s for s in self.query(shape) if shape.intersects(s)]
+
+    def pairs(self) -> list[tuple[Shape, Shape]]:
+        """境界ボックスが重なり、レイヤーの組み合わせが合う図形の組をすべて（各組1回ずつ）返す。"""
+        return _filtered(self._pairs)
+
+    def intersecting_pairs(self) -> list[tuple[Shape, Shape]]:
+        """実際に交差している図形の組をすべて返す。"""
+        return [(a, b) for a, b in self.pairs() if a.intersects(b)]
+
+    def added_pairs(self) -> list[tuple[Shape, Shape]]:
+        """直前の update_all() 以降に重なり始めた組を返す。"""
+        return _filtered(self._added)
+
+    def removed_pairs(self) -> list[tuple[Shape, Shape]]:
+        """直前の update_all() 以降に重ならなくなった組を返す。"""
+        return _filtered(self._removed)
@@ -0,0 +1,151 @@
+from __future__ import annotations
+from typing import Any, Mapping, Optional, Protocol
+
+# タイルの分類フラグ（1タイルに複数立ててよい）
+TILE_SOLID = 1 << 0    # 床・壁
+TILE_LADDER = 1 << 1   # はしご
+TILE_ONE_WAY = 1 << 2  # 上からだけ乗れる足場
+TILE_HAZARD = 1 << 3   # 触れるとダメージ
+
+TILE_FLAGS = (TILE_SOLID, TILE_LADDER, TILE_ONE_WAY, TILE_HAZARD)
+
+
+class TileGrid(Protocol):
+    """タイル単位の衝突判定の問い合わせ（TileCollisionMap と ChunkedWorld が実装する）。"""
+
+    width: int   # タイル数
+    height: int
+
+    def flags(self, tx: int, ty: int) -> int: ...
+    def is_solid(self, tx: int, ty: int) -> bool: ...
+    def is_ladder(self, tx: int, ty: int) -> bool: ...
+    def any_in_row(self, ty: int, tx0: int, tx1: int, flag: int = TILE_SOLID) -> bool: ...
+    def any_in_column(self, tx: int, ty0: int, ty1: int, flag: int = TILE_SOLID) -> bool: ...
+    def first_in_row(self, ty: int, tx0: int, tx1: int, flag: int = TILE_SOLID) -> Optional[int]: ...
+    def first_in_column(self, tx: int, ty0: int, ty1: int, flag: int = TILE_SOLID) -> Optional[int]: ...
+
+
+class TileCollisionMap:
+    """
+    タイルマップを一度だけ読み取り、タイルごとの分類フラグを bytearray に焼き込んだ衝突用マップ。
+    判定のたびに pget() でタイルを読み、タイルIDのリストを線形探索する代わりに、
+    flags() はインデックス1回で答える。
+
+    フラグごとに行・列のビット集合（int）も持ち、
+    「この行の tx0〜tx1 に固体があるか」のような範囲の問い合わせをビット演算で答える。
+    タイルマップを書き換えたときは set_tile() か refresh() で変わったセルだけ焼き直す。
+    """
+
+    def __init__(self, tilemap: Any, width: int, height: int, tile_flags: Mapping[Any, int]):
+        """
+        tilemap: pget(x, y) / pset(x, y, tile) を持つタイルマップ（pyxel.Tilemap など）
+        width, height: 判定に使う範囲（タイル数）
+        tile_flags: タイルID（pget() の戻り値）から分類フラグへの対応。無いタイルは0
+        """
+        self.tilemap = tilemap
+        self.width = width
+        self.height = height
+        self.tile_flags = dict(tile_flags)
+        self._flags = bytearray(width * height)
+        # フラグ -> 行ごとのビット集合（ビット tx）/ 列ごとのビット集合（ビット ty）
+        self._rows: dict[int, list[int]] = {flag: [0] * height for flag in TILE_FLAGS}
+        self._cols: dict[int, list[int]] = {flag: [0] * width for flag in TILE_FLAGS}
+        self.rebuild()
+
+    def rebuild(self):
+        """タイルマップ全体を読み直す。"""
+        self.refresh(0, 0, self.width, self.height)
+
+    def refresh(self, tx: int, ty: int, w: int = 1, h: int = 1):
+        """(tx, ty) から w×h タイルの範囲だけ読み直す。"""
+        x0, y0 = max(tx, 0), max(ty, 0)
+        x1, y1 = min(tx + w, self.width), min(ty + h, self.height)
+        pget = self.tilemap.pget
+        lookup = self.tile_flags.get
+        for y in range(y0, y1):
+            for x in range(x0, x1):
+                self._store(x, y, lookup(pget(x, y), 0))
+
+    def set_tile(self, tx: int, ty: int, tile: Any):
+        """タイルマップの (tx, ty) を tile に書き換え、そのセルのフラグを更新する。"""
+        self.tilemap.pset(tx, ty, tile)
+        if 0 <= tx < self.width and 0 <= ty < self.height:
+            self._store(tx, ty, self.tile_flags.get(tile, 0))
+
+    def _store(self, tx: int, ty: int, value: int):
+        i = ty * self.width + tx
+        old = self._flags[i]
+        if old == value:
+            return
+        self._flags[i] = value
+        for flag in TILE_FLAGS:
+            if (old ^ value) & flag:
+                # このフラグが変わったビットだけ反転する
+                self._rows[flag][ty] ^= 1 << tx
+                self._cols[flag][tx] ^= 1 << ty
+
+    # --- 1タイルの問い合わせ ---
+
+    def flags(self, tx: int, ty: int) -> int:
+        """(tx, ty) の分類フラグ。範囲外は0。"""
+        if 0 <= tx < self.width and 0 <= ty < self.height:
+            return self._flags[ty * self.width + tx]
+        return 0
+
+    def is_solid(self, tx: int, ty: int) -> bool:
+        """タイルが固体（床・壁）かどうか。"""
+        return bool(self.flags(tx, ty) & TILE_SOLID)
+
+    def is_ladder(self, tx: int, ty: int) -> bool:
+        """タイルがはしごかどうか。"""
+        return bool(self.flags(tx, ty) & TILE_LADDER)
+
+    # --- 行・列の範囲の問い合わせ ---
+
+    def _bits(self, table: dict[int, list[int]], index: int, size: int, flag: int) -> int:
+        """index 番目の行（列）で flag のいずれかが立っているタイルのビット集合。"""
+        if not 0 <= index < size:
+            return 0
+        if flag in table:
+            return table[flag][index]
+        bits = 0
+        for f in TILE_FLAGS:
+            if flag & f:
+                bits |= table[f][index]
+        return bits
+
+    @staticmethod
+    def _span(bits: int, start: int, end: int) -> int:
+        """bits のうち start〜end（両端含む・順不同）の範囲だけを残す。"""
+        lo, hi = (start, end) if start <= end else (end, start)
+        lo = max(lo, 0)
+        if hi < lo:
+            return 0
+        return bits & (((1 << (hi - lo + 1)) - 1) << lo)
+
+    @staticmethod
+    def _first(bits: int, start: int, end: int) -> Optional[int]:
+        """start から end へ向かって最初に立っているビットの位置。無ければ None。"""
+        if not bits:
+            return None
+        if start <= end:
+            return (bits & -bits).bit_length() - 1  # 最下位のビット
+        return bits.bit_length() - 1  # 最上位のビット
+
+    def any_in_row(self, ty: int, tx0: int, tx1: int, flag: int = TILE_SOLID) -> bool:
+        """行 ty の tx0〜tx1 に flag のタイルがあるか。"""
+        return bool(self._span(self._bits(self._rows, ty, self.height, flag), tx0, tx1))
+
+    def any_in_column(self, tx: int, ty0: int, ty1: int, flag: int = TILE_SOLID) -> bool:
+        """列 tx の ty0〜ty1 に flag のタイルがあるか。"""
+        return bool(self._span(self._bits(self._cols, tx, self.width, flag), ty0, ty1))
+
+    def first_in_row(self, ty: int, tx0: int, tx1: int, flag: int = TILE_SOLID) -> Optional[int]:
+        """行 ty を tx0 から tx1 へ向かって調べ、最初の flag のタイルの x を返す。無ければ None。"""
+        bits = self._span(self._bits(self._rows, ty, self.height, flag), tx0, tx1)
+        return self._first(bits, tx0, tx1)
+
+    def first_in_column(self, tx: int, ty0: int, ty1: int, flag: int = TILE_SOLID) -> Optional[int]:
+        """列 tx を ty0 から ty1 へ向かって調べ、最初の flag のタイルの y を返す。無ければ None。"""
+        bits = self._span(self._bits(self._cols, tx, self.width, flag), ty0, ty1)
+        return self._first(bits, ty0, ty1)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Optional, Union
+import pyxel
+
+
+class TileLayerCache:
+    """
+    変化しないタイルマップのレイヤーを、チャンク（chunk_tiles×chunk_tiles タイル）単位で
+    オフスクリーンのイメージに一度だけ描いておき、毎フレームはそれを blt するキャッシュ。
+    bltm() のようにタイルを毎回並べ直さないため、描画コストは画面に映るチャンクの数で決まり、
+    マップの広さには依存しない。
+
+    チャンクは初めて画面に入ったときに描画する。タイルを書き換えたら invalidate() で
+    そのタイルを含むチャンクだけを描き直し対象にする。
+    保持するチャンク数は max_chunks までで、超えたら最も長く使われていないものを破棄する。
+    """
+
+    def __init__(self, tilemap: Union[int, pyxel.Tilemap], width: int, height: int,
+                 tile_size: int = 8, chunk_tiles: int = 16, colkey: Optional[int] = None,
+                 max_chunks: int = 64):
+        """
+        tilemap: タイルマップ番号か pyxel.Tilemap
+        width, height: キャッシュするマップの範囲（タイル数）
+        colkey: 透明色。指定すると下のレイヤーが透けるように描く
+        """
+        self.tilemap = tilemap
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.chunk_tiles = chunk_tiles
+        self.colkey = colkey
+        self.max_chunks = max_chunks
+        self._chunk_px = chunk_tiles * tile_size
+        # (cx, cy) -> 描画済みのイメージ
+        self._chunks: OrderedDict[tuple[int, int], pyxel.Image] = OrderedDict()
+        self._dirty: set[tuple[int, int]] = set()
+        self.renders = 0  # チャンクを描画した回数（確認用）
+
+    def invalidate(self, tx: int, ty: int, w: int = 1, h: int = 1):
+        """(tx, ty) から w×h タイルの範囲を含むチャンクを描き直し対象にする。"""
+        n = self.chunk_tiles
+        for cy in range(max(ty, 0) // n, (min(ty + h, self.height) - 1) // n + 1):
+            for cx in range(max(tx, 0) // n, (min(tx + w, self.width) - 1) // n + 1):
+                if (cx, cy) in self._chunks:
+                    self._dirty.add((cx, cy))
+
+    def invalidate_all(self):
+        """すべてのチャンクを描き直し対象にする。"""
+        self._dirty.update(self._chunks)
+
+    def clear(self):
+        """描画済みのチャンクをすべて破棄する。"""
+        self._chunks.clear()
+        self._dirty.clear()
+
+    def _chunk(self, cx: int, cy: int) -> pyxel.Image:
+        """チャンクのイメージを返す。無いか描き直し対象なら描画する。"""
+        key = (cx, cy)
+        image = self._chunks.get(key)
+        if image is not None and key not in self._dirty:
+            self._chunks.move_to_end(key)
+            return image
+
+        size = self._chunk_px
+        if image is None:
+            image = pyxel.Image(size, size)
+            self._chunks[key] = image
+            if len(self._chunks) > self.max_chunks:
+                old, _ = self._chunks.popitem(last=False)
+                self._dirty.discard(old)
+        else:
+            self._chunks.move_to_end(key)
+        self._dirty.discard(key)
+
+        image.cls(self.colkey if self.colkey is not None else 0)
+        # マップの端のチャンクはマップ内の部分だけ描く
+        u, v = cx * size, cy * size
+        w = min(size, self.width * self.tile_size - u)
+        h = min(size, self.height * self.tile_size - v)
+        if self.colkey is not None:
+            image.bltm(0, 0, self.tilemap, u, v, w, h, self.colkey)
+        else:
+            image.bltm(0, 0, self.tilemap, u, v, w, h)
+        self.renders += 1
+        return image
+
+    def draw(self, x: float, y: float, u: int, v: int, w: int, h: int):
+        """
+        マップのピクセル範囲 (u, v, w, h) を画面の (x, y) に描く（bltm と同じ引数の意味）。
+        範囲に重なるチャンクだけを blt する。
+        """
+        x, y = int(x), int(y)
+        size = self._chunk_px
+        x0, y0 = max(u, 0), max(v, 0)
+        x1 = min(u + w, self.width * self.tile_size)
+        y1 = min(v + h, self.height * self.tile_size)
+        if x1 <= x0 or y1 <= y0:
+            return
+
+        colkey = self.colkey
+        for cy in range(y0 // size, (y1 - 1) // size + 1):
+            top = max(y0, cy * size)
+            bottom = min(y1, (cy + 1) * size)
+            for cx in range(x0 // size, (x1 - 1) // size + 1):
+                left = max(x0, cx * size)
+                right = min(x1, (cx + 1) * size)
+                image = self._chunk(cx, cy)
+                # チャンク内の重なっている部分だけを転送する
+                if colkey is not None:
+                    pyxel.blt(x + left - u, y + top - v, image, left - cx * size, top - cy * size,
+                              right - left, bottom - top, colkey)
+                else:
+                    pyxel.blt(x + left - u, y + top - v, image, left - cx * size, top - cy * size,
+                              right - left, bottom - top)
+
+    def __len__(self) -> int:
+        return len(self._chunks)
@@ -0,0 +1,127 @@
+"""
+タイルグリッド上で軸平行の矩形（AABB）を動かす移動ソルバー。
+
+移動量を X → Y の順に軸ごとに適用し、進行方向の辺がまたぐタイルの列（行）を
+手前から1つずつ調べる（DDA）。最初に固体のある列で止めるため、
+1フレームに1タイル以上動いても床や壁をすり抜けない。
+コストは移動量ではなく、またいだタイルの数に比例する。
+
+辺の扱いは従来のプレイヤーの判定に合わせている:
+進行方向の辺は右・下端なら x + w / y + h の位置のタイル、
+交差方向の範囲は右・下端から1ピクセル内側（w - 1 / h - 1）までのタイルを見る。
+"""
+from __future__ import annotations
+from .tile_collision import TileGrid, TILE_SOLID, TILE_ONE_WAY
+
+
+class TileMove:
+    """move_aabb() の結果。"""
+
+    __slots__ = ("x", "y", "left", "right", "top", "bottom", "touched")
+
+    def __init__(self, x: float, y: float):
+        self.x: float = x            # 解決後の左上のX座標
+        self.y: float = y            # 解決後の左上のY座標
+        self.left: bool = False      # 左の壁に当たった
+        self.right: bool = False     # 右の壁に当たった
+        self.top: bool = False       # 天井に当たった
+        self.bottom: bool = False    # 床に乗った
+        self.touched: list[tuple[int, int]] = []  # 止められた固体タイルの (tx, ty)
+
+    @property
+    def on_ground(self) -> bool:
+        return self.bottom
+
+    def __repr__(self) -> str:
+        sides = "".join(c for c, hit in zip("LRTB", (self.left, self.right, self.top, self.bottom)) if hit)
+        return f"TileMove(x={self.x}, y={self.y}, contacts='{sides}', touched={self.touched})"
+
+
+def _march(lead0: float, lead1: float, tile_size: int) -> range:
+    """進行方向の辺が lead0 から lead1 へ動くときにまたぐタイル番号を手前から順に返す。"""
+    start = int(lead0 // tile_size)
+    end = int(lead1 // tile_size)
+    return range(start, end + 1) if end >= start else range(start, end - 1, -1)
+
+
+def move_aabb(tiles: TileGrid, x: float, y: float, w: float, h: float,
+              dx: float, dy: float, tile_size: int, flag: int = TILE_SOLID,
+              one_way: int = TILE_ONE_WAY) -> TileMove:
+    """
+    左上 (x, y)・大きさ w×h の矩形を (dx, dy) だけ動かし、flag のタイルで止めた結果を返す。
+    X方向を先に解決し、Y方向はその後の位置で判定する。
+    one_way のタイルは、動く前の足元がそのタイルの上端以上にあって落ちてきたときだけ床として止め、
+    横や下からはすり抜ける。0 なら一方通行の足場を使わない。
+    """
+    result = TileMove(x, y)
+
+    if dx:
+        top = int(y // tile_size)
+        bottom = int((y + h - 1) // tile_size)
+        if dx > 0:
+            for tx in _march(x + w, x + w + dx, tile_size):
+                if tiles.any_in_column(tx, top, bottom, flag):
+                    # 右壁に押し戻す
+                    result.x = tx * tile_size - w
+                    result.right = True
+                    _collect_column(tiles, tx, top, bottom, flag, result.touched)
+                    break
+            else:
+                result.x = x + dx
+        else:
+            for tx in _march(x, x + dx, tile_size):
+                if tiles.any_in_column(tx, top, bottom, flag):
+                    # 左壁に押し戻す
+                    result.x = (tx + 1) * tile_size
+                    result.left = True
+                    _collect_column(tiles, tx, top, bottom, flag, result.touched)
+                    break
+            else:
+                result.x = x + dx
+
+    if dy:
+        x = result.x
+        left = int(x // tile_size)
+        right = int((x + w - 1) // tile_size)
+        if dy > 0:
+            feet = y + h
+            for ty in _march(feet, feet + dy, tile_size):
+                hit = flag if tiles.any_in_row(ty, left, right, flag) else 0
+                if not hit and one_way and feet <= ty * tile_size and tiles.any_in_row(ty, left, right, one_way):
+                    hit = one_way
+                if hit:
+                    # 床に乗る
+                    result.y = ty * tile_size - h
+                    result.bottom = True
+                    _collect_row(tiles, ty, left, right, hit, result.touched)
+                    break
+            else:
+                result.y = y + dy
+        else:
+            for ty in _march(y, y + dy, tile_size):
+                if tiles.any_in_row(ty, left, right, flag):
+                    # 天井にぶつかる
+                    result.y = (ty + 1) * tile_size
+                    result.top = True
+                    _collect_row(tiles, ty, left, right, flag, result.touched)
+                    break
+            else:
+                result.y = y + dy
+
+    return result
+
+
+def _collect_column(tiles: TileGrid, tx: int, ty0: int, ty1: int, flag: int,
+                    out: list[tuple[int, int]]):
+    ty = tiles.first_in_column(tx, ty0, ty1, flag)
+    while ty is not None:
+        out.append((tx, ty))
+        ty = tiles.first_in_column(tx, ty + 1, ty1, flag) if ty < ty1 else None
+
+
+def _collect_row(tiles: TileGrid, ty: int, tx0: int, tx1: int, flag: int,
+                 out: list[tuple[int, int]]):
+    tx = tiles.first_in_row(ty, tx0, tx1, flag)
+    while tx is not None:
+        out.append((tx, ty))
+        tx = tiles.first_in_row(ty, tx + 1, tx1, flag) if tx < tx1 else None
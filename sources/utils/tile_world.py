@@ -0,0 +1,356 @@
+from __future__ import annotations
+import queue
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Mapping, Optional, Sequence
+import pyxel
+from .tile_collision import TileCollisionMap, TILE_SOLID, TILE_LADDER
+from .tile_layer import TileLayerCache
+
+# チャンクの読み込み関数: loader(cx, cy) -> チャンク内のタイルID（行優先で chunk_tiles×chunk_tiles 個）
+# ワールドの外にはみ出す部分も空のタイルで埋めて返す。常にメインスレッドから呼ばれる
+ChunkLoader = Callable[[int, int], Sequence[Any]]
+
+
+def tilemap_loader(tilemap: Any, chunk_tiles: int) -> ChunkLoader:
+    """pget(x, y) を持つタイルマップ（pyxel.Tilemap など）からチャンクを切り出す読み込み関数。"""
+    def load(cx: int, cy: int) -> list[Any]:
+        x0, y0 = cx * chunk_tiles, cy * chunk_tiles
+        pget = tilemap.pget
+        return [pget(x0 + x, y0 + y) for y in range(chunk_tiles) for x in range(chunk_tiles)]
+    return load
+
+
+class ChunkTiles:
+    """1チャンク分のタイルIDを保持する、pget/pset を持つ小さなタイルマップ。"""
+
+    __slots__ = ("size", "tiles")
+
+    def __init__(self, size: int, tiles: Sequence[Any]):
+        self.size = size
+        self.tiles: list[Any] = list(tiles)
+
+    def pget(self, x: int, y: int) -> Any:
+        return self.tiles[y * self.size + x]
+
+    def pset(self, x: int, y: int, tile: Any):
+        self.tiles[y * self.size + x] = tile
+
+
+class Chunk:
+    """常駐しているチャンク。タイル・衝突フラグ・描画済みレイヤーをまとめて持つ。"""
+
+    __slots__ = ("cx", "cy", "tiles", "collision", "tilemap", "layer", "edited")
+
+    def __init__(self, cx: int, cy: int, tiles: ChunkTiles, collision: TileCollisionMap):
+        self.cx = cx
+        self.cy = cy
+        self.tiles = tiles
+        self.collision = collision
+        # 描画用のタイルマップとレイヤー。初めて描くときに作る（pyxel はメインスレッドで使う）
+        self.tilemap: Optional[pyxel.Tilemap] = None
+        self.layer: Optional[TileLayerCache] = None
+        self.edited = False
+
+
+class ChunkedWorld:
+    """
+    タイル単位のワールドを chunk_tiles×chunk_tiles タイルのチャンクに分け、
+    カメラの周囲のチャンクだけを常駐させる。
+    画面の外側 preload チャンク分は先に読み込み、衝突フラグの焼き込みは
+    バックグラウンドのスレッドで済ませておく。タイルの読み取り（pyxel.Tilemap の pget など）は
+    メインスレッドで行い、スレッドには読み取ったタイルIDの写しだけを渡す。
+    スレッドを起動できない環境（Web 版など）では、先読みもメインスレッドで行う。
+    常駐数が max_chunks を超えたら、
+    画面に映っていないチャンクを最も長く使われていないものから破棄する。
+    メモリ使用量とフレームごとのコストはワールドの広さに依存しない。
+
+    衝突判定の問い合わせは TileCollisionMap と同じ（TileGrid）で、ワールド座標のタイルで答える。
+    常駐していないチャンクを問い合わせた場合はその場で読み込む。
+    描画用のイメージはメインスレッドで、そのチャンクを初めて描くときに作る。
+    """
+
+    def __init__(self, loader: ChunkLoader, width: int, height: int, tile_flags: Mapping[Any, int],
+                 chunk_tiles: int = 16, tile_size: int = 8, imgsrc: Any = 0,
+                 colkey: Optional[int] = None, preload: int = 1, max_chunks: int = 32,
+                 background: bool = True):
+        """
+        loader: チャンク (cx, cy) のタイルIDを返す関数（メインスレッドから呼ばれる）
+        width, height: ワールドの大きさ（タイル数）
+        imgsrc: タイルの絵を取るイメージバンク（pyxel.Tilemap の imgsrc）
+        background: False なら衝突フラグの焼き込みもメインスレッドで行う
+        """
+        self.loader = loader
+        self.width = width
+        self.height = height
+        self.tile_flags = dict(tile_flags)
+        self.chunk_tiles = chunk_tiles
+        self.tile_size = tile_size
+        self.imgsrc = imgsrc
+        self.colkey = colkey
+        self.preload = preload
+        self.max_chunks = max_chunks
+        self.background = background
+
+        self._chunks: OrderedDict[tuple[int, int], Chunk] = OrderedDict()
+        # 書き換えられたチャンクは破棄しても書き換え後のタイルを残しておく
+        self._edited: dict[tuple[int, int], list[Any]] = {}
+        self._visible: set[tuple[int, int]] = set()
+        self._pending: set[tuple[int, int]] = set()
+        self._requests: queue.Queue[Optional[tuple[tuple[int, int], list[Any]]]] = queue.Queue()
+        self._results: queue.Queue[Chunk] = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+        # 確認用の統計
+        self.loads = 0
+        self.evictions = 0
+
+    # --- チャンクの読み込み ---
+
+    def _build(self, cx: int, cy: int, tiles: Optional[Sequence[Any]] = None) -> Chunk:
+        """タイルを読み込み、衝突フラグを焼き込んだチャンクを作る。tiles を渡せば loader は呼ばない。"""
+        n = self.chunk_tiles
+        if tiles is None:
+            tiles = self.loader(cx, cy)
+        data = ChunkTiles(n, tiles)
+        return Chunk(cx, cy, data, TileCollisionMap(data, n, n, self.tile_flags))
+
+    def _run_worker(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            key, tiles = request
+            self._results.put(self._build(*key, tiles))
+
+    def _request(self, key: tuple[int, int]):
+        """チャンクの先読みを依頼する。"""
+        if key in self._chunks or key in self._pending:
+            return
+        if key in self._edited or not self.background:
+            self._install(self._build(*key, self._edited.get(key)))
+            return
+        if self._worker is None:
+            worker = threading.Thread(target=self._run_worker, daemon=True)
+            try:
+                worker.start()
+            except RuntimeError:
+                # スレッドを使えない環境では同期で読み込む
+                self.background = False
+                self._install(self._build(*key))
+                return
+            self._worker = worker
+        # タイルの読み取りはメインスレッドで行い、焼き込みだけをスレッドに任せる
+        self._pending.add(key)
+        self._requests.put((key, list(self.loader(*key))))
+
+    def _install(self, chunk: Chunk):
+        key = (chunk.cx, chunk.cy)
+        if key in self._edited:
+            chunk.edited = True
+        self._chunks[key] = chunk
+        self.loads += 1
+        self._evict()
+
+    def _collect(self):
+        """バックグラウンドで読み込み終わったチャンクを取り込む。"""
+        while True:
+            try:
+                chunk = self._results.get_nowait()
+            except queue.Empty:
+                return
+            key = (chunk.cx, chunk.cy)
+            self._pending.discard(key)
+            if key in self._chunks:
+                continue  # 待ちきれずにメインスレッドで読み込み済み
+            if key in self._edited:
+                # 読み込み中に書き換えられて破棄されたので、書き換え後のタイルで作り直す
+                chunk = self._build(*key, self._edited[key])
+            self._install(chunk)
+
+    def _chunk(self, cx: int, cy: int) -> Chunk:
+        """常駐しているチャンクを返す。無ければその場で読み込む。使ったチャンクは破棄の順番を後ろに回す。"""
+        key = (cx, cy)
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            self._chunks.move_to_end(key)
+        else:
+            self._collect()
+            chunk = self._chunks.get(key)
+            if chunk is None:
+                chunk = self._build(cx, cy, self._edited.get(key))
+                self._install(chunk)
+        return chunk
+
+    def _evict(self):
+        """上限を超えた分を、画面に映っている（_visible の）チャンク以外の古いものから破棄する。"""
+        if len(self._chunks) <= self.max_chunks:
+            return
+        for key in list(self._chunks):
+            if len(self._chunks) <= self.max_chunks:
+                return
+            if key in self._visible:
+                continue
+            chunk = self._chunks.pop(key)
+            if chunk.edited:
+                self._edited[key] = chunk.tiles.tiles
+            self.evictions += 1
+
+    def update(self, camera_x: float, camera_y: float, view_w: int, view_h: int):
+        """
+        カメラの位置に合わせてチャンクを入れ替える。毎フレーム呼ぶ。
+        画面に映るチャンクは必ず常駐させ、その外側は先読みを依頼する。
+        """
+        size = self.chunk_tiles * self.tile_size
+        max_cx = (self.width - 1) // self.chunk_tiles
+        max_cy = (self.height - 1) // self.chunk_tiles
+        x0 = max(int(camera_x // size), 0)
+        y0 = max(int(camera_y // size), 0)
+        x1 = min(int((camera_x + view_w - 1) // size), max_cx)
+        y1 = min(int((camera_y + view_h - 1) // size), max_cy)
+
+        # 読み込みで破棄が起きても新しく映るチャンクを守るよう、先に入れ替える
+        self._visible = {(cx, cy) for cy in range(y0, y1 + 1) for cx in range(x0, x1 + 1)}
+        self._collect()
+        for key in self._visible:
+            self._chunk(*key)
+
+        p = self.preload
+        for cy in range(max(y0 - p, 0), min(y1 + p, max_cy) + 1):
+            for cx in range(max(x0 - p, 0), min(x1 + p, max_cx) + 1):
+                self._request((cx, cy))
+        self._evict()
+
+    def close(self):
+        """バックグラウンドのスレッドを止める。"""
+        if self._worker is not None:
+            self._requests.put(None)
+            self._worker.join()
+            self._worker = None
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    # --- タイルの読み書き ---
+
+    def _in_world(self, tx: int, ty: int) -> bool:
+        return 0 <= tx < self.width and 0 <= ty < self.height
+
+    def tile(self, tx: int, ty: int) -> Any:
+        """(tx, ty) のタイルID。範囲外は None。"""
+        if not self._in_world(tx, ty):
+            return None
+        n = self.chunk_tiles
+        return self._chunk(tx // n, ty // n).tiles.pget(tx % n, ty % n)
+
+    def set_tile(self, tx: int, ty: int, tile: Any):
+        """(tx, ty) を tile に書き換え、そのチャンクの衝突フラグと描画を更新する。"""
+        if not self._in_world(tx, ty):
+            return
+        n = self.chunk_tiles
+        chunk = self._chunk(tx // n, ty // n)
+        lx, ly = tx % n, ty % n
+        chunk.collision.set_tile(lx, ly, tile)
+        chunk.edited = True
+        if chunk.tilemap is not None and chunk.layer is not None:
+            chunk.tilemap.pset(lx, ly, tile)
+            chunk.layer.invalidate(lx, ly)
+
+    # --- 衝突判定の問い合わせ（TileGrid） ---
+
+    def flags(self, tx: int, ty: int) -> int:
+        """(tx, ty) の分類フラグ。範囲外は0。"""
+        if not self._in_world(tx, ty):
+            return 0
+        n = self.chunk_tiles
+        return self._chunk(tx // n, ty // n).collision.flags(tx % n, ty % n)
+
+    def is_solid(self, tx: int, ty: int) -> bool:
+        """タイルが固体（床・壁）かどうか。"""
+        return bool(self.flags(tx, ty) & TILE_SOLID)
+
+    def is_ladder(self, tx: int, ty: int) -> bool:
+        """タイルがはしごかどうか。"""
+        return bool(self.flags(tx, ty) & TILE_LADDER)
+
+    def _spans(self, start: int, end: int, size: int) -> list[tuple[int, int, int]]:
+        """
+        start から end へ向かう範囲をチャンクごとに分け、
+        (チャンク番号, チャンク内の開始, チャンク内の終了) を進む順に返す。
+        """
+        n = self.chunk_tiles
+        step = 1 if start <= end else -1
+        lo, hi = (start, end) if step > 0 else (end, start)
+        lo, hi = max(lo, 0), min(hi, size - 1)
+        if hi < lo:
+            return []
+        spans = []
+        for c in range(lo // n, hi // n + 1):
+            a = max(lo, c * n) - c * n
+            b = min(hi, c * n + n - 1) - c * n
+            spans.append((c, a, b) if step > 0 else (c, b, a))
+        if step < 0:
+            spans.reverse()
+        return spans
+
+    def any_in_row(self, ty: int, tx0: int, tx1: int, flag: int = TILE_SOLID) -> bool:
+        """行 ty の tx0〜tx1 に flag のタイルがあるか。"""
+        if not 0 <= ty < self.height:
+            return False
+        n = self.chunk_tiles
+        return any(self._chunk(c, ty // n).collision.any_in_row(ty % n, a, b, flag)
+                   for c, a, b in self._spans(tx0, tx1, self.width))
+
+    def any_in_column(self, tx: int, ty0: int, ty1: int, flag: int = TILE_SOLID) -> bool:
+        """列 tx の ty0〜ty1 に flag のタイルがあるか。"""
+        if not 0 <= tx < self.width:
+            return False
+        n = self.chunk_tiles
+        return any(self._chunk(tx // n, c).collision.any_in_column(tx % n, a, b, flag)
+                   for c, a, b in self._spans(ty0, ty1, self.height))
+
+    def first_in_row(self, ty: int, tx0: int, tx1: int, flag: int = TILE_SOLID) -> Optional[int]:
+        """行 ty を tx0 から tx1 へ向かって調べ、最初の flag のタイルの x を返す。無ければ None。"""
+        if not 0 <= ty < self.height:
+            return None
+        n = self.chunk_tiles
+        for c, a, b in self._spans(tx0, tx1, self.width):
+            x = self._chunk(c, ty // n).collision.first_in_row(ty % n, a, b, flag)
+            if x is not None:
+                return c * n + x
+        return None
+
+    def first_in_column(self, tx: int, ty0: int, ty1: int, flag: int = TILE_SOLID) -> Optional[int]:
+        """列 tx を ty0 から ty1 へ向かって調べ、最初の flag のタイルの y を返す。無ければ None。"""
+        if not 0 <= tx < self.width:
+            return None
+        n = self.chunk_tiles
+        for c, a, b in self._spans(ty0, ty1, self.height):
+            y = self._chunk(tx // n, c).collision.first_in_column(tx % n, a, b, flag)
+            if y is not None:
+                return c * n + y
+        return None
+
+    # --- 描画 ---
+
+    def _layer(self, chunk: Chunk) -> TileLayerCache:
+        if chunk.layer is None:
+            n = self.chunk_tiles
+            tilemap = pyxel.Tilemap(n, n, self.imgsrc)
+            for y in range(n):
+                for x in range(n):
+                    tilemap.pset(x, y, chunk.tiles.pget(x, y))
+            chunk.tilemap = tilemap
+            chunk.layer = TileLayerCache(tilemap, n, n, self.tile_size, chunk_tiles=n,
+                                         colkey=self.colkey, max_chunks=1)
+        return chunk.layer
+
+    def draw(self):
+        """
+        update() で決めた画面に映るチャンクを、ワールド座標の位置に描く。
+        カメラのずらしは pyxel.camera() で行う。
+        """
+        size = self.chunk_tiles * self.tile_size
+        for key in self._visible:
+            chunk = self._chunks.get(key) or self._chunk(*key)
+            self._layer(chunk).draw(chunk.cx * size, chunk.cy * size, 0, 0, size, size)
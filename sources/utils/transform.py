@@ -0,0 +1,184 @@
+from __future__ import annotations
+import math
+from typing import Sequence
+from .vector2 import Vector2
+from .vector2_array import Vector2Array
+
+
+class Transform2D:
+    """
+    2x3 のアフィン変換を表すクラス。
+
+        | a  c  tx |
+        | b  d  ty |
+
+    点 (x, y) は (a*x + c*y + tx, b*x + d*y + ty) に写される。
+    """
+
+    __slots__ = ("a", "b", "c", "d", "tx", "ty")
+
+    def __init__(self, a: float = 1.0, b: float = 0.0, c: float = 0.0, d: float = 1.0,
+                 tx: float = 0.0, ty: float = 0.0):
+        self.a: float = a
+        self.b: float = b
+        self.c: float = c
+        self.d: float = d
+        self.tx: float = tx
+        self.ty: float = ty
+
+    # --- 生成 ---
+
+    @classmethod
+    def identity(cls) -> Transform2D:
+        """恒等変換を作成する。"""
+        return cls()
+
+    @classmethod
+    def translation(cls, tx: float, ty: float) -> Transform2D:
+        """平行移動を作成する。"""
+        return cls(tx=tx, ty=ty)
+
+    @classmethod
+    def rotation(cls, degrees: float) -> Transform2D:
+        """原点周りの回転（度単位）を作成する。"""
+        rad = math.radians(degrees)
+        cos = math.cos(rad)
+        sin = math.sin(rad)
+        return cls(cos, sin, -sin, cos)
+
+    @classmethod
+    def scaling(cls, sx: float, sy: float) -> Transform2D:
+        """スケールを作成する。"""
+        return cls(sx, 0.0, 0.0, sy)
+
+    @classmethod
+    def from_trs(cls, x: float, y: float, degrees: float, sx: float = 1.0, sy: float = 1.0) -> Transform2D:
+        """スケール → 回転 → 移動 の順に適用する変換を作成する。"""
+        return cls().set_trs(x, y, degrees, sx, sy)
+
+    @classmethod
+    def rotation_about(cls, degrees: float, cx: float, cy: float) -> Transform2D:
+        """点 (cx, cy) を中心とした回転を作成する。"""
+        rad = math.radians(degrees)
+        cos = math.cos(rad)
+        sin = math.sin(rad)
+        return cls(cos, sin, -sin, cos, cx - cos * cx + sin * cy, cy - sin * cx - cos * cy)
+
+    def set(self, a: float, b: float, c: float, d: float, tx: float, ty: float) -> Transform2D:
+        """成分を上書きし、自身を返す。"""
+        self.a, self.b, self.c, self.d, self.tx, self.ty = a, b, c, d, tx, ty
+        return self
+
+    def set_trs(self, x: float, y: float, degrees: float, sx: float = 1.0, sy: float = 1.0) -> Transform2D:
+        """スケール → 回転 → 移動 の変換で自身を上書きし、自身を返す。"""
+        rad = math.radians(degrees)
+        return self.set_trs_cs(x, y, math.cos(rad), math.sin(rad), sx, sy)
+
+    def set_trs_cs(self, x: float, y: float, cos: float, sin: float,
+                   sx: float = 1.0, sy: float = 1.0) -> Transform2D:
+        """計算済みの cos/sin を使って set_trs と同じ変換を設定する。"""
+        return self.set(cos * sx, sin * sx, -sin * sy, cos * sy, x, y)
+
+    def copy(self) -> Transform2D:
+        """同じ成分を持つ新しい変換を返す。"""
+        return Transform2D(self.a, self.b, self.c, self.d, self.tx, self.ty)
+
+    # --- 合成と逆変換 ---
+
+    def compose(self, other: Transform2D) -> Transform2D:
+        """
+        other を適用した後に自身を適用する合成変換を返す（self * other）。
+        """
+        return Transform2D(
+            self.a * other.a + self.c * other.b,
+            self.b * other.a + self.d * other.b,
+            self.a * other.c + self.c * other.d,
+            self.b * other.c + self.d * other.d,
+            self.a * other.tx + self.c * other.ty + self.tx,
+            self.b * other.tx + self.d * other.ty + self.ty,
+        )
+
+    def __matmul__(self, other: Transform2D) -> Transform2D:
+        return self.compose(other)
+
+    def determinant(self) -> float:
+        """線形部分の行列式を返す。"""
+        return self.a * self.d - self.b * self.c
+
+    def inverted(self) -> Transform2D:
+        """逆変換を返す。"""
+        det = self.determinant()
+        if det == 0:
+            raise ZeroDivisionError("行列式が0のTransform2Dは逆変換できません。")
+        inv_det = 1.0 / det
+        a = self.d * inv_det
+        b = -self.b * inv_det
+        c = -self.c * inv_det
+        d = self.a * inv_det
+        return Transform2D(a, b, c, d, -(a * self.tx + c * self.ty), -(b * self.tx + d * self.ty))
+
+    # --- 適用 ---
+
+    def apply(self, point: Vector2) -> Vector2:
+        """点を変換した新しいVector2を返す。"""
+        return self.apply_into(point, Vector2(0, 0))
+
+    def apply_into(self, point: Vector2, out: Vector2) -> Vector2:
+        """点を変換した結果を out に書き込み、out を返す。"""
+        x, y = point.x, point.y
+        return out.set(self.a * x + self.c * y + self.tx, self.b * x + self.d * y + self.ty)
+
+    def apply_xy(self, x: float, y: float) -> tuple[float, float]:
+        """座標 (x, y) を変換したタプルを返す。"""
+        return self.a * x + self.c * y + self.tx, self.b * x + self.d * y + self.ty
+
+    def apply_vector(self, v: Vector2) -> Vector2:
+        """方向ベクトルを変換する（平行移動は適用しない）。"""
+        return Vector2(self.a * v.x + self.c * v.y, self.b * v.x + self.d * v.y)
+
+    def apply_batch(self, points: Sequence[Vector2], out: list[Vector2] | None = None) -> list[Vector2]:
+        """
+        点のリストをまとめて変換する。
+        out に同じ長さのリストを渡すと、その中のVector2を再利用して書き込む。
+        """
+        if out is None or len(out) != len(points):
+            out = [Vector2(0, 0) for _ in points]
+        a, b, c, d, tx, ty = self.a, self.b, self.c, self.d, self.tx, self.ty
+        for p, o in zip(points, out):
+            x, y = p.x, p.y
+            o.set(a * x + c * y + tx, b * x + d * y + ty)
+        return out
+
+    def apply_array(self, points: Vector2Array, out: Vector2Array | None = None) -> Vector2Array:
+        """
+        Vector2Array をまとめて変換する。
+        out を渡すと（長さが同じなら）その配列に書き込む。points 自身を渡してもよい。
+        """
+        a, b, c, d, tx, ty = self.a, self.b, self.c, self.d, self.tx, self.ty
+        xs, ys = points.xs, points.ys
+        if out is None or len(out) != len(points):
+            result = Vector2Array([a * x + c * y + tx for x, y in zip(xs, ys)],
+                                  [b * x + d * y + ty for x, y in zip(xs, ys)])
+            return result if out is None else out.set_from(result)
+        oxs, oys = out.xs, out.ys
+        for i in range(len(xs)):
+            x, y = xs[i], ys[i]
+            oxs[i] = a * x + c * y + tx
+            oys[i] = b * x + d * y + ty
+        return out
+
+    # --- 情報 ---
+
+    def mean_scale(self) -> float:
+        """x軸・y軸方向の拡大率の平均を返す（円の半径などに使う）。"""
+        return (math.hypot(self.a, self.b) + math.hypot(self.c, self.d)) / 2
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Transform2D):
+            return NotImplemented
+        return all(math.isclose(p, q, rel_tol=1e-9, abs_tol=1e-12) for p, q in zip(
+            (self.a, self.b, self.c, self.d, self.tx, self.ty),
+            (other.a, other.b, other.c, other.d, other.tx, other.ty)))
+
+    def __repr__(self) -> str:
+        return f"Transform2D({self.a}, {self.b}, {self.c}, {self.d}, {self.tx}, {self.ty})"
@@ -2,12 +2,27 @@ from __future__ import annotations
 import math
 
 class Vector2:
-    """ゲーム開発用の2Dベクトルクラス。"""
+    """
+    ゲーム開発用の2Dベクトルクラス。
+    毎フレームの確保を減らすため、インプレース演算と *_into(out) 版の演算を持つ。
+    """
+
+    __slots__ = ("x", "y")
 
     def __init__(self, x: float, y: float):
         self.x: float = x
         self.y: float = y
 
+    def set(self, x: float, y: float) -> Vector2:
+        """成分を上書きし、自身を返す。"""
+        self.x = x
+        self.y = y
+        return self
+
+    def copy(self) -> Vector2:
+        """同じ成分を持つ新しいVector2を返す。"""
+        return Vector2(self.x, self.y)
+
     # --- 算術演算 ---
 
     def __add__(self, other: Vector2) -> Vector2:
@@ -30,6 +45,35 @@ class Vector2:
              raise ZeroDivisionError("Vector2をゼロで割ることはできません。")
         return Vector2(self.x / scalar, self.y / scalar)
 
+    # --- インプレース演算（新しいオブジェクトを確保しない） ---
+
+    def iadd(self, other: Vector2) -> Vector2:
+        """自身に other を加算し、自身を返す。"""
+        self.x += other.x
+        self.y += other.y
+        return self
+
+    def isub(self, other: Vector2) -> Vector2:
+        """自身から other を減算し、自身を返す。"""
+        self.x -= other.x
+        self.y -= other.y
+        return self
+
+    def imul(self, scalar: float) -> Vector2:
+        """自身をスカラー倍し、自身を返す。"""
+        self.x *= scalar
+        self.y *= scalar
+        return self
+
+    def __iadd__(self, other: Vector2) -> Vector2:
+        return self.iadd(other)
+
+    def __isub__(self, other: Vector2) -> Vector2:
+        return self.isub(other)
+
+    def __imul__(self, scalar: float) -> Vector2:
+        return self.imul(scalar)
+
     # --- 比較と表現 ---
 
     def __eq__(self, other: object) -> bool:
@@ -59,29 +103,49 @@ class Vector2:
 
     def normalized(self) -> Vector2:
         """同じ方向の単位ベクトルを返す。"""
-        mag = self.magnitude()
+        return self.normalized_into(Vector2(0, 0))
+
+    def normalized_into(self, out: Vector2) -> Vector2:
+        """同じ方向の単位ベクトルを out に書き込み、out を返す。"""
+        mag = math.hypot(self.x, self.y)
         if mag == 0:
-            return Vector2(0, 0)
-        return Vector2(self.x / mag, self.y / mag)
+            return out.set(0, 0)
+        return out.set(self.x / mag, self.y / mag)
 
     def proj(self, other: Vector2) -> Vector2:
         """このベクトルを別のベクトルに射影した結果を返す。"""
-        n = other.normalized()
-        length = self.dot(n)
-        return n * length
+        return self.proj_into(other, Vector2(0, 0))
+
+    def proj_into(self, other: Vector2, out: Vector2) -> Vector2:
+        """このベクトルを別のベクトルに射影した結果を out に書き込み、out を返す。"""
+        len_sq = other.x * other.x + other.y * other.y
+        if len_sq == 0:
+            return out.set(0, 0)
+        t = (self.x * other.x + self.y * other.y) / len_sq
+        return out.set(other.x * t, other.y * t)
 
     def perp(self, other: Vector2) -> Vector2:
         """このベクトルの、別のベクトルに垂直な成分を返す。"""
-        return self - self.proj(other)
+        return self.perp_into(other, Vector2(0, 0))
+
+    def perp_into(self, other: Vector2, out: Vector2) -> Vector2:
+        """このベクトルの、別のベクトルに垂直な成分を out に書き込み、out を返す。"""
+        x, y = self.x, self.y
+        self.proj_into(other, out)
+        return out.set(x - out.x, y - out.y)
 
     def rotate(self, degrees: float) -> Vector2:
         """ベクトルを度単位で回転させ、新しいVector2を返す。"""
+        return self.rotate_into(degrees, Vector2(0, 0))
+
+    def rotate_into(self, degrees: float, out: Vector2) -> Vector2:
+        """ベクトルを度単位で回転させた結果を out に書き込み、out を返す。"""
         rad = math.radians(degrees)
         cos = math.cos(rad)
         sin = math.sin(rad)
         new_x = self.x * cos - self.y * sin
         new_y = self.x * sin + self.y * cos
-        return Vector2(new_x, new_y)
+        return out.set(new_x, new_y)
 
     def scale(self, sx: float, sy: float) -> Vector2:
         """ベクトルをsx, syで非一様にスケールし、新しいVector2を返す。"""
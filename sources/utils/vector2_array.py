@@ -0,0 +1,154 @@
+from __future__ import annotations
+import math
+from array import array
+from typing import Iterable, Sequence
+from .vector2 import Vector2
+
+
+class Vector2Array:
+    """
+    多数の2Dベクトルをまとめて扱うための構造体配列（SoA）クラス。
+    x成分とy成分をそれぞれ連続した float 配列（array('d')）に保持し、
+    Vector2 を1つずつ生成せずに一括で演算する。
+    演算メソッドは配列を作り直さずに要素を書き換え、自身を返す。
+    要素を読むたびに float が作られるため、数個の頂点の射影のような小さな処理では
+    Vector2 のリストを直接走査するより速くはならない（Polygon の SAT は頂点のリストを使う）。
+    """
+
+    __slots__ = ("xs", "ys")
+
+    def __init__(self, xs: Iterable[float] = (), ys: Iterable[float] = ()):
+        self.xs: array = array("d", xs)
+        self.ys: array = array("d", ys)
+        if len(self.xs) != len(self.ys):
+            raise ValueError("xs と ys の長さが一致しません。")
+
+    @classmethod
+    def zeros(cls, n: int) -> Vector2Array:
+        """長さ n のゼロベクトル配列を作成する。"""
+        return cls([0.0] * n, [0.0] * n)
+
+    @classmethod
+    def from_vectors(cls, vectors: Iterable[Vector2]) -> Vector2Array:
+        """Vector2 のリストから作成する。"""
+        vectors = list(vectors)
+        return cls([v.x for v in vectors], [v.y for v in vectors])
+
+    def copy(self) -> Vector2Array:
+        """同じ内容を持つ新しい配列を返す。"""
+        return Vector2Array(self.xs, self.ys)
+
+    def to_vectors(self) -> list[Vector2]:
+        """Vector2 のリストに変換する。"""
+        return [Vector2(x, y) for x, y in zip(self.xs, self.ys)]
+
+    def set_from(self, other: Vector2Array) -> Vector2Array:
+        """other の内容を自身に書き込む（長さが同じなら再確保しない）。"""
+        if len(self.xs) == len(other.xs):
+            self.xs[:] = other.xs
+            self.ys[:] = other.ys
+        else:
+            self.xs = array("d", other.xs)
+            self.ys = array("d", other.ys)
+        return self
+
+    # --- 要素アクセス ---
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+    def __getitem__(self, i: int) -> Vector2:
+        return Vector2(self.xs[i], self.ys[i])
+
+    def __iter__(self):
+        for x, y in zip(self.xs, self.ys):
+            yield Vector2(x, y)
+
+    def set_item(self, i: int, x: float, y: float):
+        """i 番目の要素を上書きする。"""
+        self.xs[i] = x
+        self.ys[i] = y
+
+    def __repr__(self) -> str:
+        return f"Vector2Array({list(zip(self.xs, self.ys))})"
+
+    # --- 一括演算（インプレース） ---
+
+    def add(self, dx: float, dy: float) -> Vector2Array:
+        """全要素に (dx, dy) を加算する。"""
+        xs, ys = self.xs, self.ys
+        for i in range(len(xs)):
+            xs[i] += dx
+            ys[i] += dy
+        return self
+
+    def add_array(self, other: Vector2Array) -> Vector2Array:
+        """要素ごとに other を加算する。"""
+        if len(other) != len(self):
+            raise ValueError("配列の長さが一致しません。")
+        xs, ys, oxs, oys = self.xs, self.ys, other.xs, other.ys
+        for i in range(len(xs)):
+            xs[i] += oxs[i]
+            ys[i] += oys[i]
+        return self
+
+    def scale(self, sx: float, sy: float) -> Vector2Array:
+        """全要素を sx, sy で非一様にスケールする。"""
+        xs, ys = self.xs, self.ys
+        for i in range(len(xs)):
+            xs[i] *= sx
+            ys[i] *= sy
+        return self
+
+    def rotate(self, degrees: float | Sequence[float]) -> Vector2Array:
+        """
+        全要素を度単位で回転する。
+        degrees に数値を渡すと全要素を同じ角度で、
+        シーケンスを渡すと要素ごとに異なる角度で回転する。
+        """
+        xs, ys = self.xs, self.ys
+        if isinstance(degrees, (int, float)):
+            rad = math.radians(degrees)
+            cos = math.cos(rad)
+            sin = math.sin(rad)
+            for i in range(len(xs)):
+                x, y = xs[i], ys[i]
+                xs[i] = x * cos - y * sin
+                ys[i] = x * sin + y * cos
+            return self
+
+        if len(degrees) != len(xs):
+            raise ValueError("角度の数と要素数が一致しません。")
+        for i, d in enumerate(degrees):
+            rad = math.radians(d)
+            cos = math.cos(rad)
+            sin = math.sin(rad)
+            x, y = xs[i], ys[i]
+            xs[i] = x * cos - y * sin
+            ys[i] = x * sin + y * cos
+        return self
+
+    def normalize(self) -> Vector2Array:
+        """全要素を単位ベクトルにする（長さ0の要素は0のまま）。"""
+        xs, ys = self.xs, self.ys
+        for i in range(len(xs)):
+            m = math.hypot(xs[i], ys[i])
+            if m:
+                xs[i] /= m
+                ys[i] /= m
+        return self
+
+    # --- 射影 ---
+
+    def dot(self, axis: Vector2) -> array:
+        """各要素と axis の内積を配列で返す。"""
+        ax, ay = axis.x, axis.y
+        return array("d", [x * ax + y * ay for x, y in zip(self.xs, self.ys)])
+
+    def project(self, axis: Vector2) -> tuple[float, float]:
+        """全要素を axis に射影したときの (最小値, 最大値) を返す。"""
+        if not self.xs:
+            return 0.0, 0.0
+        ax, ay = axis.x, axis.y
+        dots = [x * ax + y * ay for x, y in zip(self.xs, self.ys)]
+        return min(dots), max(dots)
@@ -0,0 +1,69 @@
+import random
+import unittest
+from sources.utils.geometry import Capsule, Circle, Line
+from sources.utils.polygon import Polygon
+from sources.utils.vector2 import Vector2
+
+
+def concave_shape(rng: random.Random, x: float, y: float) -> Polygon:
+    shape = rng.choice([
+        lambda: Polygon.create_star(5, 12, 5, x, y),
+        lambda: Polygon.create_heart(1.2, x, y),
+        lambda: Polygon.create_arrow(20, 10, 4, x, y),
+    ])()
+    shape.rotate(rng.uniform(0, 360))
+    scale = rng.uniform(0.6, 1.5)
+    shape.set_scale(scale, scale * rng.choice([1.0, 0.7]))
+    return shape
+
+
+def any_shape(rng: random.Random, x: float, y: float):
+    kind = rng.randrange(5)
+    if kind == 0:
+        return concave_shape(rng, x, y)
+    if kind == 1:
+        shape = Polygon.create_regular_polygon(rng.randint(3, 8), rng.uniform(3, 10), x, y)
+        shape.rotate(rng.uniform(0, 360))
+        return shape
+    if kind == 2:
+        return Circle(x, y, rng.uniform(1, 6))
+    end = Vector2(x + rng.uniform(-15, 15), y + rng.uniform(-15, 15))
+    if kind == 3:
+        return Capsule(Vector2(x, y), end, rng.uniform(1, 4))
+    return Line(Vector2(x, y), end)
+
+
+class ConcaveContactTest(unittest.TestCase):
+
+    def test_push_out_separates(self):
+        """b を normal 方向に depth だけ動かすと離れる（Contact の約束）。"""
+        rng = random.Random(11)
+        contacts = 0
+        for _ in range(1500):
+            a = concave_shape(rng, 0, 0)
+            b = any_shape(rng, rng.uniform(-20, 20), rng.uniform(-20, 20))
+            if rng.random() < 0.5:
+                a, b = b, a
+            contact = a.collide(b)
+            if contact is None:
+                continue
+            contacts += 1
+            push = contact.depth + 1e-6
+            b.translate(contact.normal.x * push, contact.normal.y * push)
+            self.assertFalse(a.intersects(b), f"{a!r} {b!r} {contact!r}")
+        self.assertGreater(contacts, 300)
+
+    def test_collide_does_not_touch_shapes(self):
+        """collide() は読み取りだけで、どちらの図形の位置も version も変えない。"""
+        rng = random.Random(5)
+        for _ in range(300):
+            a = concave_shape(rng, 0, 0)
+            b = any_shape(rng, rng.uniform(-15, 15), rng.uniform(-15, 15))
+            before = (a.version, b.version, b.aabb())
+            a.collide(b)
+            b.collide(a)
+            self.assertEqual((a.version, b.version, b.aabb()), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from sources.utils.tile_collision import TileCollisionMap, TILE_SOLID, TILE_ONE_WAY
+from sources.utils.tile_motion import move_aabb
+
+FLOOR = 1
+PLATFORM = 2
+
+
+class DictTilemap:
+    """pget/pset だけを持つ、辞書で空のタイルを0とするタイルマップ。"""
+
+    def __init__(self):
+        self.tiles = {}
+
+    def pget(self, x: int, y: int) -> int:
+        return self.tiles.get((x, y), 0)
+
+    def pset(self, x: int, y: int, tile: int):
+        self.tiles[(x, y)] = tile
+
+
+def make_tiles() -> TileCollisionMap:
+    """行 8 に一方通行の足場（列 2〜5）、行 15 に床がある 16×16 タイルのマップ。"""
+    tilemap = DictTilemap()
+    for x in range(2, 6):
+        tilemap.pset(x, 8, PLATFORM)
+    for x in range(16):
+        tilemap.pset(x, 15, FLOOR)
+    return TileCollisionMap(tilemap, 16, 16, {FLOOR: TILE_SOLID, PLATFORM: TILE_ONE_WAY})
+
+
+class OneWayPlatformTest(unittest.TestCase):
+
+    def test_lands_when_falling_from_above(self):
+        move = move_aabb(make_tiles(), 24, 50, 8, 8, 0, 12, 8)
+        self.assertTrue(move.bottom)
+        self.assertEqual(move.y, 8 * 8 - 8)
+        self.assertIn((3, 8), move.touched)
+
+    def test_stays_on_platform(self):
+        move = move_aabb(make_tiles(), 24, 56, 8, 8, 0, 1, 8)
+        self.assertTrue(move.bottom)
+        self.assertEqual(move.y, 56)
+
+    def test_passes_through_from_below_and_sides(self):
+        tiles = make_tiles()
+        up = move_aabb(tiles, 24, 70, 8, 8, 0, -12, 8)
+        self.assertFalse(up.top)
+        self.assertEqual(up.y, 58)
+        # 足場の途中まで上がった位置から落ちても、上端より下から来たので乗らない
+        down = move_aabb(tiles, 24, 58, 8, 8, 0, 6, 8)
+        self.assertFalse(down.bottom)
+        side = move_aabb(tiles, 0, 64, 8, 8, 20, 0, 8)
+        self.assertFalse(side.right)
+        self.assertEqual(side.x, 20)
+
+    def test_disabled(self):
+        move = move_aabb(make_tiles(), 24, 50, 8, 8, 0, 12, 8, one_way=0)
+        self.assertFalse(move.bottom)
+        self.assertEqual(move.y, 62)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import random
+import threading
+import unittest
+from unittest import mock
+from sources.utils.tile_world import ChunkedWorld, tilemap_loader
+
+
+class PatternTilemap:
+    """pget だけを持つ、座標から決まるタイルを返すタイルマップ。"""
+
+    def pget(self, x: int, y: int) -> int:
+        return (x * 7 + y * 3) % 5
+
+
+TILE_CLASSES = {1: 1, 2: 2}
+
+
+def make_world(background: bool, max_chunks: int = 6) -> ChunkedWorld:
+    return ChunkedWorld(tilemap_loader(PatternTilemap(), 8), 160, 160, TILE_CLASSES,
+                        chunk_tiles=8, tile_size=8, max_chunks=max_chunks, background=background)
+
+
+class ChunkedWorldTest(unittest.TestCase):
+
+    def _scroll(self, world: ChunkedWorld, frames: int = 2000):
+        """カメラを動かしながら、画面に映るチャンクが常駐しているか毎フレーム確かめる。"""
+        rng = random.Random(3)
+        x = y = 0.0
+        limit = 160 * 8 - 64
+        for _ in range(frames):
+            x = max(0.0, min(limit, x + rng.uniform(-12, 16)))
+            y = max(0.0, min(limit, y + rng.uniform(-12, 16)))
+            world.update(x, y, 64, 64)  # 最大 2×2 チャンクが映る
+            missing = [key for key in world._visible if key not in world._chunks]
+            self.assertEqual(missing, [])
+            self.assertLessEqual(len(world), world.max_chunks)
+
+    def test_visible_chunks_survive_small_budget(self):
+        world = make_world(background=False)
+        self._scroll(world)
+        self.assertGreater(world.evictions, 0)
+
+    def test_visible_chunks_survive_small_budget_background(self):
+        world = make_world(background=True)
+        try:
+            self._scroll(world)
+        finally:
+            world.close()
+
+    def test_queried_chunks_are_evicted_least_recently_used(self):
+        """衝突判定の問い合わせで使ったチャンクは、読み込み順ではなく使った順で破棄される。"""
+        world = make_world(background=False, max_chunks=3)
+        for cx in range(3):
+            world.is_solid(cx * 8, 0)
+        world.is_solid(0, 0)  # (0, 0) を使い直す
+        world.is_solid(3 * 8, 0)
+        self.assertEqual(list(world._chunks), [(2, 0), (0, 0), (3, 0)])
+
+    def test_falls_back_to_sync_without_threads(self):
+        with mock.patch.object(threading.Thread, "start", side_effect=RuntimeError):
+            world = make_world(background=True, max_chunks=16)
+            world.update(0, 0, 64, 64)
+        self.assertFalse(world.background)
+        self.assertIsNone(world._worker)
+        self.assertEqual(set(world._chunks), {(0, 0), (1, 0), (0, 1), (1, 1)})  # 先読みも同期で済んでいる
+
+
+if __name__ == "__main__":
+    unittest.main()